@@ -61,3 +61,4 @@ assert config.has_section(
 LOCAL_PARSERS = config.get("local", "parsers")
 LOCAL_BASIC_TESTS = config.get("local", "basic_tests")
 LOCAL_ENHANCED_TESTS = config.get("local", "enhanced_tests")
+LOCAL_CACHE = config.get("local", "cache", fallback="")
@@ -1,13 +1,28 @@
+import csv
+
 from datetime import datetime
 from tqdm import tqdm
 
-from pepys_import.core.formats import unit_registry
-from pepys_import.utils.unit_utils import convert_absolute_angle, convert_speed
-from pepys_import.file.highlighter.support.combine import combine_tokens
+from pepys_import.core.store.measurement_buffer import (
+    DayCache,
+    StateTrack,
+    microseconds_to_datetime,
+    normalise_heading,
+)
 from pepys_import.core.validators import constants
 from pepys_import.file.importer import Importer
 from pepys_import.core.formats.location import Location
 
+# Columns of the values read from the rows
+DATE_COLUMN = 2
+TIME_COLUMN = 3
+LAT_COLUMN = 4
+LONG_COLUMN = 5
+SPEED_COLUMN = 6
+HEADING_COLUMN = 8
+ALTITUDE_COLUMN = 10
+COMP_NAME_COLUMN = 18
+
 
 class ETracImporter(Importer):
     def __init__(
@@ -22,6 +37,9 @@ class ETracImporter(Importer):
         self.errors = list()
 
         self.text_label = None
+        # Parsed dates and times of day, as they repeat across the rows
+        self.days = DayCache(lambda date: datetime.strptime(date, "%Y/%m/%d"))
+        self.times_of_day = dict()
 
     def can_load_this_type(self, suffix):
         return suffix.upper() == ".TXT"
@@ -35,73 +53,86 @@ class ETracImporter(Importer):
     def can_load_this_file(self, file_contents):
         return True
 
+    def platform_names(self, path, file_contents):
+        rows = csv.reader(file_contents)
+        # Skip the header
+        next(rows, None)
+        for fields in rows:
+            if (
+                len(fields) > COMP_NAME_COLUMN
+                and len(fields[COMP_NAME_COLUMN].split()) > 1
+            ):
+                yield self.name_for(fields[COMP_NAME_COLUMN])
+
     def _load_this_file(self, data_store, path, file_object, datafile, change_id):
-        for line_number, line in enumerate(tqdm(file_object.lines()), 1):
+        # The rows are read with the csv module rather than tokenised, and their
+        # values are kept in columns per vessel, which are added to the datafile in
+        # bulk once the whole file has been read
+        lines = file_object.line_reader()
+        rows = csv.reader(lines)
+        tracks = dict()
+        next_line_index = 0
+        for fields in tqdm(rows, total=len(lines)):
+            # Rows normally span one line, but quoted fields may span more
+            line_index, next_line_index = next_line_index, rows.line_num
+            line_number = line_index + 1
             # Skip the header
             if line_number == 1:
                 continue
 
-            tokens = line.tokens(line.CSV_DELIM, ",")
-            if len(tokens) <= 1:
+            if len(fields) <= 1:
                 # the last line may be empty, don't worry
                 continue
-            elif len(tokens) < 17:
+            elif len(fields) <= COMP_NAME_COLUMN:
                 self.errors.append(
                     {
-                        self.error_type: f"Error on line {line_number}. Not enough tokens: {line}"
+                        self.error_type: f"Error on line {line_number}. Not enough tokens: {lines[line_index]}"
                     }
                 )
                 continue
 
-            # separate token strings
-            date_token = tokens[2]
-            time_token = tokens[3]
-            lat_degrees_token = tokens[4]
-            long_degrees_token = tokens[5]
-            heading_token = tokens[8]
-            altitude_token = tokens[10]
-            speed_token = tokens[6]
-            comp_name_token = tokens[18]
-
-            vessel_name = self.name_for(comp_name_token.text)
-            comp_name_token.record(self.name, "vessel name", vessel_name, "n/a")
-
-            if len(date_token.text) != 10:
+            date = fields[DATE_COLUMN].strip()
+            time = fields[TIME_COLUMN].strip()
+            if len(date) != 10:
                 self.errors.append(
                     {
-                        self.error_type: f"Error on line {line_number}. Date format '{date_token.text}' "
+                        self.error_type: f"Error on line {line_number}. Date format '{date}' "
                         f"should be 10 figure data"
                     }
                 )
                 continue
 
             # Times always in Zulu/GMT
-            if len(time_token.text) != 8:
+            if len(time) != 8:
                 self.errors.append(
                     {
-                        self.error_type: f"Line {line_number}. Error in Date format '{time_token.text}'."
+                        self.error_type: f"Line {line_number}. Error in Date format '{time}'."
                         "Should be HH:mm:ss"
                     }
                 )
                 continue
 
-            timestamp = self.parse_timestamp(date_token.text, time_token.text)
-            combine_tokens(date_token, time_token).record(
-                self.name, "timestamp", timestamp, "n/a"
-            )
+            values = self.parse_values(fields, line_number)
+            if values is None:
+                continue
 
-            # and finally store it
-            platform = data_store.get_platform(
-                platform_name=vessel_name,
-                nationality="UK",
-                platform_type="Fisher",
-                privacy="Public",
-                change_id=change_id,
-            )
-            sensor_type = data_store.add_to_sensor_types("GPS", change_id=change_id)
-            privacy = data_store.missing_data_resolver.resolve_privacy(
-                data_store, change_id
-            )
+            vessel_name = self.name_for(fields[COMP_NAME_COLUMN])
+            track = tracks.get(vessel_name)
+            if track is None:
+                track = StateTrack(elevations=True)
+                tracks[vessel_name] = track
+            time, latitude, longitude, elevation, heading, speed = values
+            track.append(time, latitude, longitude, heading, speed, elevation)
+
+            self.record_fields(file_object, line_index, fields, vessel_name, values)
+
+        # and finally store them, for each vessel
+        sensor_type = data_store.add_to_sensor_types("GPS", change_id=change_id)
+        privacy = data_store.missing_data_resolver.resolve_privacy(
+            data_store, change_id
+        )
+        for vessel_name, track in tracks.items():
+            platform = self.get_platform(data_store, vessel_name, change_id)
             sensor = platform.get_sensor(
                 data_store=data_store,
                 sensor_name="E-Trac",
@@ -109,44 +140,140 @@ class ETracImporter(Importer):
                 privacy=privacy.name,
                 change_id=change_id,
             )
-            state = datafile.create_state(
-                data_store, platform, sensor, timestamp, self.short_name
+            datafile.create_states(
+                data_store,
+                platform,
+                sensor,
+                track.times,
+                self.short_name,
+                track.floats(self.prev_location.get(vessel_name)),
+                privacy_id=privacy.privacy_id,
             )
-            state.privacy = privacy.privacy_id
+            self.prev_location[vessel_name] = track.last_location()
 
-            if vessel_name in self.prev_location:
-                state.prev_location = self.prev_location[vessel_name]
+    def parse_values(self, fields, line_number):
+        """
+        Returns the time, latitude, longitude, elevation, heading and speed of a row,
+        in the units they are stored in, or None if any of them is invalid
+        """
+        try:
+            time = self.parse_microseconds(
+                fields[DATE_COLUMN].strip(), fields[TIME_COLUMN].strip()
+            )
+        except ValueError:
+            self.errors.append(
+                {
+                    self.error_type: f"Line {line_number}. Error in timestamp "
+                    f"'{fields[DATE_COLUMN].strip()} {fields[TIME_COLUMN].strip()}'"
+                }
+            )
+            return None
 
+        try:
+            latitude = float(fields[LAT_COLUMN])
+            longitude = float(fields[LONG_COLUMN])
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValueError
+        except ValueError:
+            # Report the error as it is reported for a single Location
             location = Location(errors=self.errors, error_type=self.error_type)
-            location.set_latitude_decimal_degrees(lat_degrees_token.text)
-            location.set_longitude_decimal_degrees(long_degrees_token.text)
+            location.set_latitude_decimal_degrees(fields[LAT_COLUMN])
+            location.set_longitude_decimal_degrees(fields[LONG_COLUMN])
+            return None
 
-            state.location = location
-            self.prev_location[vessel_name] = state.location
-
-            combine_tokens(long_degrees_token, lat_degrees_token).record(
-                self.name, "location", state.location, "decimal degrees"
+        altitude = fields[ALTITUDE_COLUMN].strip()
+        try:
+            elevation = float(altitude)
+        except ValueError:
+            self.errors.append(
+                {
+                    self.error_type: f"Line {line_number}. Error in altitude value {altitude}. "
+                    f"Couldn't convert to number"
+                }
             )
+            return None
 
-            state.elevation = altitude_token.text * unit_registry.metre
-            altitude_token.record(self.name, "altitude", state.elevation, "metres")
-
-            heading = convert_absolute_angle(
-                heading_token.text, line_number, self.errors, self.error_type
+        try:
+            heading = float(fields[HEADING_COLUMN])
+        except ValueError:
+            self.errors.append(
+                {
+                    self.error_type: f"Line {line_number}. Error in angle value "
+                    f"{fields[HEADING_COLUMN]}. Couldn't convert to a number"
+                }
             )
-            state.heading = heading
-            heading_token.record(self.name, "heading", heading, "degrees")
-
-            speed = convert_speed(
-                speed_token.text,
-                unit_registry.knots,
-                line_number,
-                self.errors,
-                self.error_type,
+            return None
+        heading = normalise_heading(heading)
+
+        try:
+            speed = float(fields[SPEED_COLUMN])
+        except ValueError:
+            self.errors.append(
+                {
+                    self.error_type: f"Line {line_number}. Error in speed value "
+                    f"{fields[SPEED_COLUMN]}. Couldn't convert to a number"
+                }
             )
-            if speed:
-                state.speed = speed
-            speed_token.record(self.name, "speed", speed, "knots")
+            return None
+
+        return time, latitude, longitude, elevation, heading, speed
+
+    def parse_microseconds(self, date, time):
+        """
+        Returns the time of a date and a time of day in microseconds since the epoch,
+        caching them as they repeat across the rows
+        """
+        day = self.days.microseconds(date)
+        time_of_day = self.times_of_day.get(time)
+        if time_of_day is None:
+            parsed = datetime.strptime(time, "%H:%M:%S")
+            time_of_day = (
+                parsed.hour * 3600 + parsed.minute * 60 + parsed.second
+            ) * 1000000
+            self.times_of_day[time] = time_of_day
+        return day + time_of_day
+
+    def record_fields(self, file_object, line_index, fields, vessel_name, values):
+        """Records the usages of the fields of a row, one usage per field"""
+        time, latitude, longitude, elevation, heading, speed = values
+        spans = field_spans(file_object.line_reader()[line_index], fields)
+        file_object.record_spans(
+            line_index, [spans[COMP_NAME_COLUMN]], self.name, "vessel name", vessel_name
+        )
+        file_object.record_spans(
+            line_index,
+            [spans[DATE_COLUMN], spans[TIME_COLUMN]],
+            self.name,
+            "timestamp",
+            microseconds_to_datetime(time),
+        )
+        file_object.record_spans(
+            line_index,
+            [spans[LONG_COLUMN], spans[LAT_COLUMN]],
+            self.name,
+            "location",
+            f"Location(lon={longitude}, lat={latitude})",
+            "decimal degrees",
+        )
+        file_object.record_spans(
+            line_index,
+            [spans[ALTITUDE_COLUMN]],
+            self.name,
+            "altitude",
+            elevation,
+            "metres",
+        )
+        file_object.record_spans(
+            line_index,
+            [spans[HEADING_COLUMN]],
+            self.name,
+            "heading",
+            heading,
+            "degrees",
+        )
+        file_object.record_spans(
+            line_index, [spans[SPEED_COLUMN]], self.name, "speed", speed, "knots"
+        )
 
     @staticmethod
     def name_for(token):
@@ -162,3 +289,21 @@ class ETracImporter(Importer):
         res = datetime.strptime(date.strip() + " " + time.strip(), format_str)
 
         return res
+
+
+def field_spans(line, fields):
+    """
+    Returns the (start, end) offsets in the line of the text of each of its CSV
+    fields, without leading whitespace
+    """
+    spans = list()
+    position = 0
+    for field in fields:
+        start = line.find(field, position)
+        if start < 0:
+            # e.g. a quoted field with escaped quotes
+            start = position
+        end = start + len(field)
+        spans.append((start + len(field) - len(field.lstrip()), end))
+        position = end
+    return spans
@@ -1,4 +1,3 @@
-from lxml import etree
 from dateutil.parser import parse
 from tqdm import tqdm
 
@@ -36,118 +35,176 @@ class GPXImporter(Importer):
         # won't parse a string with an encoding attribute - it requires bytes instead
         return True
 
+    def platform_names(self, path, file_contents):
+        from lxml import etree
+
+        # Names of the <trk> elements, read without building the rest of the tree
+        events = etree.iterparse(path, tag=("{*}trk", "{*}name", "{*}trkpt"))
+        try:
+            for event, element in events:
+                tag = etree.QName(element).localname
+                if tag == "name":
+                    parent = element.getparent()
+                    if parent is not None and etree.QName(parent).localname == "trk":
+                        yield element.text
+                    continue
+                self.clear_element(element)
+        except (etree.XMLSyntaxError, OSError):
+            # reported when the file is loaded
+            return
+
     def _load_this_file(self, data_store, path, file_object, datafile, change_id):
         # Parse XML file from the full path of the file
         # Note: we can't use the file_contents variable passed in, as lxml refuses
         # to parse a string that has an encoding attribute in the XML - it requires bytes instead
+        # lxml is imported when a GPX file is loaded rather than with the importers
+        from lxml import etree
+
+        # The file is parsed as a stream of elements, each <trkpt> element is loaded
+        # as soon as it has been parsed and then cleared, so that memory use doesn't
+        # grow with the size of the file
+        events = etree.iterparse(
+            path, events=("start", "end"), tag=("{*}trk", "{*}name", "{*}trkpt")
+        )
+        track = None
+        # <trkpt> elements parsed before the name of their track
+        pending_points = list()
+        progress = tqdm(unit=" points")
         try:
-            doc = etree.parse(path)
-        except Exception as e:
+            for event, element in events:
+                tag = etree.QName(element).localname
+                if tag == "trk":
+                    if event == "start":
+                        # <trk> elements should correspond to a specific platform,
+                        # with the platform name in the <name> element
+                        track = GPXTrack()
+                    else:
+                        if pending_points:
+                            self.errors.append(
+                                {
+                                    self.error_type: f"Line {element.sourceline}. "
+                                    f"Error: <trk> element must have child <name> element"
+                                }
+                            )
+                            pending_points = list()
+                        self.clear_element(element)
+                        track = None
+                elif event == "start":
+                    continue
+                elif tag == "name":
+                    parent = element.getparent()
+                    if track is None or etree.QName(parent).localname != "trk":
+                        continue
+                    # Get the platform and sensor details, as these will be the same
+                    # for all points in this track
+                    track.set_platform(
+                        data_store,
+                        element.text,
+                        self.get_platform(data_store, element.text, change_id),
+                        change_id,
+                    )
+                    for point in pending_points:
+                        self.load_track_point(data_store, datafile, track, point)
+                        self.clear_element(point)
+                        progress.update()
+                    pending_points = list()
+                elif track is not None:
+                    # <trkpt> elements of this track, no matter which <trkseg> they
+                    # are in - as all <trkseg> elements below this belong to this track
+                    if track.platform is None:
+                        pending_points.append(element)
+                        continue
+                    self.load_track_point(data_store, datafile, track, element)
+                    self.clear_element(element)
+                    progress.update()
+        except (etree.XMLSyntaxError, OSError) as e:
             self.errors.append(
                 {
                     self.error_type: f'Invalid GPX file at {path}\nError from parsing was "{str(e)}"'
                 }
             )
-            return
+        finally:
+            progress.close()
 
-        # Iterate through <trk> elements - these should correspond to
-        # a specific platform, with the platform name in the <name> element
-        for track_element in tqdm(doc.findall("//{*}trk")):
-            track_name = track_element.find("{*}name").text
-
-            # Get the platform and sensor details, as these will be the same for all
-            # points in this track
-            platform = data_store.get_platform(
-                platform_name=track_name,
-                nationality="UK",
-                platform_type="Fisher",
-                privacy="Public",
-                change_id=change_id,
-            )
-            sensor_type = data_store.add_to_sensor_types("GPS", change_id=change_id)
-            privacy = data_store.missing_data_resolver.resolve_privacy(
-                data_store, change_id
-            )
-            sensor = platform.get_sensor(
-                data_store=data_store,
-                sensor_name="GPX",
-                sensor_type=sensor_type,
-                privacy=privacy.name,
-                change_id=change_id,
+    def load_track_point(self, data_store, datafile, track, tpt):
+        """Creates the state of a <trkpt> element of a track"""
+        # Extract information (location, speed etc) from <trkpt> element
+        latitude_str = tpt.attrib["lat"]
+        longitude_str = tpt.attrib["lon"]
+
+        timestamp_str = self.get_child_text_if_exists(tpt, "{*}time")
+
+        if timestamp_str is None:
+            self.errors.append(
+                {
+                    self.error_type: f"Line {tpt.sourceline}. "
+                    f"Error: <trkpt> element must have child <time> element"
+                }
             )
+            return
 
-            # Get all <trkpt> children of this track
-            # (no matter which <trkseg> they are in - as all <trkseg> elements below this
-            # belong to this track)
-            for tpt in track_element.findall(".//{*}trkpt"):
-                # Extract information (location, speed etc) from <trkpt> element
-                latitude_str = tpt.attrib["lat"]
-                longitude_str = tpt.attrib["lon"]
-
-                timestamp_str = self.get_child_text_if_exists(tpt, "{*}time")
-
-                if timestamp_str is None:
-                    self.errors.append(
-                        {
-                            self.error_type: f"Line {tpt.sourceline}. "
-                            f"Error: <trkpt> element must have child <time> element"
-                        }
-                    )
-                    continue
+        speed_str = self.get_child_text_if_exists(tpt, "{*}speed")
+        course_str = self.get_child_text_if_exists(tpt, "{*}course")
+        elevation_str = self.get_child_text_if_exists(tpt, "{*}ele")
 
-                speed_str = self.get_child_text_if_exists(tpt, "{*}speed")
-                course_str = self.get_child_text_if_exists(tpt, "{*}course")
-                elevation_str = self.get_child_text_if_exists(tpt, "{*}ele")
+        # Parse timestamp and create state
+        timestamp = parse(timestamp_str)
+        state = datafile.create_state(
+            data_store, track.platform, track.sensor, timestamp, self.short_name
+        )
 
-                # Parse timestamp and create state
-                timestamp = parse(timestamp_str)
-                state = datafile.create_state(
-                    data_store, platform, sensor, timestamp, self.short_name
-                )
+        # Add location (no need to convert as it requires a string)
+        if track.name in self.prev_location:
+            state.prev_location = self.prev_location[track.name]
 
-                # Add location (no need to convert as it requires a string)
-                if track_name in self.prev_location:
-                    state.prev_location = self.prev_location[track_name]
+        location = Location(errors=self.errors, error_type=self.error_type)
+        location.set_latitude_decimal_degrees(latitude_str)
+        location.set_longitude_decimal_degrees(longitude_str)
 
-                location = Location(errors=self.errors, error_type=self.error_type)
-                location.set_latitude_decimal_degrees(latitude_str)
-                location.set_longitude_decimal_degrees(longitude_str)
+        state.location = location
+        self.prev_location[track.name] = state.location
 
-                state.location = location
-                self.prev_location[track_name] = state.location
+        # Add course
+        if course_str is not None:
+            course = convert_absolute_angle(
+                course_str, tpt.sourceline, self.errors, self.error_type
+            )
+            state.course = course
+
+        # Add speed (specified in metres per second in the file)
+        if speed_str is not None:
+            speed = convert_speed(
+                speed_str,
+                (unit_registry.metre / unit_registry.second),
+                None,
+                self.errors,
+                self.error_type,
+            )
+            if speed:
+                state.speed = speed
+
+        if elevation_str is not None:
+            try:
+                elevation = float(elevation_str)
+            except ValueError:
+                self.errors.append(
+                    {
+                        self.error_type: f"Line {tpt.sourceline}. Error in elevation value {elevation_str}. "
+                        f"Couldn't convert to number"
+                    }
+                )
+            state.elevation = elevation * unit_registry.metre
 
-                # Add course
-                if course_str is not None:
-                    course = convert_absolute_angle(
-                        course_str, tpt.sourceline, self.errors, self.error_type
-                    )
-                    state.course = course
-
-                # Add speed (specified in metres per second in the file)
-                if speed_str is not None:
-                    speed = convert_speed(
-                        speed_str,
-                        (unit_registry.metre / unit_registry.second),
-                        None,
-                        self.errors,
-                        self.error_type,
-                    )
-                    if speed:
-                        state.speed = speed
-
-                if elevation_str is not None:
-                    try:
-                        elevation = float(elevation_str)
-                    except ValueError:
-                        self.errors.append(
-                            {
-                                self.error_type: f"Line {tpt.sourceline}. Error in elevation value {elevation_str}. "
-                                f"Couldn't convert to number"
-                            }
-                        )
-                    state.elevation = elevation * unit_registry.metre
-
-                state.privacy = privacy.privacy_id
+        state.privacy = track.privacy.privacy_id
+
+    @staticmethod
+    def clear_element(element):
+        """Frees an element which has been loaded, and its preceding siblings"""
+        element.clear(keep_tail=True)
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
 
     def get_child_text_if_exists(self, element, search_string):
         child = element.find(search_string)
@@ -155,3 +212,28 @@ class GPXImporter(Importer):
             return child.text
         else:
             return None
+
+
+class GPXTrack:
+    """The platform and sensor of the points of a <trk> element"""
+
+    def __init__(self):
+        self.name = None
+        self.platform = None
+        self.sensor = None
+        self.privacy = None
+
+    def set_platform(self, data_store, name, platform, change_id):
+        self.name = name
+        self.platform = platform
+        sensor_type = data_store.add_to_sensor_types("GPS", change_id=change_id)
+        self.privacy = data_store.missing_data_resolver.resolve_privacy(
+            data_store, change_id
+        )
+        self.sensor = self.platform.get_sensor(
+            data_store=data_store,
+            sensor_name="GPX",
+            sensor_type=sensor_type,
+            privacy=self.privacy.name,
+            change_id=change_id,
+        )
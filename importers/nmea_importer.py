@@ -1,15 +1,25 @@
 from datetime import datetime
 from tqdm import tqdm
 
-from pepys_import.utils.unit_utils import convert_absolute_angle, convert_speed
-from pepys_import.file.highlighter.support.combine import combine_tokens
-from pepys_import.core.formats import unit_registry
 from pepys_import.core.formats.location import Location
+from pepys_import.core.store.measurement_buffer import (
+    DayCache,
+    StateTrack,
+    microseconds_to_datetime,
+    normalise_heading,
+)
 from pepys_import.core.validators import constants
+from pepys_import.file.highlighter.support.tokenizer import csv_spans
 from pepys_import.file.importer import Importer
 
+# Sentences used for the fixes, with the number of fields they need
+SENTENCE_FIELDS = {"DZA": 4, "VEL": 7, "HDG": 3, "POS": 7}
+
 
 class NMEAImporter(Importer):
+    platform_nationality = "FR"
+    platform_type = "Ferry"
+
     def __init__(
         self,
         name="NMEA File Format Importer",
@@ -19,15 +29,8 @@ class NMEAImporter(Importer):
     ):
         super().__init__(name, validation_level, short_name)
         self.separator = separator
-
-        self.latitude = None
-        self.latitude_hem = None
-        self.longitude = None
-        self.longitude_hem = None
-        self.date = None
-        self.time = None
-        self.heading = None
-        self.speed = None
+        # Parsed dates, as they repeat across the sentences
+        self.days = DayCache(lambda date: self.parse_timestamp(date, "000000"))
 
     def can_load_this_type(self, suffix):
         return suffix.upper() == ".LOG" or suffix.upper() == ".TXT"
@@ -42,137 +45,194 @@ class NMEAImporter(Importer):
         return True
 
     def _load_this_file(self, data_store, path, file_object, datafile, change_id):
-        # keep track of generated platform name
-        platform_name = None
-
-        for line_number, line in enumerate(tqdm(file_object.lines()), 1):
-            tokens = line.tokens(line.CSV_DELIM, ",")
-
-            if len(tokens) > 1:
-
-                msg_type = tokens[1].text
-                if msg_type == "DZA":
-                    self.date_token = tokens[2]
-                    self.date = self.date_token.text
-                    self.time_token = tokens[3]
-                    self.time = self.time_token.text
-                elif msg_type == "VEL":
-                    self.speed_token = tokens[6]
-                    self.speed = self.speed_token.text
-                elif msg_type == "HDG":
-                    self.heading_token = tokens[2]
-                    self.heading = self.heading_token.text
-                elif msg_type == "POS":
-                    self.latitude = tokens[3].text
-                    self.latitude_hem = tokens[4].text
-                    self.lat_token = combine_tokens(tokens[3], tokens[4])
-                    self.longitude = tokens[5].text
-                    self.longitude_hem = tokens[6].text
-                    self.lon_token = combine_tokens(tokens[5], tokens[6])
-
-                # do we have all we need?
-                if (
-                    self.date
-                    and self.time
-                    and self.speed
-                    and self.heading
-                    and self.latitude
-                    and self.latitude_hem
-                    and self.longitude
-                    and self.longitude_hem
-                ):
-
-                    # and finally store it
-                    platform = data_store.get_platform(
-                        platform_name=platform_name,
-                        platform_type="Ferry",
-                        nationality="FR",
-                        privacy="Public",
-                        change_id=change_id,
-                    )
-                    # capture the name
-                    platform_name = platform.name
-                    sensor_type = data_store.add_to_sensor_types(
-                        "_GPS", change_id=change_id
-                    )
-                    privacy = data_store.missing_data_resolver.resolve_privacy(
-                        data_store, change_id
-                    )
-                    sensor = platform.get_sensor(
-                        data_store=data_store,
-                        sensor_name=platform.name,
-                        sensor_type=sensor_type,
-                        privacy=privacy.name,
-                        change_id=change_id,
-                    )
-                    timestamp = self.parse_timestamp(self.date, self.time)
-                    combine_tokens(self.date_token, self.time_token).record(
-                        self.name, "timestamp", timestamp, "n/a"
-                    )
-
-                    state = datafile.create_state(
-                        data_store, platform, sensor, timestamp, self.short_name
-                    )
-
-                    self.location = Location(
-                        errors=self.errors, error_type=self.error_type,
-                    )
-
-                    if not self.location.set_latitude_dms(
-                        degrees=self.latitude[:2],
-                        minutes=self.latitude[2:],
-                        seconds=0,
-                        hemisphere=self.latitude_hem,
-                    ):
-                        continue
-
-                    if not self.location.set_longitude_dms(
-                        degrees=self.longitude[:3],
-                        minutes=self.longitude[3:],
-                        seconds=0,
-                        hemisphere=self.longitude_hem,
-                    ):
-                        continue
-
-                    if platform_name in self.prev_location:
-                        state.prev_location = self.prev_location[platform_name]
-
-                    state.location = self.location
-                    self.prev_location[platform_name] = state.location
-
-                    combine_tokens(self.lat_token, self.lon_token).record(
-                        self.name, "location", state.location, "DMS"
-                    )
-
-                    heading = convert_absolute_angle(
-                        self.heading, line_number, self.errors, self.error_type
-                    )
-                    if heading:
-                        state.heading = heading
-                    self.heading_token.record(self.name, "heading", heading, "degrees")
-
-                    speed = convert_speed(
-                        self.speed,
-                        unit_registry.knots,
-                        line_number,
-                        self.errors,
-                        self.error_type,
-                    )
-                    if speed:
-                        state.speed = speed
-                    self.speed_token.record(self.name, "speed", speed, "knots")
-
-                    state.privacy = privacy.privacy_id
-
-                    self.date = None
-                    self.time = None
-                    self.speed = None
-                    self.heading = None
-                    self.latitude = None
-                    self.latitude_hem = None
-                    self.longitude = None
-                    self.longitude_hem = None
-                    self.location = None
+        # The sentences are recognised by the text following their first comma, and
+        # only the sentences used are split. A fix is complete once a timestamp,
+        # location, heading and speed have been read since the last one, and the
+        # fixes are kept in columns which are added to the datafile in bulk once
+        # the whole file has been read
+        lines = file_object.line_reader()
+        fix = NMEAFix()
+        fixes = StateTrack()
+        for line_index, text in enumerate(tqdm(lines)):
+            comma = text.find(self.separator)
+            if comma < 0:
+                continue
+            sentence = text[comma + 1 : comma + 4]
+            field_count = SENTENCE_FIELDS.get(sentence)
+            if field_count is None or not text.startswith(self.separator, comma + 4):
+                continue
+
+            line_number = line_index + 1
+            fields = csv_spans(text, self.separator)
+            if len(fields) < field_count:
+                self.errors.append(
+                    {
+                        self.error_type: f"Error on line {line_number}. Not enough tokens: {text}"
+                    }
+                )
+                continue
+
+            if sentence == "DZA":
+                self.read_timestamp(fix, line_index, fields)
+            elif sentence == "VEL":
+                self.read_speed(fix, line_index, fields)
+            elif sentence == "HDG":
+                self.read_heading(fix, line_index, fields)
+            else:
+                self.read_location(fix, line_index, fields)
+
+            # do we have all we need?
+            if fix.is_complete():
+                fixes.append(
+                    fix.time,
+                    fix.location.latitude,
+                    fix.location.longitude,
+                    fix.heading,
+                    fix.speed,
+                )
+                self.record_fix(file_object, fix)
+                fix = NMEAFix()
+
+        if not fixes.times:
+            return
+
+        # and finally store them, resolving the platform and sensor once
+        platform = self.get_platform(data_store, None, change_id)
+        sensor_type = data_store.add_to_sensor_types("_GPS", change_id=change_id)
+        privacy = data_store.missing_data_resolver.resolve_privacy(
+            data_store, change_id
+        )
+        sensor = platform.get_sensor(
+            data_store=data_store,
+            sensor_name=platform.name,
+            sensor_type=sensor_type,
+            privacy=privacy.name,
+            change_id=change_id,
+        )
+        datafile.create_states(
+            data_store,
+            platform,
+            sensor,
+            fixes.times,
+            self.short_name,
+            fixes.floats(self.prev_location.get(platform.name)),
+            privacy_id=privacy.privacy_id,
+        )
+        self.prev_location[platform.name] = fixes.last_location()
+
+    def read_timestamp(self, fix, line_index, fields):
+        (date_span, date), (time_span, time) = fields[2], fields[3]
+        if not date or not time:
+            return
+        try:
+            fix.time = self.parse_microseconds(date, time)
+        except ValueError:
+            self.errors.append(
+                {
+                    self.error_type: f"Line {line_index + 1}. Error in timestamp "
+                    f"'{date} {time}'"
+                }
+            )
+            return
+        fix.time_spans = (line_index, [date_span, time_span])
+
+    def read_speed(self, fix, line_index, fields):
+        span, speed = fields[6]
+        if not speed:
+            return
+        try:
+            fix.speed = float(speed)
+        except ValueError:
+            self.errors.append(
+                {
+                    self.error_type: f"Line {line_index + 1}. Error in speed value "
+                    f"{speed}. Couldn't convert to a number"
+                }
+            )
+            return
+        fix.speed_spans = (line_index, [span])
+
+    def read_heading(self, fix, line_index, fields):
+        span, heading = fields[2]
+        if not heading:
+            return
+        try:
+            heading = float(heading)
+        except ValueError:
+            self.errors.append(
+                {
+                    self.error_type: f"Line {line_index + 1}. Error in angle value "
+                    f"{heading}. Couldn't convert to a number"
+                }
+            )
+            return
+        fix.heading = normalise_heading(heading)
+        fix.heading_spans = (line_index, [span])
+
+    def read_location(self, fix, line_index, fields):
+        (lat_span, latitude), (lat_hem_span, latitude_hem) = fields[3], fields[4]
+        (long_span, longitude), (long_hem_span, longitude_hem) = fields[5], fields[6]
+        if not (latitude and latitude_hem and longitude and longitude_hem):
+            return
+        location = Location(errors=self.errors, error_type=self.error_type)
+        if not location.set_latitude_dms(
+            degrees=latitude[:2],
+            minutes=latitude[2:],
+            seconds=0,
+            hemisphere=latitude_hem,
+        ):
+            return
+        if not location.set_longitude_dms(
+            degrees=longitude[:3],
+            minutes=longitude[3:],
+            seconds=0,
+            hemisphere=longitude_hem,
+        ):
+            return
+        fix.location = location
+        fix.location_spans = (
+            line_index,
+            [lat_span, lat_hem_span, long_span, long_hem_span],
+        )
+
+    def record_fix(self, file_object, fix):
+        """Records the usages of the fields of a fix, one usage per value"""
+        file_object.record_spans(
+            *fix.time_spans,
+            self.name,
+            "timestamp",
+            microseconds_to_datetime(fix.time),
+        )
+        file_object.record_spans(
+            *fix.location_spans, self.name, "location", fix.location, "DMS"
+        )
+        file_object.record_spans(
+            *fix.heading_spans, self.name, "heading", fix.heading, "degrees"
+        )
+        file_object.record_spans(
+            *fix.speed_spans, self.name, "speed", fix.speed, "knots"
+        )
+
+    def parse_microseconds(self, date, time):
+        """
+        Returns the time of a date and a time of day in microseconds since the epoch,
+        as parsed by :meth:`parse_timestamp`, caching the dates as they repeat
+        across the sentences
+        """
+        day = self.days.microseconds(date)
+        # HHMMSS with an optional fraction of up to six digits
+        fraction = time[7:]
+        if (
+            not time[:6].isdigit()
+            or len(time) > 6
+            and (time[6] != "." or len(fraction) > 6 or not fraction.isdigit())
+        ):
+            raise ValueError(f"Invalid time of day: {time}")
+        hours, minutes, seconds = int(time[:2]), int(time[2:4]), int(time[4:6])
+        if hours > 23 or minutes > 59 or seconds > 61:
+            raise ValueError(f"Invalid time of day: {time}")
+        microseconds = int(fraction.ljust(6, "0")) if fraction else 0
+        return day + (hours * 3600 + minutes * 60 + seconds) * 1000000 + microseconds
 
     @staticmethod
     def parse_timestamp(date, time):
@@ -187,3 +247,35 @@ class NMEAImporter(Importer):
             format_str += "%H%M%S.%f"
 
         return datetime.strptime(date + time, format_str)
+
+
+class NMEAFix:
+    """
+    Values of a fix read so far, with the (line index, spans) of the fields they
+    were read from
+    """
+
+    __slots__ = [
+        "time",
+        "location",
+        "heading",
+        "speed",
+        "time_spans",
+        "location_spans",
+        "heading_spans",
+        "speed_spans",
+    ]
+
+    def __init__(self):
+        self.time = None
+        self.location = None
+        self.heading = None
+        self.speed = None
+
+    def is_complete(self):
+        return not (
+            self.time is None
+            or self.location is None
+            or self.heading is None
+            or self.speed is None
+        )
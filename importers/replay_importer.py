@@ -2,13 +2,16 @@ import os
 
 from tqdm import tqdm
 
-from pepys_import.core.formats.rep_line import REPLine
+from pepys_import.core.formats.rep_line import REPLine, parse_vessel_name
 from pepys_import.core.formats import unit_registry
 from pepys_import.core.validators import constants
 from pepys_import.file.importer import Importer
 
 
 class ReplayImporter(Importer):
+    # State lines, the lines starting with ";" are skipped
+    line_prefixes = ("",)
+
     def __init__(
         self,
         name="Replay File Format Importer",
@@ -34,52 +37,55 @@ class ReplayImporter(Importer):
     def can_load_this_file(self, file_contents):
         return True
 
+    def platform_names(self, path, file_contents):
+        for text in file_contents:
+            if text.startswith(";"):
+                continue
+            tokens = text.split()
+            if len(tokens) >= 15:
+                yield parse_vessel_name(tokens[2])
+
     def _load_this_file(self, data_store, path, file_object, datafile, change_id):
         for line_number, line in enumerate(tqdm(file_object.lines()), 1):
-            if line.text.startswith(";"):
-                continue
-            else:
-                # create state, to store the data
-                rep_line = REPLine(line_number, line, self.separator)
-                # Store parsing errors in self.errors list
-                if not rep_line.parse(self.errors, self.error_type):
-                    continue
-                # and finally store it
-                vessel_name = rep_line.get_platform()
-                platform = data_store.get_platform(
-                    platform_name=vessel_name,
-                    nationality="UK",
-                    platform_type="Fisher",
-                    privacy="Public",
-                    change_id=change_id,
-                )
-
-                sensor_type = data_store.add_to_sensor_types(
-                    "_GPS", change_id=change_id
-                )
-                privacy = data_store.missing_data_resolver.resolve_privacy(
-                    data_store, change_id
-                )
-                sensor = platform.get_sensor(
-                    data_store=data_store,
-                    sensor_name=platform.name,
-                    sensor_type=sensor_type,
-                    privacy=privacy.name,
-                    change_id=change_id,
-                )
-                state = datafile.create_state(
-                    data_store, platform, sensor, rep_line.timestamp, self.short_name,
-                )
-                state.elevation = (-1 * rep_line.depth) * unit_registry.metre
-                state.heading = rep_line.heading
-                state.speed = rep_line.speed
-                state.privacy = privacy.privacy_id
-
-                if vessel_name in self.prev_location:
-                    state.prev_location = self.prev_location[vessel_name]
-
-                state.location = rep_line.get_location()
-                self.prev_location[vessel_name] = state.location
+            self.load_this_line(data_store, line_number, line, datafile, change_id)
+
+    def _load_this_line(self, data_store, line_number, line, datafile, change_id):
+        # Lines starting with ";" are comments, or loaded by other REP importers
+        if line.text.startswith(";"):
+            return
+        # create state, to store the data
+        rep_line = REPLine(line_number, line, self.separator)
+        # Store parsing errors in self.errors list
+        if not rep_line.parse(self.errors, self.error_type):
+            return
+        # and finally store it
+        vessel_name = rep_line.get_platform()
+        platform = self.get_platform(data_store, vessel_name, change_id)
+
+        sensor_type = data_store.add_to_sensor_types("_GPS", change_id=change_id)
+        privacy = data_store.missing_data_resolver.resolve_privacy(
+            data_store, change_id
+        )
+        sensor = platform.get_sensor(
+            data_store=data_store,
+            sensor_name=platform.name,
+            sensor_type=sensor_type,
+            privacy=privacy.name,
+            change_id=change_id,
+        )
+        state = datafile.create_state(
+            data_store, platform, sensor, rep_line.timestamp, self.short_name,
+        )
+        state.elevation = (-1 * rep_line.depth) * unit_registry.metre
+        state.heading = rep_line.heading
+        state.speed = rep_line.speed
+        state.privacy = privacy.privacy_id
+
+        if vessel_name in self.prev_location:
+            state.prev_location = self.prev_location[vessel_name]
+
+        state.location = rep_line.get_location()
+        self.prev_location[vessel_name] = state.location
 
     @staticmethod
     def degrees_for(degs, mins, secs, hemi: str):
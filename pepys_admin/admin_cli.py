@@ -7,15 +7,32 @@ sys.path.append(".")
 
 import argparse  # noqa: E402
 import cmd  # noqa: E402
-from iterfzf import iterfzf  # noqa: E402
 import os  # noqa: E402
 
 from config import DB_USERNAME, DB_PASSWORD, DB_HOST, DB_NAME, DB_PORT, DB_TYPE
 from pepys_import.core.store.data_store import DataStore  # noqa: E402
+from pepys_import.utils.export_utils import export_datafiles  # noqa: E402
 
 dirpath = os.path.dirname(os.path.abspath(__file__))
 
 
+def parse_max_points(arg):
+    """
+    Returns the maximum number of states of a track given to the export commands,
+    None if it isn't given and False if it isn't valid
+    """
+    if not arg.strip():
+        return None
+    try:
+        max_points = int(arg)
+    except ValueError:
+        max_points = 0
+    if max_points < 2:
+        print("Maximum number of states should be an integer greater than 1.")
+        return False
+    return max_points
+
+
 class InitialiseShell(cmd.Cmd):
     intro = (
         "\n--- Menu --- \n (1) Clear database\n (2) Create Pepys schema\n"
@@ -88,10 +105,11 @@ class AdminShell(cmd.Cmd):
     intro = "\n--- Menu --- \n (1) Export\n " "(2) Initialise\n (3) Status\n (0) Exit\n"
     prompt = "(pepys-admin) "
 
-    def __init__(self, datastore, csv_path=dirpath):
+    def __init__(self, datastore, csv_path=dirpath, export_workers=None):
         super(AdminShell, self).__init__()
         self.datastore = datastore
         self.csv_path = csv_path
+        self.export_workers = export_workers
         self.aliases = {
             "0": self.do_exit,
             "1": self.do_export,
@@ -101,13 +119,19 @@ class AdminShell(cmd.Cmd):
         }
 
     def do_export(self, arg):
-        "Start the export process"
+        "Start the export process, decimating tracks to the given number of states"
+        max_points = parse_max_points(arg)
+        if max_points is False:
+            return
         with self.datastore.session_scope():
             datafiles = self.datastore.get_all_datafiles()
             datafiles_dict = {}
             for datafile in datafiles:
                 datafiles_dict[datafile.reference] = datafile.datafile_id
         datafile_references = datafiles_dict.keys()
+        # iterfzf is only needed to pick a Datafile, so it isn't imported at startup
+        from iterfzf import iterfzf
+
         datafile_reference = iterfzf(datafile_references)
 
         if datafile_reference is None:
@@ -122,10 +146,15 @@ class AdminShell(cmd.Cmd):
 
             selected_datafile_id = datafiles_dict[datafile_reference]
             with self.datastore.session_scope():
-                self.datastore.export_datafile(selected_datafile_id, datafilename)
+                self.datastore.export_datafile(
+                    selected_datafile_id, datafilename, max_points=max_points
+                )
 
     def do_export_all(self, arg):
-        "Start the export all datafiles process"
+        "Start the export all datafiles process, decimating tracks like export"
+        max_points = parse_max_points(arg)
+        if max_points is False:
+            return
         export_flag = input("Do you want to export all Datafiles. (Y/n)\n")
         if export_flag in ["", "Y", "y"]:
             while True:
@@ -150,13 +179,19 @@ class AdminShell(cmd.Cmd):
             )
 
             with self.datastore.session_scope():
-                datafiles = self.datastore.get_all_datafiles()
-                for datafile in datafiles:
-                    datafile_id = datafile.datafile_id
-                    datafile_filename = os.path.join(
-                        folder_name, datafile.reference.replace(".", "_")
+                datafiles = [
+                    (
+                        datafile.datafile_id,
+                        os.path.join(folder_name, datafile.reference.replace(".", "_")),
                     )
-                    self.datastore.export_datafile(datafile_id, datafile_filename)
+                    for datafile in self.datastore.get_all_datafiles()
+                ]
+            export_datafiles(
+                self.datastore,
+                datafiles,
+                max_workers=self.export_workers,
+                max_points=max_points,
+            )
 
     def do_initialise(self, arg):
         "Allow the currently connected database to be configured"
@@ -207,6 +242,11 @@ class AdminShell(cmd.Cmd):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Pepys Admin CLI")
     parser.add_argument("--path", type=str, help="CSV files path")
+    parser.add_argument(
+        "--export-workers",
+        type=int,
+        help="Number of processes exporting all datafiles, the number of CPUs by default",
+    )
     args = parser.parse_args()
 
     data_store = DataStore(
@@ -218,4 +258,4 @@ if __name__ == "__main__":
         db_type=DB_TYPE,
     )
 
-    AdminShell(data_store, args.path).cmdloop()
+    AdminShell(data_store, args.path, args.export_workers).cmdloop()
@@ -1,6 +1,11 @@
-from .unit_conversion import UnitConversion
+from .unit_conversion import LazyUnitRegistry
 
-# Initializing Pint's Unit Registry
-conversion = UnitConversion()
-unit_registry = conversion.get_unit_registry()
-quantity = unit_registry.Quantity
+# Pint's Unit Registry, which is only initialised when it is first used
+unit_registry = LazyUnitRegistry()
+
+
+def __getattr__(name):
+    # Quantity class of the Unit Registry, resolved on first use
+    if name == "quantity":
+        return unit_registry.Quantity
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
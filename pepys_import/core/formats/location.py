@@ -1,19 +1,44 @@
+import struct
+
 from shapely import wkb
 
+DEFAULT_ERROR_TYPE = "Location Parsing Error"
+
+# Flags of the geometry type in (E)WKB
+WKB_POINT = 1
+EWKB_SRID_FLAG = 0x20000000
+
 
 class Location:
+    # Locations are created for every measurement, so only the coordinates are stored
+    # for each instance, and the errors list is only created when it's needed
+    __slots__ = ("_latitude", "_longitude", "_errors", "_error_type")
+
     def __init__(self, errors=None, error_type=None):
         self._latitude = None
         self._longitude = None
+        self._errors = errors
+        self._error_type = error_type
 
-        if errors is None:
-            self.errors = list()
-        else:
-            self.errors = errors
-        if error_type is None:
-            self.error_type = "Location Parsing Error"
-        else:
-            self.error_type = error_type
+    @property
+    def errors(self):
+        if self._errors is None:
+            self._errors = list()
+        return self._errors
+
+    @errors.setter
+    def errors(self, errors):
+        self._errors = errors
+
+    @property
+    def error_type(self):
+        if self._error_type is None:
+            return DEFAULT_ERROR_TYPE
+        return self._error_type
+
+    @error_type.setter
+    def error_type(self, error_type):
+        self._error_type = error_type
 
     def __repr__(self):
         return f"Location(lon={self.longitude}, lat={self.latitude})"
@@ -214,10 +239,19 @@ class Location:
         return f"SRID=4326;POINT({self.longitude} {self.latitude})"
 
     def set_from_wkb(self, wkb_string):
-        point = wkb.loads(wkb_string, hex=True)
-
-        self._longitude = point.x
-        self._latitude = point.y
+        data = bytes.fromhex(wkb_string) if isinstance(wkb_string, str) else wkb_string
+        byte_order = "<" if data[0] == 1 else ">"
+        (geometry_type,) = struct.unpack_from(byte_order + "I", data, 1)
+        if geometry_type & ~EWKB_SRID_FLAG == WKB_POINT:
+            # Decode 2D points directly, skipping the SRID if there is one
+            offset = 9 if geometry_type & EWKB_SRID_FLAG else 5
+            self._longitude, self._latitude = struct.unpack_from(
+                byte_order + "dd", data, offset
+            )
+        else:
+            point = wkb.loads(bytes(data))
+            self._longitude = point.x
+            self._latitude = point.y
 
     def set_from_wkt_string(self, wkt_string):
         longitude, latitude = wkt_string[16:-1].split()
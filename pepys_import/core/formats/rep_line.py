@@ -19,6 +19,11 @@ def parse_timestamp(date, time):
     return datetime.strptime(date + time, format_str)
 
 
+def parse_vessel_name(text):
+    """Returns the name of a vessel from its token, which may be quoted"""
+    return text.strip('"')
+
+
 class REPLine:
     def __init__(self, line_number, line, separator):
         self.importer_name = "Replay File Format Importer"
@@ -110,7 +115,7 @@ class REPLine:
             self.importer_name, "timestamp", self.timestamp, "n/a"
         )
 
-        self.vessel = vessel_name_token.text.strip('"')
+        self.vessel = parse_vessel_name(vessel_name_token.text)
         vessel_name_token.record(self.importer_name, "vessel name", self.vessel, "n/a")
 
         symbology_values = symbology_token.text.split("[")
@@ -1,6 +1,3 @@
-from pint import UnitRegistry
-
-
 class Singleton(type):
     """
     Define an Instance operation that lets clients access its unique
@@ -19,6 +16,8 @@ class Singleton(type):
 
 class UnitConversion(metaclass=Singleton):
     def __init__(self):
+        # pint is imported here rather than at startup, see LazyUnitRegistry
+        from pint import UnitRegistry
 
         # Initialize pint's unit registry object
         self.unit_reg = UnitRegistry()
@@ -27,3 +26,36 @@ class UnitConversion(metaclass=Singleton):
 
     def get_unit_registry(self):
         return self.unit_reg
+
+
+class LazyUnitRegistry:
+    """
+    Stand-in for the Unit Registry of :class:`UnitConversion`, which creates it on
+    first use.
+
+    Importing pint and parsing its unit definitions takes longer than the rest of the
+    startup of the command line tools, which don't all need units. Attributes, calls
+    and item lookups are passed on to the Unit Registry, so that
+    ``unit_registry.knot`` or ``unit_registry.Quantity(1, "knot")`` work as usual.
+    """
+
+    def __init__(self):
+        self._registry = None
+
+    def get_unit_registry(self):
+        """Returns the Unit Registry, creating it if it doesn't exist yet"""
+        if self._registry is None:
+            self._registry = UnitConversion().get_unit_registry()
+        return self._registry
+
+    def __getattr__(self, name):
+        return getattr(self.get_unit_registry(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.get_unit_registry()(*args, **kwargs)
+
+    def __getitem__(self, item):
+        return self.get_unit_registry()[item]
+
+    def __dir__(self):
+        return dir(self.get_unit_registry())
@@ -1,3 +1,5 @@
+from functools import partial
+
 from tqdm import tqdm
 from sqlalchemy.ext.hybrid import hybrid_property
 
@@ -8,13 +10,15 @@ from pepys_import.core.store import constants
 from pepys_import.core.validators import constants as validation_constants
 from pepys_import.core.validators.basic_validator import BasicValidator
 from pepys_import.core.validators.enhanced_validator import EnhancedValidator
-from pepys_import.utils.import_utils import import_validators
+from pepys_import.utils.import_utils import LazyValidators
 
 from pepys_import.core.formats.location import Location
+from pepys_import.core.store.measurement_buffer import MeasurementBuffer
 
 
-LOCAL_BASIC_VALIDATORS = import_validators(LOCAL_BASIC_TESTS)
-LOCAL_ENHANCED_VALIDATORS = import_validators(LOCAL_ENHANCED_TESTS)
+# Local validators are only imported when measurements are first validated
+LOCAL_BASIC_VALIDATORS = LazyValidators(LOCAL_BASIC_TESTS)
+LOCAL_ENHANCED_VALIDATORS = LazyValidators(LOCAL_ENHANCED_TESTS)
 
 
 class SensorMixin:
@@ -133,38 +137,86 @@ class PlatformMixin:
 
 
 class DatafileMixin:
+    def get_measurement_buffer(self, parser_name):
+        """
+        Returns the :class:`MeasurementBuffer` holding the measurements of the parser,
+        replacing the plain list the importer starts with.
+        """
+        measurements = self.measurements.get(parser_name)
+        if not isinstance(measurements, MeasurementBuffer):
+            measurements = MeasurementBuffer(self.datafile_id, measurements)
+            self.measurements[parser_name] = measurements
+        return measurements
+
+    def create_chunked_buffer(
+        self, parser_name, chunk_size, validation_level, errors=None
+    ):
+        """
+        Sets up a :class:`MeasurementBuffer` for the parser, which validates the
+        measurements and moves them to staging tables every ``chunk_size`` rows, so
+        that memory use doesn't grow with the size of the file.
+
+        :param parser_name: Name of the parser
+        :type parser_name: String
+        :param chunk_size: Number of rows per table held in memory
+        :type chunk_size: Integer
+        :param validation_level: Validation level of the parser
+        :type validation_level: String
+        :param errors: List of errors of the parser
+        :type errors: List
+        :return: Created buffer
+        :rtype: MeasurementBuffer
+        """
+        validate = None
+        if validation_level == validation_constants.NONE_LEVEL:
+            # Errors don't prevent the commit without validation
+            errors = None
+        else:
+            validate = partial(
+                self.validate_measurements,
+                validation_level=validation_level,
+                errors=errors,
+                parser=parser_name,
+            )
+        measurements = MeasurementBuffer(
+            self.datafile_id, chunk_size=chunk_size, validate=validate, errors=errors
+        )
+        self.measurements[parser_name] = measurements
+        return measurements
+
     def create_state(self, data_store, platform, sensor, timestamp, parser_name):
-        state = data_store.db_classes.State(
-            sensor_id=sensor.sensor_id, time=timestamp, source_id=self.datafile_id
+        return self.get_measurement_buffer(parser_name).add_state(
+            data_store, platform, sensor, timestamp
+        )
+
+    def create_states(
+        self, data_store, platform, sensor, times, parser_name, floats=None, **values
+    ):
+        """
+        Creates States of a sensor in bulk, without a record per State.
+
+        :param times: Times of the States, in microseconds since the epoch
+        :type times: Sequence of Integer
+        :param floats: Values of the columns of the States keyed by name (e.g.
+            ``speed``, ``latitude``), in the units they are stored in, NaN for None
+        :type floats: Dict of Sequence of Float
+        :param values: Other values shared by all States, e.g. ``privacy_id``
+        """
+        self.get_measurement_buffer(parser_name).add_states(
+            data_store, platform, sensor, times, floats, **values
         )
-        state.platform_name = platform.name
-        state.sensor_name = sensor.name
-        self.measurements[parser_name].append(state)
-        return state
 
     def create_contact(self, data_store, platform, sensor, timestamp, parser_name):
-        contact = data_store.db_classes.Contact(
-            sensor_id=sensor.sensor_id, time=timestamp, source_id=self.datafile_id
+        return self.get_measurement_buffer(parser_name).add_contact(
+            data_store, platform, sensor, timestamp
         )
-        contact.platform_name = platform.name
-        contact.sensor_name = sensor.name
-        self.measurements[parser_name].append(contact)
-        return contact
 
     def create_comment(
         self, data_store, platform, timestamp, comment, comment_type, parser_name,
     ):
-        comment = data_store.db_classes.Comment(
-            platform_id=platform.platform_id,
-            time=timestamp,
-            content=comment,
-            comment_type_id=comment_type.comment_type_id,
-            source_id=self.datafile_id,
+        return self.get_measurement_buffer(parser_name).add_comment(
+            data_store, platform, timestamp, comment, comment_type
         )
-        comment.platform_name = platform.name
-        comment.sensor_name = "N/A"
-        self.measurements[parser_name].append(comment)
-        return comment
 
     def validate(
         self,
@@ -180,25 +232,36 @@ class DatafileMixin:
 
         if validation_level == validation_constants.NONE_LEVEL:
             return True
-        elif validation_level == validation_constants.BASIC_LEVEL:
-            for measurement in self.measurements[parser]:
-                BasicValidator(measurement, errors, parser)
-                for basic_validator in LOCAL_BASIC_VALIDATORS:
-                    basic_validator(measurement, errors, parser)
+        elif validation_level in (
+            validation_constants.BASIC_LEVEL,
+            validation_constants.ENHANCED_LEVEL,
+        ):
+            self.validate_measurements(
+                self.measurements[parser], validation_level, errors, parser
+            )
             if not errors:
                 return True
             return False
+
+    @staticmethod
+    def validate_measurements(measurements, validation_level, errors, parser):
+        """
+        Runs the validators of the validation level on the measurements, appending
+        the errors they find to ``errors``.
+        """
+        if validation_level == validation_constants.BASIC_LEVEL:
+            for measurement in measurements:
+                BasicValidator(measurement, errors, parser)
+                for basic_validator in LOCAL_BASIC_VALIDATORS:
+                    basic_validator(measurement, errors, parser)
         elif validation_level == validation_constants.ENHANCED_LEVEL:
-            for measurement in self.measurements[parser]:
+            for measurement in measurements:
                 BasicValidator(measurement, errors, parser)
                 for basic_validator in LOCAL_BASIC_VALIDATORS:
                     basic_validator(measurement, errors, parser)
                 EnhancedValidator(measurement, errors, parser)
                 for enhanced_validator in LOCAL_ENHANCED_VALIDATORS:
                     enhanced_validator(measurement, errors, parser)
-            if not errors:
-                return True
-            return False
 
     def commit(self, data_store, change_id):
         # Since measurements are saved by their importer names, iterate over each key
@@ -206,13 +269,31 @@ class DatafileMixin:
         extraction_log = list()
         for key in self.measurements.keys():
             print(f"Submitting measurements extracted by {key}.")
-            for file in tqdm(self.measurements[key]):
-                file.submit(data_store, change_id)
+            if isinstance(self.measurements[key], MeasurementBuffer):
+                self.measurements[key].commit(data_store, change_id)
+            else:
+                for file in tqdm(self.measurements[key]):
+                    file.submit(data_store, change_id)
+            data_store.session.flush()
             extraction_log.append(
                 f"{len(self.measurements[key])} measurements extracted by {key}."
             )
+        # Write the Log rows of all submitted measurements in bulk
+        data_store.log_buffer.flush()
         return extraction_log
 
+    def discard(self, data_store):
+        """
+        Drops the measurements which have already been staged, e.g. when the
+        validation of the file failed.
+
+        :param data_store: A :class:`DataStore` object
+        :type data_store: DataStore
+        """
+        for measurements in self.measurements.values():
+            if isinstance(measurements, MeasurementBuffer):
+                measurements.discard(data_store)
+
 
 class SensorTypeMixin:
     @classmethod
@@ -228,9 +309,10 @@ class SensorTypeMixin:
 class StateMixin:
     def submit(self, data_store, change_id):
         """Submit intermediate object to the DB"""
+        # The ID is allocated up front, so the object doesn't have to be flushed
+        # before it is logged
+        data_store.id_allocator.assign_id(self)
         data_store.session.add(self)
-        data_store.session.flush()
-        data_store.session.expire(self, ["_location"])
         # Log new State object creation
         data_store.add_to_logs(
             table=constants.STATE, row_id=self.state_id, change_id=change_id
@@ -361,9 +443,10 @@ class StateMixin:
 class ContactMixin:
     def submit(self, data_store, change_id):
         """Submit intermediate object to the DB"""
+        # The ID is allocated up front, so the object doesn't have to be flushed
+        # before it is logged
+        data_store.id_allocator.assign_id(self)
         data_store.session.add(self)
-        data_store.session.flush()
-        data_store.session.expire(self, ["_location"])
         # Log new Contact object creation
         data_store.add_to_logs(
             table=constants.CONTACT, row_id=self.contact_id, change_id=change_id
@@ -711,8 +794,10 @@ class ContactMixin:
 class CommentMixin:
     def submit(self, data_store, change_id):
         """Submit intermediate object to the DB"""
+        # The ID is allocated up front, so the object doesn't have to be flushed
+        # before it is logged
+        data_store.id_allocator.assign_id(self)
         data_store.session.add(self)
-        data_store.session.flush()
         # Log new Comment object creation
         data_store.add_to_logs(
             table=constants.COMMENT, row_id=self.comment_id, change_id=change_id
@@ -761,15 +846,28 @@ class LocationPropertyMixin:
     def location(self):
         if self._location is None:
             return None
-        else:
-            loc = Location()
-            if isinstance(self._location, str):
-                loc.set_from_wkt_string(self._location)
-            else:
-                loc.set_from_wkb(self._location.desc)
 
+        # Decoding the location is relatively costly and it is read repeatedly (e.g. by
+        # the validators), so its decoded coordinates are kept until _location
+        # changes. A new Location is returned on each read, as Locations are mutable
+        loc = Location()
+        cached = self.__dict__.get("_decoded_location")
+        if cached is not None and cached[0] is self._location:
+            loc.set_latitude_decimal_degrees(cached[1])
+            loc.set_longitude_decimal_degrees(cached[2])
             return loc
 
+        if isinstance(self._location, str):
+            loc.set_from_wkt_string(self._location)
+        else:
+            loc.set_from_wkb(self._location.data)
+        self.__dict__["_decoded_location"] = (
+            self._location,
+            loc.latitude,
+            loc.longitude,
+        )
+        return loc
+
     @location.setter
     def location(self, location):
         if location is None:
@@ -9,6 +9,7 @@ DATAFILE = "Datafiles"
 SYNONYM = "Synonyms"
 CHANGE = "Changes"
 LOG = "Logs"
+TABLE_COUNTER = "TableCounters"
 EXTRACTION = "Extractions"
 TAG = "Tags"
 TAGGED_ITEM = "TaggedItems"
@@ -0,0 +1,337 @@
+import csv
+from datetime import datetime
+from io import StringIO
+
+from pepys_import.core.formats import unit_registry
+from pepys_import.core.formats.location import Location
+from pepys_import.core.store import constants
+from pepys_import.core.store.measurement_buffer import StateColumns
+
+# Reference tables only have a name, which is unique
+REFERENCE_TABLES = {
+    constants.NATIONALITY: "Nationality",
+    constants.PRIVACY: "Privacy",
+    constants.PLATFORM_TYPE: "PlatformType",
+    constants.SENSOR_TYPE: "SensorType",
+    constants.DATAFILE_TYPE: "DatafileType",
+    constants.COMMENT_TYPE: "CommentType",
+}
+
+
+# Caches of the DataStore of the entities of a mapped class keyed by name, from
+# which the names of the rows inserted in bulk are dropped
+DATA_STORE_CACHES = {
+    "Nationality": "nationalities",
+    "Privacy": "privacies",
+    "PlatformType": "platform_types",
+    "SensorType": "sensor_types",
+    "DatafileType": "datafile_types",
+    "CommentType": "comment_types",
+    "Platform": "platforms",
+    "Datafile": "datafiles",
+}
+
+
+class Reference:
+    """
+    Converter of a CSV field holding the name of a row of another table to its ID.
+
+    :param model_name: Name of the mapped class of the other table
+    :type model_name: String
+    :param name_field: Column of the other table holding the name
+    :type name_field: String
+    """
+
+    def __init__(self, model_name, name_field="name"):
+        self.model_name = model_name
+        self.name_field = name_field
+
+
+def to_boolean(value):
+    """Converts the usual spellings of booleans in CSV files to a boolean"""
+    return value.strip().lower() in ("true", "t", "yes", "y", "1")
+
+
+# Metadata tables: mapped class, column holding the name of the rows and the
+# (CSV field, column, converter) of each column
+METADATA_TABLES = {
+    constants.PLATFORM: (
+        "Platform",
+        "name",
+        (
+            ("name", "name", None),
+            ("nationality", "nationality_id", Reference("Nationality")),
+            ("platform_type", "platform_type_id", Reference("PlatformType")),
+            ("privacy", "privacy_id", Reference("Privacy")),
+            ("trigraph", "trigraph", None),
+            ("quadgraph", "quadgraph", None),
+            ("pennant_number", "pennant", None),
+        ),
+    ),
+    constants.SENSOR: (
+        "Sensor",
+        "name",
+        (
+            ("name", "name", None),
+            ("sensor_type", "sensor_type_id", Reference("SensorType")),
+            ("host", "host", Reference("Platform")),
+        ),
+    ),
+    constants.DATAFILE: (
+        "Datafile",
+        "reference",
+        (
+            ("privacy", "privacy_id", Reference("Privacy")),
+            ("file_type", "datafile_type_id", Reference("DatafileType")),
+            ("reference", "reference", None),
+            ("simulated", "simulated", to_boolean),
+            ("file_size", "size", int),
+            ("file_hash", "hash", None),
+            ("url", "url", None),
+        ),
+    ),
+}
+
+
+class CSVLoader:
+    """
+    Loads CSV files of reference, metadata and measurement tables in bulk.
+
+    Unlike the ``add_to_<table>`` methods of the :class:`DataStore`, which look up the
+    names of the related rows and insert and flush every row on its own, the names are
+    resolved from dictionaries fetched once per table, the rows of a file are inserted
+    together (with ``COPY`` on PostgreSQL and executemany on SQLite) and their Log rows
+    are written by the :class:`LogBuffer`. As with ``add_to_<table>``, rows of
+    reference tables are skipped if their name is already present. The names of the
+    rows inserted are dropped from the caches of entities of the DataStore, as they
+    are written without going through its ``add_to_<table>`` methods.
+
+    :param data_store: DataStore whose session is used to write the rows
+    :type data_store: DataStore
+    :param change_id: ID of the :class:`Change` object
+    :type change_id: Integer or UUID
+    """
+
+    def __init__(self, data_store, change_id):
+        self.data_store = data_store
+        self.change_id = change_id
+        # IDs keyed by name, for each mapped class which has been referenced
+        self._names = dict()
+
+    @staticmethod
+    def can_load(table_name):
+        """Returns True if the rows of the table can be loaded in bulk"""
+        return (
+            table_name in REFERENCE_TABLES
+            or table_name in METADATA_TABLES
+            or table_name == constants.STATE
+        )
+
+    def load_file(self, file_path, table_name):
+        """
+        Loads all rows of the CSV file to the table.
+
+        :param file_path: Path of the CSV file
+        :type file_path: String
+        :param table_name: Name of the table, e.g. ``constants.PLATFORM``
+        :type table_name: String
+        :return: Number of rows inserted
+        :rtype: Integer
+        """
+        with open(file_path, "r") as f:
+            reader = csv.reader(f)
+            # extract header
+            header = next(reader)
+            # (line number, values) of the rows, skipping blank lines. A row may span
+            # several lines if it has quoted line breaks, so it's numbered by the
+            # first of them
+            rows = list()
+            line_number = reader.line_num
+            for row in reader:
+                if row:
+                    rows.append((line_number + 1, dict(zip(header, row))))
+                line_number = reader.line_num
+
+        if table_name in REFERENCE_TABLES:
+            return self.load_reference_rows(REFERENCE_TABLES[table_name], rows)
+        if table_name in METADATA_TABLES:
+            model_name, name_field, columns = METADATA_TABLES[table_name]
+            return self.load_metadata_rows(model_name, name_field, columns, rows)
+        if table_name == constants.STATE:
+            return self.load_state_rows(rows)
+        raise ValueError(f"Rows of {table_name} can't be loaded in bulk")
+
+    def load_reference_rows(self, model_name, rows):
+        """Inserts the rows of a reference table whose name isn't present yet, from
+        (line number, values) pairs as the other ``load_<kind>_rows`` methods"""
+        names = self.names(model_name)
+        new_names = list()
+        for _, row in rows:
+            name = row["name"]
+            if name not in names and name not in new_names:
+                new_names.append(name)
+        return self.insert(model_name, [{"name": name} for name in new_names])
+
+    def load_metadata_rows(self, model_name, name_field, columns, rows):
+        """Inserts the rows of a metadata table, resolving the names of related rows"""
+        values = list()
+        for line_number, row in rows:
+            row_values = dict()
+            for field, column, converter in columns:
+                value = row.get(field)
+                if value == "" or value is None:
+                    value = None
+                elif isinstance(converter, Reference):
+                    value = self.resolve(converter, value, line_number)
+                elif converter is not None:
+                    value = converter(value)
+                row_values[column] = value
+            values.append(row_values)
+        return self.insert(model_name, values, name_field)
+
+    def load_state_rows(self, rows):
+        """Inserts States through the columnar buffers of the measurements"""
+        sensor = Reference("Sensor")
+        datafile = Reference("Datafile", "reference")
+        privacy = Reference("Privacy")
+        model = self.data_store.db_classes.State
+        columns_by_datafile = dict()
+        for line_number, row in rows:
+            source_id = self.resolve(datafile, row["datafile"], line_number)
+            columns = columns_by_datafile.get(source_id)
+            if columns is None:
+                columns = StateColumns(model, source_id)
+                columns_by_datafile[source_id] = columns
+
+            record = columns.append(
+                datetime.strptime(row["time"], "%Y-%m-%d %H:%M:%S"),
+                sensor_name=row["sensor"],
+                platform_name=None,
+                sensor_id=self.resolve(sensor, row["sensor"], line_number),
+                privacy_id=self.resolve(privacy, row["privacy"], line_number),
+            )
+            if row.get("location"):
+                location = Location()
+                location.set_from_wkt_string(row["location"])
+                record.location = location
+            if row.get("elevation"):
+                record.elevation = float(row["elevation"]) * unit_registry.metre
+            if row.get("heading"):
+                record.heading = float(row["heading"]) * unit_registry.degree
+            if row.get("course"):
+                record.course = float(row["course"]) * unit_registry.degree
+            if row.get("speed"):
+                record.speed = float(row["speed"]) * (
+                    unit_registry.metre / unit_registry.second
+                )
+
+        for columns in columns_by_datafile.values():
+            columns.commit(self.data_store, self.change_id)
+        return len(rows)
+
+    def names(self, model_name, name_field="name"):
+        """
+        Returns the IDs of the rows of the table keyed by their names, fetching them
+        from the database the first time the table is used.
+        """
+        key = (model_name, name_field)
+        if key not in self._names:
+            model = getattr(self.data_store.db_classes, model_name)
+            primary_key = model.__table__.primary_key.columns.values()[0]
+            names = dict()
+            for name, row_id in self.data_store.session.query(
+                getattr(model, name_field), primary_key
+            ):
+                # Like the search functions, the first row with the name is used
+                names.setdefault(name, row_id)
+            self._names[key] = names
+        return self._names[key]
+
+    def resolve(self, reference, name, line_number):
+        row_id = self.names(reference.model_name, reference.name_field).get(name)
+        if row_id is None:
+            raise Exception(
+                f"There is missing value(s) in '{name}'! No {reference.model_name} "
+                f"with this name (line {line_number})"
+            )
+        return row_id
+
+    def insert(self, model_name, values, name_field="name"):
+        """
+        Inserts the rows with pre-allocated IDs, logs their creation and adds their
+        names to the dictionary of names of the table, if it has been fetched.
+        """
+        if not values:
+            return 0
+        model = getattr(self.data_store.db_classes, model_name)
+        table = model.__table__
+        primary_key = table.primary_key.columns.values()[0].name
+        ids = self.data_store.id_allocator.allocate(model, len(values))
+        created_date = datetime.utcnow()
+        for row_values, row_id in zip(values, ids):
+            row_values[primary_key] = row_id
+            row_values["created_date"] = created_date
+
+        if self.data_store.db_type == "postgres":
+            copy_rows(self.data_store.session, table, values)
+        else:
+            self.data_store.session.execute(table.insert(), values)
+
+        for row_id in ids:
+            self.data_store.add_to_logs(
+                table=table.name, row_id=row_id, change_id=self.change_id
+            )
+        names = self._names.get((model_name, name_field))
+        if names is not None:
+            for row_values, row_id in zip(values, ids):
+                names.setdefault(row_values[name_field], row_id)
+        cache = DATA_STORE_CACHES.get(model_name)
+        if cache is not None:
+            cached = getattr(self.data_store, cache)
+            for row_values in values:
+                cached.pop(row_values[name_field], None)
+        return len(values)
+
+
+def copy_value(value):
+    """Formats a value for the text format of PostgreSQL's COPY"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(session, table, rows):
+    """
+    Inserts the rows to the table with PostgreSQL's ``COPY ... FROM STDIN``.
+
+    :param session: Session whose connection is used
+    :type session: SQLAlchemy Session
+    :param table: Table to insert to
+    :type table: SQLAlchemy Table
+    :param rows: Values of the rows, all of them with the same keys
+    :type rows: List of Dicts
+    """
+    column_names = list(rows[0])
+    data = StringIO()
+    for row in rows:
+        data.write("\t".join(copy_value(row[name]) for name in column_names))
+        data.write("\n")
+    data.seek(0)
+
+    table_name = f'"{table.name}"'
+    if table.schema:
+        table_name = f"{table.schema}.{table_name}"
+    column_list = ", ".join(f'"{name}"' for name in column_names)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table_name} ({column_list}) FROM STDIN", data)
+    finally:
+        cursor.close()
@@ -9,6 +9,7 @@ from sqlalchemy.sql import select, func
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import OperationalError
 from importlib import import_module
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
 from paths import PEPYS_IMPORT_DIRECTORY
@@ -28,11 +29,23 @@ from pepys_import.utils.branding_util import (
 import pepys_import.utils.value_transforming_utils as transformer
 import pepys_import.utils.unit_utils as unit_converter
 from .table_summary import TableSummary, TableSummarySet
-from shapely import wkb
+from .log_buffer import LogBuffer
+from .id_allocator import IdAllocator
+from .table_counters import TableCounters, estimate_row_counts
+from .measurement_buffer import datetime_to_microseconds
+from .measurement_query import MeasurementQuery
+from .name_cache import NameCache
+from .decimation import BUCKET
 from pepys_import.core.formats.location import Location
 
 DEFAULT_DATA_PATH = os.path.join(PEPYS_IMPORT_DIRECTORY, "database", "default_data")
 USER = getuser()  # Login name of the current user
+# Number of change IDs in a single IN clause, SQLite limits the number of parameters
+CHANGE_ID_BATCH_SIZE = 500
+# Number of State IDs in a single IN clause of export_datafile, for the same reason
+STATE_ID_BATCH_SIZE = 500
+# Number of States read at once by export_datafile
+EXPORT_BATCH_SIZE = 10000
 
 
 class DataStore(object):
@@ -101,19 +114,25 @@ class DataStore(object):
         # Instance attributes which are necessary for initialise method
         self.db_name = db_name
         self.db_type = db_type
+        # and for connecting other processes to the same database
+        self.db_username = db_username
+        self.db_password = db_password
+        self.db_host = db_host
+        self.db_port = db_port
 
         # use session_scope() to create a new session
         self.session = None
 
-        # dictionaries, to cache platform name
-        self._platform_dict_on_sensor_id = dict()
-        self._platform_dict_on_platform_id = dict()
+        # Log rows are buffered and written in bulk, see LogBuffer
+        self.log_buffer = LogBuffer(self)
+        self.id_allocator = IdAllocator(self)
+        # exact number of rows of the tables, see get_status
+        self.table_counters = TableCounters(self)
+        # spatial and temporal queries of the measurements
+        self.measurement_query = MeasurementQuery(self)
 
-        # dictionaries, to cache sensor name
-        self._sensor_dict_on_sensor_id = dict()
-
-        # dictionary, to cache comment type name
-        self._comment_type_name_dict_on_comment_type_id = dict()
+        # bounded caches of the names of platforms, sensors and comment types
+        self.name_cache = NameCache(self)
 
         # Branding Text
         if self.welcome_text:
@@ -155,15 +174,23 @@ class DataStore(object):
             except OperationalError:
                 raise Exception(f"Error creating database({self.db_name})! Quitting")
 
+        with self.engine.begin() as connection:
+            self.table_counters.seed(connection)
+
     @contextmanager
     def session_scope(self):
         """Provide a transactional scope around a series of operations."""
         db_session = sessionmaker(bind=self.engine)
         self.session = db_session()
+        listen(self.session, "after_flush", self.name_cache.after_flush)
+        listen(self.session, "before_flush", self.id_allocator.before_flush)
+        self.log_buffer.clear()
         try:
             yield self
+            self.log_buffer.flush()
             self.session.commit()
         except:
+            self.log_buffer.clear()
             self.session.rollback()
             raise
         finally:
@@ -338,9 +365,8 @@ class DataStore(object):
             source_id=datafile.datafile_id,
             privacy_id=privacy.privacy_id,
         )
+        self.id_allocator.assign_id(state_obj)
         self.session.add(state_obj)
-        self.session.flush()
-        self.session.expire(state_obj, ["_location"])
 
         self.add_to_logs(
             table=constants.STATE, row_id=state_obj.state_id, change_id=change_id
@@ -814,6 +840,7 @@ class DataStore(object):
         report_measurement: bool = False,
         report_metadata: bool = False,
         report_reference: bool = False,
+        exact: bool = False,
     ):
         """
         Provides a summary of the contents of the :class:`DataStore`.
@@ -824,36 +851,171 @@ class DataStore(object):
         :type report_metadata: Boolean
         :param report_reference: Boolean flag includes Metadata Tables
         :type report_reference: Boolean
+        :param exact: Boolean flag counts the rows of the tables instead of using the
+            counters and estimates, see :meth:`get_table_summaries`
+        :type exact: Boolean
         :return: The summary of the contents of the :class:`DataStore`
         :rtype: TableSummarySet
         """
 
-        table_summaries = []
+        table_objects = []
         if report_measurement:
             # Create measurement table list
-            measurement_table_objects = self.meta_classes[TableTypes.MEASUREMENT]
-            for table_object in list(measurement_table_objects):
-                ts = TableSummary(self.session, table_object)
-                table_summaries.append(ts)
+            table_objects.extend(self.meta_classes[TableTypes.MEASUREMENT])
 
         if report_metadata:
             # Create metadata table list
-            metadata_table_objects = self.meta_classes[TableTypes.METADATA]
-            for table_object in list(metadata_table_objects):
-                ts = TableSummary(self.session, table_object)
-                table_summaries.append(ts)
+            table_objects.extend(self.meta_classes[TableTypes.METADATA])
 
         if report_reference:
             # Create reference table list
-            reference_table_objects = self.meta_classes[TableTypes.REFERENCE]
-            for table_object in list(reference_table_objects):
-                ts = TableSummary(self.session, table_object)
-                table_summaries.append(ts)
+            table_objects.extend(self.meta_classes[TableTypes.REFERENCE])
 
+        table_summaries = self.get_table_summaries(table_objects, exact=exact)
         table_summaries_set = TableSummarySet(table_summaries)
 
         return table_summaries_set
 
+    def get_table_summaries(self, table_objects, exact=False):
+        """
+        Summarises the given tables without counting their rows if possible.
+
+        The number of rows and last creation date are read from the counters of the
+        tables, which are kept up to date by the :class:`DataStore` as rows are added.
+        Tables without a counter, e.g. because they already had rows when the counters
+        were introduced, are reported with the estimates of the database statistics and
+        only counted if there is no estimate either, in which case their counter is
+        created from the exact count. If ``exact`` is True, all tables are counted and
+        their counters are replaced with the exact numbers.
+
+        :param table_objects: Mapped classes of the tables
+        :type table_objects: List
+        :param exact: Boolean flag counts the rows of all tables
+        :type exact: Boolean
+        :return: Summaries of the tables, in the same order as the tables
+        :rtype: List of TableSummary
+        """
+        # Pending Log rows update the counters when they are written
+        self.log_buffer.flush()
+
+        if exact:
+            table_summaries = [
+                TableSummary(self.session, table_object)
+                for table_object in table_objects
+            ]
+            self.table_counters.store(table_summaries)
+            return table_summaries
+
+        counters = self.table_counters.read()
+        estimates = None
+        table_summaries = []
+        counted_summaries = []
+        for table_object in table_objects:
+            table_name = table_object.__tablename__
+            if table_name in counters:
+                row_count, last_created = counters[table_name]
+                ts = TableSummary(self.session, table_object, row_count, last_created)
+            else:
+                if estimates is None:
+                    estimates = estimate_row_counts(self)
+                if estimates.get(table_name):
+                    ts = TableSummary(
+                        self.session,
+                        table_object,
+                        estimates[table_name],
+                        estimated=True,
+                    )
+                else:
+                    ts = TableSummary(self.session, table_object)
+                    counted_summaries.append(ts)
+            table_summaries.append(ts)
+
+        if counted_summaries:
+            self.table_counters.store(counted_summaries)
+        return table_summaries
+
+    def get_change_summaries(self, change_ids, table_objects):
+        """
+        Summarises the rows added to the given tables by the given changes, from the
+        Log rows recording their creation. The cost depends on the number of rows
+        added by the changes, not on the size of the tables.
+
+        :param change_ids: IDs of the :class:`Change` objects
+        :type change_ids: List
+        :param table_objects: Mapped classes of the tables
+        :type table_objects: List
+        :return: Number of rows added and creation date of the last one added, in the
+            same order as the tables
+        :rtype: List of TableSummary
+        """
+        # Pending Log rows of the changes haven't been written yet
+        self.log_buffer.flush()
+
+        log_table = self.db_classes.Log.__table__
+        table_names = [table_object.__tablename__ for table_object in table_objects]
+        totals = {table_name: [0, None] for table_name in table_names}
+        change_ids = list(change_ids)
+        for start in range(0, len(change_ids), CHANGE_ID_BATCH_SIZE):
+            query = (
+                select(
+                    [
+                        log_table.c.table,
+                        func.count(),
+                        func.max(log_table.c.created_date),
+                    ]
+                )
+                .where(
+                    log_table.c.change_id.in_(
+                        change_ids[start : start + CHANGE_ID_BATCH_SIZE]
+                    )
+                )
+                .where(log_table.c.field.is_(None))
+                .where(log_table.c.table.in_(table_names))
+                .group_by(log_table.c.table)
+            )
+            for table_name, count, last_created_date in self.session.execute(query):
+                total = totals[table_name]
+                total[0] += count
+                if total[1] is None or (
+                    last_created_date is not None and last_created_date > total[1]
+                ):
+                    total[1] = last_created_date
+
+        return [
+            TableSummary(self.session, table_object, *totals[table_object.__tablename__])
+            for table_object in table_objects
+        ]
+
+    def count_tables_concurrently(self, table_objects, max_workers=4):
+        """
+        Counts the rows of the given tables concurrently, each on its own connection.
+
+        As they don't use the session of the :class:`DataStore`, the summaries only
+        include committed rows. An in-memory SQLite database can't be shared between
+        connections, so its tables are counted one after another.
+
+        :param table_objects: Mapped classes of the tables
+        :type table_objects: List
+        :param max_workers: Maximum number of tables counted at the same time
+        :type max_workers: Integer
+        :return: Exact summaries of the tables, in the same order as the tables
+        :rtype: List of TableSummary
+        """
+        new_session = sessionmaker(bind=self.engine)
+
+        def count_table(table_object):
+            session = new_session()
+            try:
+                return TableSummary(session, table_object)
+            finally:
+                session.close()
+
+        if self.db_type == "sqlite" and self.db_name == ":memory:":
+            return [count_table(table_object) for table_object in table_objects]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(count_table, table_objects))
+
     def search_comment_type(self, name):
         """Search for any comment type featuring this name"""
         return (
@@ -1098,7 +1260,12 @@ class DataStore(object):
 
     def add_to_logs(self, table, row_id, field=None, new_value=None, change_id=None):
         """
-        Adds the specified event to the :class:`Logs` table if not already present.
+        Buffers a row recording the specified event for the :class:`Logs` table.
+
+        The row isn't inserted here: it is held in :attr:`log_buffer` and written in
+        bulk with the other pending rows by :meth:`LogBuffer.flush`, when the buffer
+        is full, when a datafile is committed and at the end of the session scope.
+        No :class:`Log` entity is created, so nothing is returned.
 
         :param table: Name of the table
         :param row_id: Entity ID of the tale
@@ -1106,20 +1273,15 @@ class DataStore(object):
         :param new_value:  New value of the field
         :param change_id: ID of the :class:`Change` object
         :type change_id: Integer or UUID
-        :param change_id:  Row ID of entity of :class:`Changes` about the change
-        :return: Created :class:`Logs` entity
+        :return: None
         """
-        log = self.db_classes.Log(
+        self.log_buffer.add(
             table=table,
-            id=row_id,
+            row_id=row_id,
             field=field,
             new_value=new_value,
             change_id=change_id,
         )
-        self.session.add(log)
-        self.session.flush()
-
-        return log
 
     def add_to_changes(self, user, modified, reason):
         """
@@ -1133,6 +1295,7 @@ class DataStore(object):
         change = self.db_classes.Change(user=user, modified=modified, reason=reason,)
         self.session.add(change)
         self.session.flush()
+        self.table_counters.increment({constants.CHANGE: 1})
 
         return change
 
@@ -1149,6 +1312,8 @@ class DataStore(object):
         with self.session_scope():
             for table in reversed(meta.sorted_tables):
                 self.session.execute(table.delete())
+            self.table_counters.reset()
+        self.name_cache.clear()
 
     def get_all_datafiles(self):
         """
@@ -1167,42 +1332,14 @@ class DataStore(object):
         and add it into cache.
         """
         if comment_type_id:
-            # return from cache
-            if comment_type_id in self._comment_type_name_dict_on_comment_type_id:
-                return self._comment_type_name_dict_on_comment_type_id[comment_type_id]
-            comment_type = (
-                self.session.query(self.db_classes.CommentType)
-                .filter(self.db_classes.CommentType.comment_type_id == comment_type_id)
-                .first()
-            )
-
-            if comment_type:
-                self._comment_type_name_dict_on_comment_type_id[
-                    comment_type_id
-                ] = comment_type.name
-                return comment_type.name
-            else:
-                raise Exception(
-                    "No Comment Type found with Comment type id: {}".format(
-                        comment_type_id
-                    )
-                )
+            return self.name_cache.comment_type_name(comment_type_id)
 
     def get_cached_sensor_name(self, sensor_id):
-        # return from cache
-        if sensor_id in self._sensor_dict_on_sensor_id:
-            return self._sensor_dict_on_sensor_id[sensor_id]
-        sensor = (
-            self.session.query(self.db_classes.Sensor)
-            .filter(self.db_classes.Sensor.sensor_id == sensor_id)
-            .first()
-        )
-
-        if sensor:
-            self._sensor_dict_on_sensor_id[sensor_id] = sensor.name
-            return sensor.name
-        else:
-            raise Exception("No sensor found with sensor id: {}".format(sensor_id))
+        """
+        Get sensor name from cache on "sensor_id", see :class:`NameCache`
+        """
+        sensor_name, _ = self.name_cache.sensor_names(sensor_id)
+        return sensor_name
 
     def get_cached_platform_name(self, sensor_id=None, platform_id=None):
         """
@@ -1217,54 +1354,52 @@ class DataStore(object):
             )
 
         if sensor_id:
-            # return from cache
-            if sensor_id in self._platform_dict_on_sensor_id:
-                return self._platform_dict_on_sensor_id[sensor_id]
-            sensor = (
-                self.session.query(self.db_classes.Sensor)
-                .filter(self.db_classes.Sensor.sensor_id == sensor_id)
-                .first()
-            )
+            _, platform_name = self.name_cache.sensor_names(sensor_id)
+            return platform_name
+        return self.name_cache.platform_name(platform_id)
 
-            if sensor:
-                platform_id = sensor.host
-            else:
-                raise Exception("No sensor found with sensor id: {}".format(sensor_id))
-
-        if platform_id:
-            # return from cache
-            if platform_id in self._platform_dict_on_platform_id:
-                return self._platform_dict_on_platform_id[platform_id]
-            platform = (
-                self.session.query(self.db_classes.Sensor)
-                .filter(self.db_classes.Sensor.sensor_id == sensor_id)
-                .first()
-            )
-
-            if platform:
-                self._platform_dict_on_platform_id[platform_id] = platform.name
-                if sensor_id:
-                    self._platform_dict_on_sensor_id[sensor_id] = platform.name
-            else:
-                raise Exception(
-                    "No Platform found with platform id: {}".format(platform_id)
-                )
-        return platform.name
-
-    def export_datafile(self, datafile_id, datafile):
+    def export_datafile(
+        self, datafile_id, datafile, max_points=None, decimation_method=BUCKET
+    ):
         """
         Get states, contacts and comments based on Datafile ID.
 
         :param datafile_id:  ID of Datafile
         :type datafile_id: String
+        :param max_points: Maximum number of states exported for every sensor, all of
+            them are exported if it is None
+        :type max_points: Integer
+        :param decimation_method: Method of decimating the states to max_points
+        :type decimation_method: String
+        :return: Number of lines written
+        :rtype: Integer
         """
 
+        State = self.db_classes.State
+        if max_points is None:
+            # States are read from a streaming cursor rather than loaded all at once
+            states = (
+                self.session.query(State)
+                .filter(State.source_id == datafile_id)
+                .yield_per(EXPORT_BATCH_SIZE)
+            )
+        else:
+            state_ids = self.measurement_query.decimated_state_ids(
+                max_points, decimation_method, datafile_id=datafile_id
+            )
+            states = list()
+            for start in range(0, len(state_ids), STATE_ID_BATCH_SIZE):
+                states.extend(
+                    self.session.query(State).filter(
+                        State.state_id.in_(
+                            state_ids[start : start + STATE_ID_BATCH_SIZE]
+                        )
+                    )
+                )
+            states.sort(key=lambda state: state.time)
         f = open("{}.rep".format(datafile), "w+")
-        states = (
-            self.session.query(self.db_classes.State)
-            .filter(self.db_classes.State.source_id == datafile_id)
-            .all()
-        )
+        # names of all the sensors and platforms of the Datafile in one query
+        self.name_cache.preload_datafile(datafile_id)
 
         contacts = (
             self.session.query(self.db_classes.Contact)
@@ -1278,6 +1413,10 @@ class DataStore(object):
             .all()
         )
 
+        # positions of the contacts, interpolated from the tracks of their hosts for
+        # those without a location of their own
+        contact_positions = self.contact_positions(contacts)
+
         line_number = 0
 
         # export states
@@ -1318,21 +1457,19 @@ class DataStore(object):
             platform_name = "[Not Found]"
             sensor_name = "[Not Found]"
             try:
-                platform_name = self.get_cached_platform_name(
-                    sensor_id=contact.sensor_id
+                sensor_name, platform_name = self.name_cache.sensor_names(
+                    contact.sensor_id
                 )
-                sensor_name = self.get_cached_sensor_name(sensor_id=contact.sensor_id)
             except Exception as ex:
                 print(str(ex))
 
+            position = contact_positions[i]
             contact_rep_line = [
                 transformer.format_datatime(contact.time),
                 platform_name,
                 "@@",
-                transformer.format_point(
-                    state.location.longitude, state.location.latitude
-                )
-                if state.location
+                transformer.format_point(position[1], position[0])
+                if position
                 else "NULL",
                 contact.bearing.to(unit_registry.degrees).magnitude
                 if contact.bearing
@@ -1359,6 +1496,7 @@ class DataStore(object):
             f.write(data + "\r\n")
 
         for i, comment in enumerate(comments):
+            line_number += 1
             vessel_name = self.get_cached_platform_name(platform_id=comment.platform_id)
             message = comment.content
             comment_type_name = self.get_cached_comment_type_name(
@@ -1381,6 +1519,80 @@ class DataStore(object):
             data = " ".join(comment_rep_line)
             f.write(data + "\r\n")
         f.close()
+        return line_number
+
+    def contact_positions(self, contacts):
+        """
+        Returns the positions of Contacts: their own location if they have one, or
+        else the position of the platform hosting their sensor at the time of the
+        Contact, interpolated from its States. The States of all hosts are read in
+        one query, see :meth:`MeasurementQuery.track_indexes`.
+
+        :param contacts: Contacts
+        :type contacts: List
+        :return: (latitude, longitude) of every Contact in decimal degrees, or None
+            if it can't be located
+        :rtype: List
+        """
+        positions = list()
+        # indices of the contacts to locate, keyed by the ID of their host
+        unlocated = dict()
+        for i, contact in enumerate(contacts):
+            location = contact.location
+            if location is not None:
+                positions.append((location.latitude, location.longitude))
+                continue
+            positions.append(None)
+            host = self.name_cache.sensor_host(contact.sensor_id)
+            if host is None:
+                continue
+            unlocated.setdefault(host, list()).append(i)
+        if not unlocated:
+            return positions
+
+        times = [contacts[i].time for indices in unlocated.values() for i in indices]
+        indexes = self.measurement_query.track_indexes(
+            unlocated.keys(), start=min(times), end=max(times)
+        )
+        for host, indices in unlocated.items():
+            index = indexes.get(host)
+            if index is None:
+                continue
+            indices.sort(key=lambda i: contacts[i].time)
+            latitudes, longitudes = index.positions_at(
+                [datetime_to_microseconds(contacts[i].time) for i in indices]
+            )
+            for i, latitude, longitude in zip(indices, latitudes, longitudes):
+                if not math.isnan(latitude):
+                    positions[i] = (latitude, longitude)
+        return positions
+
+    def find_loaded_datafiles(self, file_keys, batch_size=500):
+        """
+        Queries the Datafile table for the files loaded before among many files, with
+        one query per batch of hashed values rather than one query per file.
+
+        :param file_keys: (size, hashed value) of the files
+        :type file_keys: Iterable of Tuple
+        :param batch_size: Number of hashed values queried at once
+        :type batch_size: Integer
+        :return: References of the datafiles of the files loaded before, keyed by
+            (size, hashed value)
+        :rtype: Dict
+        """
+        file_keys = set(file_keys)
+        hashes = sorted({file_hash for _, file_hash in file_keys})
+        Datafile = self.db_classes.Datafile
+        loaded = dict()
+        for start in range(0, len(hashes), batch_size):
+            rows = self.session.query(
+                Datafile.size, Datafile.hash, Datafile.reference
+            ).filter(Datafile.hash.in_(hashes[start : start + batch_size]))
+            for size, file_hash, reference in rows:
+                key = (size, file_hash)
+                if key in file_keys and key not in loaded:
+                    loaded[key] = reference
+        return loaded
 
     def is_datafile_loaded_before(self, file_size, file_hash):
         """
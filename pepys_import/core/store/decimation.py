@@ -0,0 +1,214 @@
+"""
+Decimation of tracks to a budget of points, so that displaying or exporting a track
+costs in proportion to the screen resolution rather than to the number of States.
+
+Two methods are supported:
+
+- ``bucket`` splits the period of the track into ``max_points`` equal time buckets and
+  keeps the first State of each of them. It needs a single pass over the States, so it
+  can be applied while they are streamed from the database.
+- ``douglas-peucker`` keeps the ``max_points`` States which best preserve the shape of
+  the track, by repeatedly adding the State farthest from the simplified track. It needs
+  the whole track, and NumPy is used for the distances if it is installed.
+
+Distances are measured in decimal degrees, which is adequate for display.
+"""
+
+import heapq
+import math
+
+BUCKET = "bucket"
+DOUGLAS_PEUCKER = "douglas-peucker"
+METHODS = (BUCKET, DOUGLAS_PEUCKER)
+
+
+def check_decimation(max_points, method):
+    """Raises ValueError if the budget of points or the method isn't valid"""
+    if max_points is None:
+        return
+    if max_points < 2:
+        raise ValueError("At least two points are needed to decimate a track")
+    if method not in METHODS:
+        raise ValueError(
+            f"Unknown decimation method '{method}', expected one of {', '.join(METHODS)}"
+        )
+
+
+class TimeBuckets:
+    """
+    Keeps the first time of each of ``max_points`` equal buckets of a period.
+
+    :param start: First time of the period, in microseconds
+    :type start: Integer
+    :param end: Last time of the period, in microseconds
+    :type end: Integer
+    :param max_points: Number of buckets
+    :type max_points: Integer
+    """
+
+    def __init__(self, start, end, max_points):
+        self.start = start
+        self.span = end - start + 1
+        self.max_points = max_points
+        self.last_buckets = dict()
+
+    def keep(self, time, key=None):
+        """
+        Returns True if time is the first one of its bucket for the given key.
+
+        Times of each key must be given in increasing order.
+        """
+        bucket = (time - self.start) * self.max_points // self.span
+        if self.last_buckets.get(key) == bucket:
+            return False
+        self.last_buckets[key] = bucket
+        return True
+
+
+def bucket_indices(times, max_points):
+    """
+    Returns the indices of the first time of each of max_points equal buckets.
+
+    :param times: Times in increasing order, in microseconds
+    :type times: Sequence of Integer
+    :param max_points: Maximum number of indices
+    :type max_points: Integer
+    :return: Indices in increasing order
+    :rtype: List
+    """
+    if len(times) <= max_points:
+        return list(range(len(times)))
+    buckets = TimeBuckets(times[0], times[-1], max_points)
+    return [index for index, time in enumerate(times) if buckets.keep(time)]
+
+
+def douglas_peucker_indices(x, y, max_points):
+    """
+    Returns the indices of at most max_points points which best preserve the shape
+    of the line through all the points.
+
+    Points are added in order of their distance from the simplified line, as in the
+    Douglas-Peucker algorithm, until the budget is spent or the simplified line goes
+    through all the points.
+
+    :param x: X coordinates of the points
+    :type x: Sequence of Float
+    :param y: Y coordinates of the points
+    :type y: Sequence of Float
+    :param max_points: Maximum number of indices
+    :type max_points: Integer
+    :return: Indices in increasing order
+    :rtype: List
+    """
+    count = len(x)
+    if count <= max_points:
+        return list(range(count))
+    farthest_point = _farthest_point_function(x, y)
+
+    kept = [0, count - 1]
+    # Segments of the simplified line, by decreasing distance of their farthest point
+    segments = list()
+
+    def add_segment(first, last):
+        distance, index = farthest_point(first, last)
+        if distance > 0:
+            heapq.heappush(segments, (-distance, first, last, index))
+
+    add_segment(0, count - 1)
+    while segments and len(kept) < max_points:
+        _, first, last, index = heapq.heappop(segments)
+        kept.append(index)
+        add_segment(first, index)
+        add_segment(index, last)
+    return sorted(kept)
+
+
+def _farthest_point_function(x, y):
+    """
+    Returns a function giving the distance and index of the point between two
+    indices which is the farthest from the line through them
+    """
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    if numpy is None:
+
+        def farthest_point(first, last):
+            distance, index = 0.0, None
+            for middle in range(first + 1, last):
+                middle_distance = _distance(x, y, first, last, middle)
+                if middle_distance > distance:
+                    distance, index = middle_distance, middle
+            return distance, index
+
+        return farthest_point
+
+    x = numpy.asarray(x, dtype=numpy.float64)
+    y = numpy.asarray(y, dtype=numpy.float64)
+
+    def farthest_point(first, last):
+        if last - first < 2:
+            return 0.0, None
+        dx = x[last] - x[first]
+        dy = y[last] - y[first]
+        px = x[first + 1 : last] - x[first]
+        py = y[first + 1 : last] - y[first]
+        length = math.hypot(dx, dy)
+        if length == 0:
+            distances = numpy.hypot(px, py)
+        else:
+            distances = numpy.abs(dy * px - dx * py) / length
+        middle = int(numpy.argmax(distances))
+        return float(distances[middle]), first + 1 + middle
+
+    return farthest_point
+
+
+def _distance(x, y, first, last, middle):
+    """Distance of a point from the line through two others"""
+    dx = x[last] - x[first]
+    dy = y[last] - y[first]
+    px = x[middle] - x[first]
+    py = y[middle] - y[first]
+    length = math.hypot(dx, dy)
+    if length == 0:
+        return math.hypot(px, py)
+    return abs(dy * px - dx * py) / length
+
+
+def decimate_indices(times, longitudes, latitudes, max_points, method=BUCKET):
+    """
+    Returns the indices of the points of a track kept by the decimation method.
+
+    The Douglas-Peucker method skips the points without location.
+
+    :param times: Times in increasing order, in microseconds
+    :type times: Sequence of Integer
+    :param longitudes: Longitudes of the points, NaN for points without location
+    :type longitudes: Sequence of Float
+    :param latitudes: Latitudes of the points, NaN for points without location
+    :type latitudes: Sequence of Float
+    :param max_points: Maximum number of points
+    :type max_points: Integer
+    :param method: Decimation method, one of :data:`METHODS`
+    :type method: String
+    :return: Indices in increasing order
+    :rtype: List
+    """
+    check_decimation(max_points, method)
+    if method == BUCKET:
+        return bucket_indices(times, max_points)
+
+    located = [
+        index
+        for index in range(len(times))
+        if not (math.isnan(longitudes[index]) or math.isnan(latitudes[index]))
+    ]
+    kept = douglas_peucker_indices(
+        [longitudes[index] for index in located],
+        [latitudes[index] for index in located],
+        max_points,
+    )
+    return [located[index] for index in kept]
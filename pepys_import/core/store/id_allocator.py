@@ -0,0 +1,132 @@
+from uuid import uuid4
+
+from sqlalchemy import inspect
+from sqlalchemy.sql import func
+
+DEFAULT_BLOCK_SIZE = 1000
+
+
+class IdAllocator:
+    """
+    Hands out primary keys for new entities before they are inserted.
+
+    Knowing the ID of an entity up front means it can be logged and inserted in bulk
+    without a flush per row. On PostGIS the primary keys are UUIDs, so they are simply
+    generated on the client. On SQLite the primary keys are integers, so a block of
+    consecutive IDs is reserved above the current maximum of the table and IDs are
+    taken from it until it runs out. The reservation is only kept for the lifetime of
+    the current session, so rows inserted by other writers in between sessions are
+    picked up again when the next block is reserved.
+
+    The block is only reserved in memory, as SQLite gives a row inserted without a
+    primary key the maximum of the table plus one, which would fall within it. So
+    within a session, the rows of a table which a block was reserved for must take
+    their IDs from the allocator: the entities added through the ORM are given IDs
+    from the block when they are flushed (see :meth:`before_flush`), but rows
+    inserted with a NULL primary key through Core, or by another connection during
+    the session, aren't, and the allocator must be the only writer of the table.
+
+    :param data_store: DataStore whose session is used to reserve the blocks
+    :type data_store: DataStore
+    :param block_size: Number of IDs reserved at once on SQLite
+    :type block_size: Integer
+    """
+
+    def __init__(self, data_store, block_size=DEFAULT_BLOCK_SIZE):
+        self.data_store = data_store
+        self.block_size = block_size
+        self._session = None
+        self._blocks = dict()
+
+    def allocate(self, model, count=1):
+        """
+        Allocates a batch of primary keys for the given table.
+
+        :param model: Mapped class of the table, e.g. ``db_classes.State``
+        :type model: Class
+        :param count: Number of IDs to allocate
+        :type count: Integer
+        :return: List of the allocated IDs
+        :rtype: List
+        """
+        if self.data_store.db_type == "postgres":
+            return [uuid4() for _ in range(count)]
+
+        if self._session is not self.data_store.session:
+            self._session = self.data_store.session
+            self._blocks = dict()
+
+        table_name = model.__tablename__
+        block = self._blocks.get(table_name)
+        if block is None or block[0] + count > block[1]:
+            block = self._reserve_block(model, count, block)
+            self._blocks[table_name] = block
+
+        start = block[0]
+        block[0] += count
+        return list(range(start, start + count))
+
+    def allocate_id(self, model):
+        """
+        Allocates a single primary key for the given table.
+
+        :param model: Mapped class of the table, e.g. ``db_classes.State``
+        :type model: Class
+        :return: Allocated ID
+        :rtype: Integer or UUID
+        """
+        return self.allocate(model, 1)[0]
+
+    def allocate_unless_generated(self, model, count=1):
+        """
+        Allocates primary keys only if the database can't generate them itself.
+
+        SQLite assigns the next integer key to rows inserted with a NULL primary key,
+        even in ``INSERT ... SELECT`` statements, so a list of None is returned there.
+
+        :param model: Mapped class of the table, e.g. ``db_classes.Log``
+        :type model: Class
+        :param count: Number of IDs to allocate
+        :type count: Integer
+        :return: List of the allocated IDs
+        :rtype: List
+        """
+        if self.data_store.db_type == "postgres":
+            return self.allocate(model, count)
+        return [None] * count
+
+    def assign_id(self, entity):
+        """
+        Sets the primary key of the entity if it has not been set yet.
+
+        :param entity: Entity which is about to be inserted
+        :return: Primary key of the entity
+        :rtype: Integer or UUID
+        """
+        model = type(entity)
+        key = inspect(model).primary_key[0].key
+        value = getattr(entity, key)
+        if value is None:
+            value = self.allocate_id(model)
+            setattr(entity, key, value)
+        return value
+
+    def before_flush(self, session, flush_context, instances):
+        """
+        Listener of the "before_flush" event of the session, giving the new entities
+        of the tables which a block was reserved for in the session an ID from it,
+        rather than letting SQLite assign IDs which may be in the block
+        """
+        if self.data_store.db_type == "postgres" or session is not self._session:
+            return
+        for entity in session.new:
+            if type(entity).__tablename__ in self._blocks:
+                self.assign_id(entity)
+
+    def _reserve_block(self, model, count, block):
+        primary_key = inspect(model).primary_key[0]
+        current_max = self.data_store.session.query(func.max(primary_key)).scalar()
+        start = (current_max or 0) + 1
+        if block is not None:
+            start = max(start, block[0])
+        return [start, start + max(self.block_size, count)]
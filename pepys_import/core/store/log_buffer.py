@@ -0,0 +1,74 @@
+DEFAULT_MAX_SIZE = 5000
+
+
+class LogBuffer:
+    """
+    Accumulates rows for the Logs table and writes them to the database in bulk.
+
+    Every entity inserted through the :class:`DataStore` is audited with a Log row.
+    Adding and flushing each of those rows on its own doubles the number of round
+    trips of an import, so they are kept here and written with a single
+    executemany at flush points: when the buffer is full, when a datafile is
+    committed and when the session scope of the :class:`DataStore` ends.
+
+    :param data_store: DataStore whose session is used to write the rows
+    :type data_store: DataStore
+    :param max_size: Number of pending rows which triggers an automatic flush
+    :type max_size: Integer
+    """
+
+    def __init__(self, data_store, max_size=DEFAULT_MAX_SIZE):
+        self.data_store = data_store
+        self.max_size = max_size
+        self.pending = list()
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, table, row_id, field=None, new_value=None, change_id=None):
+        """
+        Adds a Log row to the buffer, flushing the buffer if it is full.
+
+        :param table: Name of the table
+        :type table: String
+        :param row_id: Entity ID of the row in the table
+        :type row_id: Integer or UUID
+        :param field: Name of the field
+        :type field: String
+        :param new_value: New value of the field
+        :type new_value: String
+        :param change_id: ID of the :class:`Change` object
+        :type change_id: Integer or UUID
+        """
+        self.pending.append(
+            {
+                "table": table,
+                "id": row_id,
+                "field": field,
+                "new_value": new_value,
+                "change_id": change_id,
+            }
+        )
+        if len(self.pending) >= self.max_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes all pending rows to the Logs table with a single executemany, and adds
+        the entities whose creation they record to the counters of their tables.
+
+        :return: Number of rows written
+        :rtype: Integer
+        """
+        if not self.pending:
+            return 0
+
+        rows, self.pending = self.pending, list()
+        log_table = self.data_store.db_classes.Log.__table__
+        self.data_store.session.execute(log_table.insert(), rows)
+        self.data_store.table_counters.count_logs(rows)
+        return len(rows)
+
+    def clear(self):
+        """Discards all pending rows, e.g. when the session is rolled back"""
+        self.pending = list()
@@ -0,0 +1,883 @@
+import math
+from array import array
+from datetime import datetime, timedelta, timezone
+from itertools import repeat
+
+from uuid import uuid4
+
+from geoalchemy2 import Geometry
+from sqlalchemy import Column, MetaData, Table, Text, inspect, literal, select
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.sql import func
+from tqdm import tqdm
+
+from pepys_import.core.formats import unit_registry
+from pepys_import.core.formats.location import Location
+from pepys_import.core.store import constants
+
+EPOCH = datetime(1970, 1, 1)
+NAN = float("nan")
+DEFAULT_BATCH_SIZE = 10000
+
+
+def datetime_to_microseconds(timestamp):
+    """Converts a datetime to the number of microseconds since the Unix epoch"""
+    if not isinstance(timestamp, datetime):
+        raise TypeError("Time must be a datetime")
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = timestamp - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def microseconds_to_datetime(microseconds):
+    """Converts a number of microseconds since the Unix epoch to a datetime"""
+    return EPOCH + timedelta(microseconds=microseconds)
+
+
+class InternedColumn:
+    """
+    Column of arbitrary (hashable) values, storing every distinct value once.
+
+    Each row only keeps the position of its value in :attr:`values`, or -1 for None.
+    """
+
+    __slots__ = ("values", "positions", "rows")
+
+    def __init__(self):
+        self.values = list()
+        self.positions = dict()
+        self.rows = array("l")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def position(self, value):
+        if value is None:
+            return -1
+        position = self.positions.get(value)
+        if position is None:
+            position = len(self.values)
+            self.values.append(value)
+            self.positions[value] = position
+        return position
+
+    def append(self, value=None):
+        self.rows.append(self.position(value))
+
+    def extend(self, value, count):
+        """Adds count rows with the same value"""
+        self.rows.extend(repeat(self.position(value), count))
+
+    def get(self, row):
+        position = self.rows[row]
+        return None if position < 0 else self.values[position]
+
+    def set(self, row, value):
+        self.rows[row] = self.position(value)
+
+    def clear(self):
+        """Removes all rows, keeping the distinct values for the following rows"""
+        self.rows = array("l")
+
+
+class FloatField:
+    """Exposes a REAL column of the buffer as the underscored attribute of the model"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, record, owner):
+        if record is None:
+            return self
+        value = record._columns.floats[self.name][record._row]
+        return None if math.isnan(value) else value
+
+    def __set__(self, record, value):
+        # Like a REAL column in the database, numeric strings are accepted as well
+        record._columns.floats[self.name][record._row] = (
+            NAN if value is None else float(value)
+        )
+
+
+class UnitField:
+    """
+    Exposes a hybrid property of the model (e.g. ``heading``) on a record.
+
+    The getter and setter of the model are reused, so the records accept and return
+    exactly the same Quantities as the ORM objects do.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, record, owner):
+        if record is None:
+            return self
+        return record._columns.hybrids[self.name].fget(record)
+
+    def __set__(self, record, value):
+        record._columns.hybrids[self.name].fset(record, value)
+
+
+class ValueField:
+    """Exposes a column of arbitrary values of the buffer"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, record, owner):
+        if record is None:
+            return self
+        return record._columns.values[self.name].get(record._row)
+
+    def __set__(self, record, value):
+        record._columns.values[self.name].set(record._row, value)
+
+
+class LocationField:
+    """Exposes a pair of latitude/longitude columns as a :class:`Location`"""
+
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+
+    def __get__(self, record, owner):
+        if record is None:
+            return self
+        columns = record._columns
+        latitude = columns.floats[self.latitude][record._row]
+        if math.isnan(latitude):
+            return None
+        location = Location()
+        location._latitude = latitude
+        location._longitude = columns.floats[self.longitude][record._row]
+        return location
+
+    def __set__(self, record, location):
+        if location is None:
+            latitude = longitude = NAN
+        else:
+            if not isinstance(location, Location):
+                raise TypeError(
+                    "location value must be an instance of the Location class"
+                )
+            if not location.check_valid():
+                raise ValueError("location object does not have valid values")
+            latitude = location.latitude
+            longitude = location.longitude
+
+        columns = record._columns
+        columns.floats[self.latitude][record._row] = latitude
+        columns.floats[self.longitude][record._row] = longitude
+
+
+class MeasurementRecord:
+    """
+    Lightweight view of a single row of a :class:`MeasurementBuffer`.
+
+    Records expose the same attributes as the ORM objects which importers used to
+    receive from ``create_state``, ``create_contact`` and ``create_comment``, but
+    read and write the columns of the buffer instead of holding any state.
+    """
+
+    __slots__ = ("_columns", "_row")
+
+    def __init__(self, columns, row):
+        self._columns = columns
+        self._row = row
+
+    def __repr__(self):
+        return f"{type(self).__name__}(time={self.time}, row={self._row})"
+
+    @property
+    def time(self):
+        return microseconds_to_datetime(self._columns.time[self._row])
+
+    @time.setter
+    def time(self, time):
+        self._columns.time[self._row] = datetime_to_microseconds(time)
+
+    @property
+    def source_id(self):
+        return self._columns.source_id
+
+    @property
+    def sensor_name(self):
+        return self._columns.context.get(self._row)[0]
+
+    @sensor_name.setter
+    def sensor_name(self, sensor_name):
+        self._columns.context.set(self._row, (sensor_name, self.platform_name))
+
+    @property
+    def platform_name(self):
+        return self._columns.context.get(self._row)[1]
+
+    @platform_name.setter
+    def platform_name(self, platform_name):
+        self._columns.context.set(self._row, (self.sensor_name, platform_name))
+
+    privacy_id = ValueField("privacy_id")
+
+    @property
+    def privacy(self):
+        return self.privacy_id
+
+    @privacy.setter
+    def privacy(self, privacy):
+        # Importers either pass a Privacy entity or its ID
+        self.privacy_id = getattr(privacy, "privacy_id", privacy)
+
+
+class StateRecord(MeasurementRecord):
+    __slots__ = ()
+
+    sensor_id = ValueField("sensor_id")
+    location = LocationField("latitude", "longitude")
+    prev_location = LocationField("prev_latitude", "prev_longitude")
+
+    _elevation = FloatField("elevation")
+    _heading = FloatField("heading")
+    _course = FloatField("course")
+    _speed = FloatField("speed")
+
+    elevation = UnitField("elevation")
+    heading = UnitField("heading")
+    course = UnitField("course")
+    speed = UnitField("speed")
+
+
+class ContactRecord(MeasurementRecord):
+    __slots__ = ()
+
+    sensor_id = ValueField("sensor_id")
+    name = ValueField("name")
+    classification = ValueField("classification")
+    confidence = ValueField("confidence")
+    contact_type = ValueField("contact_type")
+    subject_id = ValueField("subject_id")
+    location = LocationField("latitude", "longitude")
+
+    _bearing = FloatField("bearing")
+    _rel_bearing = FloatField("rel_bearing")
+    _freq = FloatField("freq")
+    _range = FloatField("range")
+    _elevation = FloatField("elevation")
+    _major = FloatField("major")
+    _minor = FloatField("minor")
+    _orientation = FloatField("orientation")
+    _mla = FloatField("mla")
+    _soa = FloatField("soa")
+
+    bearing = UnitField("bearing")
+    rel_bearing = UnitField("rel_bearing")
+    freq = UnitField("freq")
+    range = UnitField("range")
+    elevation = UnitField("elevation")
+    major = UnitField("major")
+    minor = UnitField("minor")
+    orientation = UnitField("orientation")
+    mla = UnitField("mla")
+    soa = UnitField("soa")
+
+
+class CommentRecord(MeasurementRecord):
+    __slots__ = ()
+
+    platform_id = ValueField("platform_id")
+    comment_type_id = ValueField("comment_type_id")
+    content = ValueField("content")
+
+
+class MeasurementColumns:
+    """
+    Columnar storage of the measurements of a single table.
+
+    Times are kept as microseconds since the epoch, REAL columns as floats in SI units
+    (NaN standing for None), locations as latitude/longitude floats and all other
+    values in :class:`InternedColumn` objects.
+
+    :param model: Mapped class of the table, e.g. ``db_classes.State``
+    :type model: Class
+    :param source_id: ID of the :class:`Datafile` the measurements are read from
+    :type source_id: Integer or UUID
+    """
+
+    table = None
+    model_name = None
+    record_class = None
+    float_fields = ()
+    value_fields = ()
+    location_fields = ()
+
+    def __init__(self, model, source_id):
+        self.model = model
+        self.source_id = source_id
+        self.hybrids = {
+            name: descriptor
+            for name, descriptor in inspect(model).all_orm_descriptors.items()
+            if isinstance(descriptor, hybrid_property)
+        }
+        self.time = array("q")
+        self.context = InternedColumn()
+        self.floats = {
+            name: array("d") for name in self.float_fields + self.location_fields
+        }
+        self.values = {name: InternedColumn() for name in self.value_fields}
+        self.staging = None
+        self.staged_count = 0
+
+    def __len__(self):
+        return len(self.time)
+
+    def clear(self):
+        """Removes all rows held in memory"""
+        self.time = array("q")
+        self.context.clear()
+        for name in self.floats:
+            self.floats[name] = array("d")
+        for column in self.values.values():
+            column.clear()
+
+    def append(self, timestamp, sensor_name, platform_name, **values):
+        """
+        Adds a new row to the columns.
+
+        :return: Record of the new row
+        :rtype: MeasurementRecord
+        """
+        row = len(self.time)
+        self.time.append(datetime_to_microseconds(timestamp))
+        self.context.append((sensor_name, platform_name))
+        for column in self.floats.values():
+            column.append(NAN)
+        for name, column in self.values.items():
+            column.append(values.get(name))
+        return self.record_class(self, row)
+
+    def extend(self, times, sensor_name, platform_name, floats=None, **values):
+        """
+        Adds rows which share their sensor, platform and other values, e.g. the
+        measurements of a platform read in bulk.
+
+        :param times: Times of the rows, in microseconds since the epoch
+        :type times: Sequence of Integer
+        :param floats: Values of REAL and location columns of the rows keyed by column
+            name, in the units they are stored in, NaN for None. Other such columns
+            are None.
+        :type floats: Dict of Sequence of Float
+        """
+        count = len(times)
+        floats = floats or dict()
+        for name, column in floats.items():
+            if name not in self.floats:
+                raise ValueError(f"Unknown column '{name}' of {self.table}")
+            if len(column) != count:
+                raise ValueError(f"Column '{name}' doesn't have {count} values")
+        self.time.extend(times)
+        self.context.extend((sensor_name, platform_name), count)
+        for name, column in self.floats.items():
+            column.extend(floats[name] if name in floats else repeat(NAN, count))
+        for name, column in self.values.items():
+            column.extend(values.get(name), count)
+
+    def records(self):
+        for row in range(len(self)):
+            yield self.record_class(self, row)
+
+    def row_values(self, row):
+        """Returns the values of a row, keyed by the column names of the table"""
+        values = {
+            "time": microseconds_to_datetime(self.time[row]),
+            "source_id": self.source_id,
+        }
+        for name in self.float_fields:
+            value = self.floats[name][row]
+            values[name] = None if math.isnan(value) else value
+        for name, column in self.values.items():
+            values[name] = column.get(row)
+        if self.location_fields:
+            latitude = self.floats["latitude"][row]
+            if math.isnan(latitude):
+                values["location"] = None
+            else:
+                longitude = self.floats["longitude"][row]
+                values["location"] = f"SRID=4326;POINT({longitude} {latitude})"
+        return values
+
+    def commit(self, data_store, change_id, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Inserts all rows to the table in batches and logs their creation.
+
+        Rows which have been staged are promoted together with the rows still held in
+        memory.
+
+        :param data_store: A :class:`DataStore` object
+        :type data_store: DataStore
+        :param change_id: ID of the :class:`Change` object
+        :type change_id: Integer or UUID
+        :param batch_size: Number of rows inserted with a single executemany
+        :type batch_size: Integer
+        """
+        if self.staging is not None:
+            self.stage(data_store)
+            self.promote(data_store, change_id)
+            return
+
+        insert = self.model.__table__.insert()
+        primary_key = inspect(self.model).primary_key[0].key
+        with tqdm(total=len(self)) as progress:
+            for start in range(0, len(self), batch_size):
+                stop = min(start + batch_size, len(self))
+                ids = data_store.id_allocator.allocate(self.model, stop - start)
+                rows = [self.row_values(row) for row in range(start, stop)]
+                for values, row_id in zip(rows, ids):
+                    values[primary_key] = row_id
+                    data_store.add_to_logs(
+                        table=self.table, row_id=row_id, change_id=change_id
+                    )
+                data_store.session.execute(insert, rows)
+                progress.update(stop - start)
+
+    def create_staging_table(self, data_store):
+        """
+        Creates a temporary table with the columns of the table, in which the rows are
+        staged until they are promoted. Locations are staged as EWKT strings and the ID
+        of the Log row of each measurement is staged alongside it.
+        """
+        columns = list()
+        for column in self.model.__table__.columns:
+            column_type = Text() if isinstance(column.type, Geometry) else column.type
+            columns.append(Column(column.name, column_type))
+        log_id_type = data_store.db_classes.Log.__table__.c.log_id.type
+        columns.append(Column("log_id", log_id_type))
+
+        staging = Table(
+            f"staging_{self.table.lower()}_{uuid4().hex[:8]}",
+            MetaData(),
+            *columns,
+            prefixes=["TEMPORARY"],
+        )
+        staging.create(bind=data_store.session.connection())
+        return staging
+
+    def stage(self, data_store):
+        """
+        Moves all rows held in memory to the staging table.
+
+        :param data_store: A :class:`DataStore` object
+        :type data_store: DataStore
+        """
+        if self.staging is None:
+            self.staging = self.create_staging_table(data_store)
+        if len(self) == 0:
+            return
+
+        primary_key = inspect(self.model).primary_key[0].key
+        ids = data_store.id_allocator.allocate(self.model, len(self))
+        log_ids = data_store.id_allocator.allocate_unless_generated(
+            data_store.db_classes.Log, len(self)
+        )
+        created_date = datetime.utcnow()
+        rows = [self.row_values(row) for row in range(len(self))]
+        for values, row_id, log_id in zip(rows, ids, log_ids):
+            values[primary_key] = row_id
+            values["log_id"] = log_id
+            values["created_date"] = created_date
+        data_store.session.execute(self.staging.insert(), rows)
+        self.staged_count += len(rows)
+        self.clear()
+
+    def promote(self, data_store, change_id):
+        """
+        Copies the staged rows and their Log rows to the actual tables with set-based
+        ``INSERT ... SELECT`` statements, counts them and drops the staging table.
+
+        :param data_store: A :class:`DataStore` object
+        :type data_store: DataStore
+        :param change_id: ID of the :class:`Change` object
+        :type change_id: Integer or UUID
+        """
+        staging = self.staging
+        table = self.model.__table__
+        names = [column.name for column in table.columns]
+        selected = [
+            (
+                func.ST_GeomFromEWKT(staging.c[name])
+                if isinstance(table.c[name].type, Geometry)
+                else staging.c[name]
+            )
+            for name in names
+        ]
+        data_store.session.execute(table.insert().from_select(names, select(selected)))
+
+        log_table = data_store.db_classes.Log.__table__
+        primary_key = inspect(self.model).primary_key[0].name
+        data_store.session.execute(
+            log_table.insert().from_select(
+                ["log_id", "table", "id", "change_id", "created_date"],
+                select(
+                    [
+                        staging.c.log_id,
+                        literal(self.table, type_=log_table.c.table.type),
+                        staging.c[primary_key],
+                        literal(change_id, type_=log_table.c.change_id.type),
+                        staging.c.created_date,
+                    ]
+                ),
+            )
+        )
+        data_store.table_counters.increment(
+            {self.table: self.staged_count, constants.LOG: self.staged_count}
+        )
+        self.drop_staging(data_store)
+
+    def drop_staging(self, data_store):
+        """Drops the staging table and everything staged in it"""
+        if self.staging is not None:
+            self.staging.drop(bind=data_store.session.connection())
+            self.staging = None
+            self.staged_count = 0
+
+
+class StateColumns(MeasurementColumns):
+    table = constants.STATE
+    model_name = "State"
+    record_class = StateRecord
+    float_fields = ("elevation", "heading", "course", "speed")
+    value_fields = ("sensor_id", "privacy_id")
+    location_fields = ("latitude", "longitude", "prev_latitude", "prev_longitude")
+
+
+class ContactColumns(MeasurementColumns):
+    table = constants.CONTACT
+    model_name = "Contact"
+    record_class = ContactRecord
+    float_fields = (
+        "bearing",
+        "rel_bearing",
+        "freq",
+        "range",
+        "elevation",
+        "major",
+        "minor",
+        "orientation",
+        "mla",
+        "soa",
+    )
+    value_fields = (
+        "sensor_id",
+        "name",
+        "classification",
+        "confidence",
+        "contact_type",
+        "subject_id",
+        "privacy_id",
+    )
+    location_fields = ("latitude", "longitude")
+
+
+class CommentColumns(MeasurementColumns):
+    table = constants.COMMENT
+    model_name = "Comment"
+    record_class = CommentRecord
+    value_fields = ("platform_id", "comment_type_id", "content", "privacy_id")
+
+
+class MeasurementBuffer:
+    """
+    Compact in-memory store of the measurements extracted by an importer.
+
+    Instead of an ORM object per measurement, the values are kept in typed columns per
+    table and handed out as :class:`MeasurementRecord` views, which support the same
+    attribute API as the ORM objects. The buffer can be iterated like the list of
+    measurements it replaces (e.g. by the validators), and is written to the database
+    with bulk inserts, so no ORM object is ever created for its rows.
+
+    If a ``chunk_size`` is given, the buffer never holds more than that many rows per
+    table: once a table is full, its rows are validated and moved to a temporary
+    staging table. Iterating the buffer then only yields the rows still held in
+    memory, while its length and indexes count the staged rows as well: the staged
+    rows of a table come before its rows held in memory, and can't be read, so
+    indexing one of them raises an IndexError. Records returned for
+    earlier rows must not be modified once a new row has been added. The staged rows
+    are promoted to the actual tables on commit, or dropped by :meth:`discard` if the
+    validation fails.
+
+    :param source_id: ID of the :class:`Datafile` the measurements are read from
+    :type source_id: Integer or UUID
+    :param objects: ORM measurement objects which are already held for the importer
+    :type objects: List
+    :param chunk_size: Number of rows per table held in memory before they are staged
+    :type chunk_size: Integer
+    :param validate: Function validating an iterable of measurements, which appends
+        the errors it finds to ``errors``
+    :type validate: Callable
+    :param errors: List of errors of the importer, rows are only staged while empty
+    :type errors: List
+    """
+
+    def __init__(
+        self, source_id, objects=None, chunk_size=None, validate=None, errors=None
+    ):
+        self.source_id = source_id
+        self.objects = list(objects) if objects else list()
+        self.columns = dict()
+        self.chunk_size = chunk_size
+        self.validate = validate
+        self.errors = errors if errors is not None else list()
+        self.dropped = False
+
+    def __len__(self):
+        return len(self.objects) + sum(
+            len(c) + c.staged_count for c in self.columns.values()
+        )
+
+    def __iter__(self):
+        yield from self.objects
+        for columns in self.columns.values():
+            yield from columns.records()
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("measurement index out of range")
+        if index < len(self.objects):
+            return self.objects[index]
+        position = index - len(self.objects)
+        for columns in self.columns.values():
+            if position < columns.staged_count:
+                raise IndexError(
+                    f"measurement {index} has been staged, only the measurements "
+                    "held in memory can be read"
+                )
+            position -= columns.staged_count
+            if position < len(columns):
+                return columns.record_class(columns, position)
+            position -= len(columns)
+
+    def append(self, measurement):
+        """Adds an ORM measurement object, which is submitted as it is"""
+        self.objects.append(measurement)
+
+    def get_columns(self, data_store, columns_class):
+        columns = self.columns.get(columns_class.table)
+        if columns is None:
+            model = getattr(data_store.db_classes, columns_class.model_name)
+            columns = columns_class(model, self.source_id)
+            self.columns[columns_class.table] = columns
+        elif self.chunk_size is not None and len(columns) >= self.chunk_size:
+            self.spill(data_store, columns)
+        return columns
+
+    def spill(self, data_store, columns):
+        """
+        Validates the rows of the columns and moves them to their staging table. Once
+        any error has been found the file can't be committed anymore, so the rows are
+        only validated and then dropped.
+        """
+        if self.validate is not None:
+            self.validate(columns.records())
+        if self.errors:
+            columns.clear()
+            self.discard(data_store)
+            self.dropped = True
+        else:
+            columns.stage(data_store)
+
+    def add_state(self, data_store, platform, sensor, timestamp):
+        columns = self.get_columns(data_store, StateColumns)
+        return columns.append(
+            timestamp, sensor.name, platform.name, sensor_id=sensor.sensor_id
+        )
+
+    def add_states(self, data_store, platform, sensor, times, floats=None, **values):
+        """
+        Adds States of a sensor in bulk, see :meth:`MeasurementColumns.extend`.
+
+        Like single States, they are staged every ``chunk_size`` rows.
+        """
+        floats = floats or dict()
+        start = 0
+        while start < len(times):
+            columns = self.get_columns(data_store, StateColumns)
+            stop = len(times)
+            if self.chunk_size is not None:
+                stop = min(stop, start + self.chunk_size - len(columns))
+            columns.extend(
+                times[start:stop],
+                sensor.name,
+                platform.name,
+                {name: column[start:stop] for name, column in floats.items()},
+                sensor_id=sensor.sensor_id,
+                **values,
+            )
+            start = stop
+
+    def add_contact(self, data_store, platform, sensor, timestamp):
+        columns = self.get_columns(data_store, ContactColumns)
+        return columns.append(
+            timestamp, sensor.name, platform.name, sensor_id=sensor.sensor_id
+        )
+
+    def add_comment(self, data_store, platform, timestamp, comment, comment_type):
+        columns = self.get_columns(data_store, CommentColumns)
+        return columns.append(
+            timestamp,
+            "N/A",
+            platform.name,
+            platform_id=platform.platform_id,
+            comment_type_id=comment_type.comment_type_id,
+            content=comment,
+        )
+
+    def commit(self, data_store, change_id, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Writes all measurements of the buffer to the database.
+
+        :param data_store: A :class:`DataStore` object
+        :type data_store: DataStore
+        :param change_id: ID of the :class:`Change` object
+        :type change_id: Integer or UUID
+        :param batch_size: Number of rows inserted with a single executemany
+        :type batch_size: Integer
+        """
+        if self.dropped:
+            raise Exception(
+                "Measurements which failed validation have been dropped, "
+                "the buffer can't be committed"
+            )
+        for measurement in self.objects:
+            measurement.submit(data_store, change_id)
+        for columns in self.columns.values():
+            columns.commit(data_store, change_id, batch_size)
+
+    def discard(self, data_store):
+        """
+        Drops all staged rows, e.g. when the validation of the file failed.
+
+        :param data_store: A :class:`DataStore` object
+        :type data_store: DataStore
+        """
+        for columns in self.columns.values():
+            columns.drop_staging(data_store)
+
+
+def normalise_heading(heading):
+    """Returns a heading in degrees brought within 0 to 360 degrees"""
+    if heading < 0:
+        heading += 360
+    if heading > 360:
+        heading -= 360
+    return heading
+
+
+class DayCache:
+    """
+    Start times of the days of dates, in microseconds since the epoch, parsed once per
+    date as the dates repeat across the rows of a file.
+
+    :param parse: Function parsing the text of a date to the datetime of its start
+    :type parse: Callable
+    """
+
+    def __init__(self, parse):
+        self.parse = parse
+        self.days = dict()
+
+    def microseconds(self, date):
+        """Returns the start of the day of a date, raising ValueError if invalid"""
+        day = self.days.get(date)
+        if day is None:
+            day = datetime_to_microseconds(self.parse(date))
+            self.days[date] = day
+        return day
+
+
+class StateTrack:
+    """
+    Columns of the values of the States of a platform read by an importer, in the
+    units they are read in, to be added to a :class:`MeasurementBuffer` in bulk with
+    :meth:`MeasurementBuffer.add_states` once the file has been read, see
+    :meth:`floats`.
+
+    :param elevations: Whether the States have elevations
+    :type elevations: Boolean
+    """
+
+    def __init__(self, elevations=False):
+        self.times = array("q")
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        self.headings = array("d")
+        self.speeds = array("d")
+        self.elevations = array("d") if elevations else None
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, time, latitude, longitude, heading, speed, elevation=None):
+        """
+        Adds the values of a State.
+
+        :param time: Time, in microseconds since the epoch
+        :type time: Integer
+        :param latitude: Latitude, in decimal degrees
+        :type latitude: Float
+        :param longitude: Longitude, in decimal degrees
+        :type longitude: Float
+        :param heading: Heading, in degrees
+        :type heading: Float
+        :param speed: Speed, in knots
+        :type speed: Float
+        :param elevation: Elevation, in metres, if the States have elevations
+        :type elevation: Float
+        """
+        self.times.append(time)
+        self.latitudes.append(latitude)
+        self.longitudes.append(longitude)
+        self.headings.append(heading)
+        self.speeds.append(speed)
+        if self.elevations is not None:
+            self.elevations.append(elevation)
+
+    def floats(self, prev_location=None):
+        """
+        Returns the float columns of the States, in the units they are stored in,
+        given the location of the platform before the first State.
+
+        :param prev_location: Location before the first State, if any
+        :type prev_location: Location
+        :return: Columns keyed by field, for :meth:`MeasurementBuffer.add_states`
+        :rtype: Dict
+        """
+        prev_latitudes = array("d", [NAN])
+        prev_longitudes = array("d", [NAN])
+        if prev_location is not None:
+            prev_latitudes[0] = prev_location.latitude
+            prev_longitudes[0] = prev_location.longitude
+        prev_latitudes.extend(self.latitudes[:-1])
+        prev_longitudes.extend(self.longitudes[:-1])
+
+        # Speeds are given in knots, and stored in metres per second
+        knot = (1 * unit_registry.knot).to(unit_registry.metre / unit_registry.second)
+        floats = {
+            "latitude": self.latitudes,
+            "longitude": self.longitudes,
+            "prev_latitude": prev_latitudes,
+            "prev_longitude": prev_longitudes,
+            "heading": array("d", map(math.radians, self.headings)),
+            "speed": array("d", [speed * knot.magnitude for speed in self.speeds]),
+        }
+        if self.elevations is not None:
+            floats["elevation"] = self.elevations
+        return floats
+
+    def last_location(self):
+        """Returns the location of the last State"""
+        location = Location()
+        location.set_latitude_decimal_degrees(self.latitudes[-1])
+        location.set_longitude_decimal_degrees(self.longitudes[-1])
+        return location
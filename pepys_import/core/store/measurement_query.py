@@ -0,0 +1,557 @@
+import math
+from array import array
+from collections import namedtuple
+
+from sqlalchemy import and_, select, text
+from sqlalchemy.sql import func
+
+from pepys_import.core.store.decimation import (
+    BUCKET,
+    TimeBuckets,
+    check_decimation,
+    decimate_indices,
+)
+from pepys_import.core.store.measurement_buffer import (
+    datetime_to_microseconds,
+    microseconds_to_datetime,
+)
+from pepys_import.core.store.track_index import TrackIndex
+
+DEFAULT_BATCH_SIZE = 10000
+NAN = float("nan")
+
+StateRow = namedtuple(
+    "StateRow",
+    [
+        "time",
+        "sensor_id",
+        "latitude",
+        "longitude",
+        "elevation",
+        "heading",
+        "course",
+        "speed",
+    ],
+)
+
+
+class BoundingBox(namedtuple("BoundingBox", ["west", "south", "east", "north"])):
+    """
+    Area between two longitudes and two latitudes, in decimal degrees.
+
+    Bounding boxes crossing the antimeridian (west > east) aren't supported.
+    """
+
+    def __new__(cls, west, south, east, north):
+        if west > east or south > north:
+            raise ValueError(
+                "Bounding box must be given as (west, south, east, north) with "
+                "west <= east and south <= north"
+            )
+        return super().__new__(cls, west, south, east, north)
+
+
+class StateBatch:
+    """
+    Columns of a batch of States.
+
+    Times are kept as microseconds since the epoch, the other columns as floats with
+    NaN standing for None: latitude and longitude in decimal degrees, elevation in
+    metres, heading and course in degrees and speed in metres per second.
+    """
+
+    float_columns = ("latitude", "longitude", "elevation", "heading", "course", "speed")
+
+    def __init__(self):
+        self.time = array("q")
+        self.sensor_id = list()
+        for name in self.float_columns:
+            setattr(self, name, array("d"))
+
+    def __len__(self):
+        return len(self.time)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.row(row)
+
+    def row(self, row):
+        """Returns a single row of the batch as a :class:`StateRow`"""
+        values = [getattr(self, name)[row] for name in self.float_columns]
+        return StateRow(
+            microseconds_to_datetime(self.time[row]),
+            self.sensor_id[row],
+            *[None if math.isnan(value) else value for value in values],
+        )
+
+    def append_row(self, row):
+        time, sensor_id, latitude, longitude, elevation, heading, course, speed = row
+        self.time.append(datetime_to_microseconds(time))
+        self.sensor_id.append(sensor_id)
+        self.latitude.append(NAN if latitude is None else latitude)
+        self.longitude.append(NAN if longitude is None else longitude)
+        self.elevation.append(NAN if elevation is None else elevation)
+        self.heading.append(NAN if heading is None else math.degrees(heading))
+        self.course.append(NAN if course is None else math.degrees(course))
+        self.speed.append(NAN if speed is None else speed)
+
+    def drop_last(self):
+        """Removes the last row of the batch"""
+        self.time.pop()
+        self.sensor_id.pop()
+        for name in self.float_columns:
+            getattr(self, name).pop()
+
+    def extend(self, other):
+        """Appends all rows of another batch"""
+        self.time.extend(other.time)
+        self.sensor_id.extend(other.sensor_id)
+        for name in self.float_columns:
+            getattr(self, name).extend(getattr(other, name))
+
+    def take(self, indices):
+        """
+        Returns a new batch with the rows at the given indices.
+
+        :param indices: Indices of the rows, in the order of the new batch
+        :type indices: Iterable of Integer
+        :return: New batch
+        :rtype: StateBatch
+        """
+        batch = StateBatch()
+        for name in ("time", "sensor_id") + self.float_columns:
+            column = getattr(self, name)
+            getattr(batch, name).extend(column[index] for index in indices)
+        return batch
+
+    def decimate(self, max_points, method=BUCKET):
+        """
+        Returns a new batch with at most max_points rows of every sensor, see
+        :mod:`pepys_import.core.store.decimation` for the methods.
+
+        :param max_points: Maximum number of rows of a sensor
+        :type max_points: Integer
+        :param method: Decimation method
+        :type method: String
+        :return: New batch, ordered by time
+        :rtype: StateBatch
+        """
+        rows_by_sensor = dict()
+        for row, sensor_id in enumerate(self.sensor_id):
+            rows_by_sensor.setdefault(sensor_id, list()).append(row)
+
+        kept = list()
+        for rows in rows_by_sensor.values():
+            indices = decimate_indices(
+                [self.time[row] for row in rows],
+                [self.longitude[row] for row in rows],
+                [self.latitude[row] for row in rows],
+                max_points,
+                method,
+            )
+            kept.extend(rows[index] for index in indices)
+        return self.take(sorted(kept))
+
+    def to_numpy(self):
+        """
+        Returns the columns as NumPy arrays, with times as ``datetime64[us]``.
+
+        NumPy isn't a dependency of pepys-import, so it has to be installed to use this.
+
+        :return: NumPy arrays keyed by column name
+        :rtype: Dict
+        """
+        import numpy
+
+        columns = {
+            "time": numpy.frombuffer(self.time, dtype=numpy.int64).view(
+                "datetime64[us]"
+            ),
+            "sensor_id": numpy.array(self.sensor_id, dtype=object),
+        }
+        for name in self.float_columns:
+            columns[name] = numpy.frombuffer(getattr(self, name), dtype=numpy.float64)
+        return columns
+
+
+class MeasurementQuery:
+    """
+    Spatial and temporal queries of the measurements of a :class:`DataStore`.
+
+    The results are read with Core queries on a streaming cursor and returned in
+    columnar :class:`StateBatch` objects (or :class:`StateRow` tuples) rather than
+    ORM objects. Bounding boxes use the R*Tree spatial index of SpatiaLite if it
+    exists, and the GiST index of PostGIS through the ``&&`` operator. Time ranges
+    use the index on ``States.time``.
+
+    :param data_store: DataStore whose session is used for the queries
+    :type data_store: DataStore
+    """
+
+    def __init__(self, data_store):
+        self.data_store = data_store
+
+    def states(
+        self,
+        start=None,
+        end=None,
+        bounding_box=None,
+        platform=None,
+        sensor=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        datafile_id=None,
+        max_points=None,
+    ):
+        """
+        Yields the States matching all the given criteria in batches, ordered by time.
+
+        With max_points, the States of every sensor are decimated by time bucketing
+        while they are streamed: the period of the matching States is split into
+        max_points equal buckets and the first State of each sensor in a bucket is
+        kept. Batches may then be smaller than batch_size.
+
+        :param start: Earliest time of the States (inclusive)
+        :type start: datetime
+        :param end: Latest time of the States (inclusive)
+        :type end: datetime
+        :param bounding_box: Area of the States, as (west, south, east, north)
+        :type bounding_box: BoundingBox or tuple
+        :param platform: Name of the platform hosting the sensors of the States
+        :type platform: String
+        :param sensor: Name of the sensor of the States
+        :type sensor: String
+        :param batch_size: Maximum number of States in a batch
+        :type batch_size: Integer
+        :param datafile_id: ID of the Datafile the States were imported from
+        :type datafile_id: Integer or UUID
+        :param max_points: Maximum number of States of a sensor
+        :type max_points: Integer
+        :return: Generator of batches
+        :rtype: Generator of StateBatch
+        """
+        conditions = self.conditions(
+            start, end, bounding_box, platform, sensor, datafile_id
+        )
+        buckets = None
+        if max_points is not None:
+            check_decimation(max_points, BUCKET)
+            buckets = self.time_buckets(conditions, max_points)
+            if buckets is None:
+                return
+
+        query = self.state_query(conditions=conditions)
+        connection = self.data_store.session.connection().execution_options(
+            stream_results=True
+        )
+        result = connection.execute(query)
+        try:
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                batch = StateBatch()
+                for row in rows:
+                    batch.append_row(row)
+                    if buckets is not None and not buckets.keep(
+                        batch.time[-1], key=row[1]
+                    ):
+                        batch.drop_last()
+                if batch:
+                    yield batch
+        finally:
+            result.close()
+
+    def time_buckets(self, conditions, max_points):
+        """
+        Returns the TimeBuckets over the period of the States matching the conditions,
+        or None if there aren't any
+        """
+        states = self.data_store.db_classes.State.__table__
+        query = select([func.min(states.c.time), func.max(states.c.time)])
+        if conditions:
+            query = query.where(and_(*conditions))
+        first, last = self.data_store.session.execute(query).fetchone()
+        if first is None:
+            return None
+        return TimeBuckets(
+            datetime_to_microseconds(first), datetime_to_microseconds(last), max_points
+        )
+
+    def iter_states(self, *args, **kwargs):
+        """
+        Yields the States matching the criteria one at a time, see :meth:`states`.
+
+        :return: Generator of rows
+        :rtype: Generator of StateRow
+        """
+        for batch in self.states(*args, **kwargs):
+            yield from batch
+
+    def track(self, platform, start=None, end=None, max_points=None, method=BUCKET):
+        """
+        Returns all States of the sensors of a platform over a period in one batch.
+
+        With max_points, the track of every sensor is decimated to at most that number
+        of States with the given method, see :mod:`pepys_import.core.store.decimation`.
+
+        :param platform: Name of the platform
+        :type platform: String
+        :param start: Earliest time of the States (inclusive)
+        :type start: datetime
+        :param end: Latest time of the States (inclusive)
+        :type end: datetime
+        :param max_points: Maximum number of States of a sensor
+        :type max_points: Integer
+        :param method: Decimation method
+        :type method: String
+        :return: States of the platform, ordered by time
+        :rtype: StateBatch
+        """
+        check_decimation(max_points, method)
+        track = StateBatch()
+        for batch in self.states(start=start, end=end, platform=platform):
+            track.extend(batch)
+        if max_points is not None:
+            track = track.decimate(max_points, method)
+        return track
+
+    def track_indexes(self, platform_ids, start=None, end=None):
+        """
+        Returns the :class:`TrackIndex` of the States of the sensors of each platform,
+        to interpolate the positions of the platforms over a period.
+
+        Besides the States of the period, the last State before it and the first
+        State after it are read for every platform, so positions can be interpolated
+        up to the ends of the period.
+
+        :param platform_ids: IDs of the platforms
+        :type platform_ids: Iterable of Integer or UUID
+        :param start: Earliest time of the period (inclusive)
+        :type start: datetime
+        :param end: Latest time of the period (inclusive)
+        :type end: datetime
+        :return: Indexes keyed by platform ID, platforms without any located State
+            are left out
+        :rtype: Dict
+        """
+        db_classes = self.data_store.db_classes
+        states = db_classes.State.__table__
+        sensors = db_classes.Sensor.__table__
+        platform_ids = list(platform_ids)
+        if not platform_ids:
+            return dict()
+
+        query = select(
+            [
+                sensors.c.host,
+                states.c.time,
+                func.ST_Y(states.c.location),
+                func.ST_X(states.c.location),
+            ]
+        ).select_from(states.join(sensors, states.c.sensor_id == sensors.c.sensor_id))
+        located = and_(sensors.c.host.in_(platform_ids), states.c.location.isnot(None))
+        conditions = [located]
+        if start is not None:
+            conditions.append(states.c.time >= start)
+        if end is not None:
+            conditions.append(states.c.time <= end)
+
+        tracks = dict()
+        queries = [query.where(and_(*conditions)).order_by(states.c.time)]
+        for platform_id in platform_ids:
+            of_platform = and_(
+                sensors.c.host == platform_id, states.c.location.isnot(None)
+            )
+            if start is not None:
+                queries.append(
+                    query.where(and_(of_platform, states.c.time < start))
+                    .order_by(states.c.time.desc())
+                    .limit(1)
+                )
+            if end is not None:
+                queries.append(
+                    query.where(and_(of_platform, states.c.time > end))
+                    .order_by(states.c.time)
+                    .limit(1)
+                )
+        for query in queries:
+            for host, time, latitude, longitude in self.data_store.session.execute(
+                query
+            ):
+                if host not in tracks:
+                    tracks[host] = (array("q"), array("d"), array("d"))
+                times, latitudes, longitudes = tracks[host]
+                times.append(datetime_to_microseconds(time))
+                latitudes.append(NAN if latitude is None else latitude)
+                longitudes.append(NAN if longitude is None else longitude)
+
+        # the index sorts the States read by the separate queries
+        indexes = {
+            platform_id: TrackIndex(*columns) for platform_id, columns in tracks.items()
+        }
+        return {platform_id: index for platform_id, index in indexes.items() if index}
+
+    def decimated_state_ids(self, max_points, method=BUCKET, **criteria):
+        """
+        Returns the IDs of the States kept by decimating the track of every sensor.
+
+        Only the IDs, times and locations of the States are read, so the States can
+        then be loaded as ORM objects without loading the whole tracks.
+
+        :param max_points: Maximum number of States of a sensor
+        :type max_points: Integer
+        :param method: Decimation method
+        :type method: String
+        :param criteria: Criteria of the States, as the keyword arguments of
+            :meth:`states`
+        :return: IDs of the States
+        :rtype: List
+        """
+        check_decimation(max_points, method)
+        states = self.data_store.db_classes.State.__table__
+        location = states.c.location
+        query = select(
+            [
+                states.c.state_id,
+                states.c.sensor_id,
+                states.c.time,
+                func.ST_X(location),
+                func.ST_Y(location),
+            ]
+        )
+        conditions = self.conditions(**criteria)
+        if conditions:
+            query = query.where(and_(*conditions))
+        query = query.order_by(states.c.time)
+
+        tracks = dict()
+        for (
+            state_id,
+            sensor_id,
+            time,
+            longitude,
+            latitude,
+        ) in self.data_store.session.execute(query):
+            if sensor_id not in tracks:
+                tracks[sensor_id] = (list(), array("q"), array("d"), array("d"))
+            state_ids, times, longitudes, latitudes = tracks[sensor_id]
+            state_ids.append(state_id)
+            times.append(datetime_to_microseconds(time))
+            longitudes.append(NAN if longitude is None else longitude)
+            latitudes.append(NAN if latitude is None else latitude)
+
+        kept = list()
+        for state_ids, times, longitudes, latitudes in tracks.values():
+            indices = decimate_indices(times, longitudes, latitudes, max_points, method)
+            kept.extend(state_ids[index] for index in indices)
+        return kept
+
+    def state_query(
+        self,
+        start=None,
+        end=None,
+        bounding_box=None,
+        platform=None,
+        sensor=None,
+        datafile_id=None,
+        conditions=None,
+    ):
+        """Builds the query of :meth:`states`"""
+        states = self.data_store.db_classes.State.__table__
+        location = states.c.location
+        query = select(
+            [
+                states.c.time,
+                states.c.sensor_id,
+                func.ST_Y(location),
+                func.ST_X(location),
+                states.c.elevation,
+                states.c.heading,
+                states.c.course,
+                states.c.speed,
+            ]
+        )
+        if conditions is None:
+            conditions = self.conditions(
+                start, end, bounding_box, platform, sensor, datafile_id
+            )
+        if conditions:
+            query = query.where(and_(*conditions))
+        return query.order_by(states.c.time)
+
+    def conditions(
+        self,
+        start=None,
+        end=None,
+        bounding_box=None,
+        platform=None,
+        sensor=None,
+        datafile_id=None,
+    ):
+        """Returns the conditions on the States for the criteria of :meth:`states`"""
+        db_classes = self.data_store.db_classes
+        states = db_classes.State.__table__
+        conditions = list()
+        if start is not None:
+            conditions.append(states.c.time >= start)
+        if end is not None:
+            conditions.append(states.c.time <= end)
+        if bounding_box is not None:
+            conditions.append(self.bounding_box_condition(BoundingBox(*bounding_box)))
+        if platform is not None or sensor is not None:
+            sensors = db_classes.Sensor.__table__
+            sensor_query = select([sensors.c.sensor_id])
+            if sensor is not None:
+                sensor_query = sensor_query.where(sensors.c.name == sensor)
+            if platform is not None:
+                platforms = db_classes.Platform.__table__
+                sensor_query = sensor_query.where(
+                    sensors.c.host.in_(
+                        select([platforms.c.platform_id]).where(
+                            platforms.c.name == platform
+                        )
+                    )
+                )
+            conditions.append(states.c.sensor_id.in_(sensor_query))
+        if datafile_id is not None:
+            conditions.append(states.c.source_id == datafile_id)
+        return conditions
+
+    def bounding_box_condition(self, bounding_box):
+        states = self.data_store.db_classes.State.__table__
+        location = states.c.location
+        west, south, east, north = bounding_box
+        if self.data_store.db_type == "postgres":
+            # && compares the bounding boxes of the geometries with the GiST index,
+            # which is exact for points
+            envelope = func.ST_MakeEnvelope(west, south, east, north, 4326)
+            return location.op("&&")(envelope)
+
+        in_box = and_(
+            func.ST_X(location) >= west,
+            func.ST_X(location) <= east,
+            func.ST_Y(location) >= south,
+            func.ST_Y(location) <= north,
+        )
+        index_name = f"idx_{states.name}_{location.name}"
+        if not self.has_spatial_index(index_name):
+            return in_box
+        # The R*Tree of SpatiaLite finds the candidates, keyed by the ROWID of the
+        # States, which is their state_id
+        candidates = text(
+            f'SELECT pkid FROM "{index_name}" WHERE xmin <= :east AND xmax >= :west '
+            "AND ymin <= :north AND ymax >= :south"
+        ).bindparams(west=west, south=south, east=east, north=north)
+        return and_(states.c.state_id.in_(candidates), in_box)
+
+    def has_spatial_index(self, index_name):
+        """Returns True if the R*Tree of the spatial index exists on SQLite"""
+        return (
+            self.data_store.session.execute(
+                text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+                ),
+                {"name": index_name},
+            ).scalar()
+            is not None
+        )
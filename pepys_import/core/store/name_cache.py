@@ -0,0 +1,244 @@
+from collections import OrderedDict
+
+from sqlalchemy import select, union
+
+DEFAULT_MAX_SIZE = 10000
+
+
+class LRUCache:
+    """
+    Dictionary holding at most max_size items, dropping the least recently used
+    item to make room for a new one.
+
+    :param max_size: Maximum number of items
+    :type max_size: Integer
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self.items = OrderedDict()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def get(self, key):
+        """Returns the item of the key, or None if it isn't cached"""
+        if key not in self.items:
+            return None
+        self.items.move_to_end(key)
+        return self.items[key]
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    def pop(self, key):
+        self.items.pop(key, None)
+
+    def remove_values(self, predicate):
+        """Removes the items whose value matches the predicate"""
+        for key in [key for key, value in self.items.items() if predicate(value)]:
+            del self.items[key]
+
+    def clear(self):
+        self.items.clear()
+
+
+class NameCache:
+    """
+    Names of the sensors, platforms and comment types of a :class:`DataStore`,
+    keyed by their IDs, for writing measurements out.
+
+    The names of all sensors and platforms referenced by a Datafile can be loaded in
+    one joined query with :meth:`preload_datafile`, other names are loaded one at a
+    time when they are first needed. Every cache is bounded and drops the least
+    recently used names. The names of platforms and sensors changed or deleted in a
+    session of the DataStore are dropped when the session is flushed, see
+    :meth:`after_flush`, and :meth:`invalidate_platform` and
+    :meth:`invalidate_sensor` drop names changed by other means.
+
+    :param data_store: DataStore whose session is used for the queries
+    :type data_store: DataStore
+    :param max_size: Maximum number of names in every cache
+    :type max_size: Integer
+    """
+
+    def __init__(self, data_store, max_size=DEFAULT_MAX_SIZE):
+        self.data_store = data_store
+        # (sensor name, platform ID) keyed by sensor ID
+        self.sensors = LRUCache(max_size)
+        self.platforms = LRUCache(max_size)
+        self.comment_types = LRUCache(max_size)
+
+    def clear(self):
+        self.sensors.clear()
+        self.platforms.clear()
+        self.comment_types.clear()
+
+    def sensor_names(self, sensor_id):
+        """
+        Returns the names of a sensor and of the platform hosting it.
+
+        :param sensor_id: ID of the Sensor
+        :type sensor_id: Integer or UUID
+        :return: Sensor name and platform name
+        :rtype: Tuple
+        """
+        cached = self.sensor(sensor_id)
+        if cached is None:
+            raise Exception("No sensor found with sensor id: {}".format(sensor_id))
+        sensor_name, platform_id = cached
+        return sensor_name, self.platform_name(platform_id)
+
+    def sensor_host(self, sensor_id):
+        """
+        Returns the ID of the platform hosting a sensor.
+
+        :param sensor_id: ID of the Sensor
+        :type sensor_id: Integer or UUID
+        :return: ID of the Platform, or None if there is no such sensor
+        :rtype: Integer or UUID
+        """
+        cached = self.sensor(sensor_id)
+        return None if cached is None else cached[1]
+
+    def sensor(self, sensor_id):
+        """Returns the (name, platform ID) of a sensor, or None if there is no such
+        sensor"""
+        cached = self.sensors.get(sensor_id)
+        if cached is None:
+            sensors = self.data_store.db_classes.Sensor.__table__
+            self.load_sensors(sensors.c.sensor_id == sensor_id)
+            cached = self.sensors.get(sensor_id)
+        return cached
+
+    def platform_name(self, platform_id):
+        """
+        Returns the name of a platform.
+
+        :param platform_id: ID of the Platform
+        :type platform_id: Integer or UUID
+        :return: Name of the platform
+        :rtype: String
+        """
+        if platform_id not in self.platforms:
+            Platform = self.data_store.db_classes.Platform
+            platform = (
+                self.data_store.session.query(Platform.name)
+                .filter(Platform.platform_id == platform_id)
+                .first()
+            )
+            if platform is None:
+                raise Exception(
+                    "No Platform found with platform id: {}".format(platform_id)
+                )
+            self.platforms.put(platform_id, platform.name)
+        return self.platforms.get(platform_id)
+
+    def comment_type_name(self, comment_type_id):
+        """
+        Returns the name of a comment type.
+
+        :param comment_type_id: ID of the CommentType
+        :type comment_type_id: Integer or UUID
+        :return: Name of the comment type
+        :rtype: String
+        """
+        if comment_type_id not in self.comment_types:
+            CommentType = self.data_store.db_classes.CommentType
+            comment_type = (
+                self.data_store.session.query(CommentType.name)
+                .filter(CommentType.comment_type_id == comment_type_id)
+                .first()
+            )
+            if comment_type is None:
+                raise Exception(
+                    "No Comment Type found with Comment type id: {}".format(
+                        comment_type_id
+                    )
+                )
+            self.comment_types.put(comment_type_id, comment_type.name)
+        return self.comment_types.get(comment_type_id)
+
+    def preload_datafile(self, datafile_id):
+        """
+        Loads the names of the sensors of the States and Contacts of a Datafile, and
+        of the platforms hosting them or having its Comments.
+
+        :param datafile_id: ID of the Datafile
+        :type datafile_id: Integer or UUID
+        """
+        db_classes = self.data_store.db_classes
+        states = db_classes.State.__table__
+        contacts = db_classes.Contact.__table__
+        comments = db_classes.Comment.__table__
+        sensors = db_classes.Sensor.__table__
+        platforms = db_classes.Platform.__table__
+
+        sensor_ids = union(
+            select([states.c.sensor_id]).where(states.c.source_id == datafile_id),
+            select([contacts.c.sensor_id]).where(contacts.c.source_id == datafile_id),
+        )
+        self.load_sensors(sensors.c.sensor_id.in_(sensor_ids))
+
+        query = select([platforms.c.platform_id, platforms.c.name]).where(
+            platforms.c.platform_id.in_(
+                select([comments.c.platform_id]).where(
+                    comments.c.source_id == datafile_id
+                )
+            )
+        )
+        for platform_id, name in self.data_store.session.execute(query):
+            self.platforms.put(platform_id, name)
+
+    def load_sensors(self, condition):
+        """Loads the names of the sensors matching the condition and their platforms"""
+        db_classes = self.data_store.db_classes
+        sensors = db_classes.Sensor.__table__
+        platforms = db_classes.Platform.__table__
+        query = (
+            select(
+                [
+                    sensors.c.sensor_id,
+                    sensors.c.name,
+                    sensors.c.host,
+                    platforms.c.platform_id,
+                    platforms.c.name,
+                ]
+            )
+            .select_from(
+                sensors.outerjoin(platforms, sensors.c.host == platforms.c.platform_id)
+            )
+            .where(condition)
+        )
+        for row in self.data_store.session.execute(query):
+            sensor_id, sensor_name, host, platform_id, platform_name = row
+            self.sensors.put(sensor_id, (sensor_name, host))
+            if platform_id is not None:
+                self.platforms.put(platform_id, platform_name)
+
+    def invalidate_platform(self, platform_id):
+        """Drops the name of a platform and of the sensors it hosts"""
+        self.platforms.pop(platform_id)
+        self.sensors.remove_values(lambda value: value[1] == platform_id)
+
+    def invalidate_sensor(self, sensor_id):
+        """Drops the name of a sensor"""
+        self.sensors.pop(sensor_id)
+
+    def after_flush(self, session, flush_context):
+        """
+        Drops the names of the platforms and sensors flushed by a session, to be
+        registered as the ``after_flush`` event of the sessions of the DataStore
+        """
+        db_classes = self.data_store.db_classes
+        for instance in list(session.dirty) + list(session.deleted):
+            if isinstance(instance, db_classes.Platform):
+                self.invalidate_platform(instance.platform_id)
+            elif isinstance(instance, db_classes.Sensor):
+                self.invalidate_sensor(instance.sensor_id)
@@ -1,6 +1,15 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Boolean, DATE, ForeignKey, DateTime
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    Integer,
+    String,
+    Boolean,
+    DATE,
+    ForeignKey,
+    DateTime,
+)
 from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP, DOUBLE_PRECISION
 from sqlalchemy.orm import relationship
 
@@ -206,11 +215,26 @@ class Log(BasePostGIS):
     field = Column(String(150))
     new_value = Column(String(150))
     change_id = Column(
-        UUID(as_uuid=True), ForeignKey("pepys.Changes.change_id"), nullable=False
+        UUID(as_uuid=True),
+        ForeignKey("pepys.Changes.change_id"),
+        nullable=False,
+        index=True,
     )
     created_date = Column(DateTime, default=datetime.utcnow)
 
 
+class TableCounter(BasePostGIS):
+    __tablename__ = constants.TABLE_COUNTER
+    table_type = TableTypes.METADATA
+    table_type_id = 35
+    __table_args__ = {"schema": "pepys"}
+
+    table = Column(String(150), primary_key=True)
+    row_count = Column(BigInteger, nullable=False)
+    last_created = Column(DateTime)
+    created_date = Column(DateTime, default=datetime.utcnow)
+
+
 class Extraction(BasePostGIS):
     __tablename__ = constants.EXTRACTION
     table_type = TableTypes.METADATA
@@ -434,7 +458,7 @@ class State(BasePostGIS, StateMixin, ElevationPropertyMixin, LocationPropertyMix
     __table_args__ = {"schema": "pepys"}
 
     state_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    time = Column(TIMESTAMP, nullable=False)
+    time = Column(TIMESTAMP, nullable=False, index=True)
     sensor_id = Column(
         UUID(as_uuid=True), ForeignKey("pepys.Sensors.sensor_id"), nullable=False
     )
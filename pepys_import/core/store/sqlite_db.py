@@ -152,7 +152,18 @@ class Log(BaseSpatiaLite):
     id = Column(Integer, nullable=False)
     field = Column(String(150))
     new_value = Column(String(150))
-    change_id = Column(Integer, nullable=False)
+    change_id = Column(Integer, nullable=False, index=True)
+    created_date = Column(DateTime, default=datetime.utcnow)
+
+
+class TableCounter(BaseSpatiaLite):
+    __tablename__ = constants.TABLE_COUNTER
+    table_type = TableTypes.METADATA
+    table_type_id = 35
+
+    table = Column(String(150), primary_key=True)
+    row_count = Column(Integer, nullable=False)
+    last_created = Column(DateTime)
     created_date = Column(DateTime, default=datetime.utcnow)
 
 
@@ -357,7 +368,7 @@ class State(BaseSpatiaLite, StateMixin, ElevationPropertyMixin, LocationProperty
     table_type_id = 28
 
     state_id = Column(Integer, primary_key=True)
-    time = Column(TIMESTAMP, nullable=False)
+    time = Column(TIMESTAMP, nullable=False, index=True)
     sensor_id = Column(Integer, nullable=False)
     _location = Column(
         "location", Geometry(geometry_type="POINT", srid=4326, management=True)
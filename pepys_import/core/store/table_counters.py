@@ -0,0 +1,193 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import bindparam, exists, select
+from sqlalchemy.sql import text
+
+from pepys_import.core.store import constants
+
+
+class TableCounters:
+    """
+    Maintains the number of rows of each table in the TableCounters table.
+
+    The counters are incremented in the same transaction as the rows they count, from
+    the Log rows written for every new entity, so reading the status of the database
+    doesn't have to count the rows of the (possibly huge) tables. Counters only exist
+    for tables whose number of rows is known exactly: they are created for empty
+    tables when the database is initialised, and refreshed whenever the rows are
+    counted exactly (see :meth:`DataStore.get_status`). Rows written to the database
+    without going through the :class:`DataStore` are not counted until the next
+    exact count.
+
+    :param data_store: DataStore whose session is used to update the counters
+    :type data_store: DataStore
+    """
+
+    def __init__(self, data_store):
+        self.data_store = data_store
+
+    @property
+    def table(self):
+        return self.data_store.db_classes.TableCounter.__table__
+
+    def counted_tables(self):
+        """Returns the mapped classes of all tables which have a counter"""
+        return [
+            cls
+            for classes in self.data_store.meta_classes.values()
+            for cls in classes
+            if cls.__tablename__ != constants.TABLE_COUNTER
+        ]
+
+    def seed(self, connection):
+        """
+        Creates a zero counter for every empty table which doesn't have a counter yet.
+
+        :param connection: Connection to the database
+        :type connection: SQLAlchemy Connection
+        """
+        counted = {row[0] for row in connection.execute(select([self.table.c.table]))}
+        new_counters = list()
+        for cls in self.counted_tables():
+            name = cls.__tablename__
+            if name in counted:
+                continue
+            if not connection.execute(
+                select([exists().select_from(cls.__table__)])
+            ).scalar():
+                new_counters.append(
+                    {"table": name, "row_count": 0, "last_created": None}
+                )
+        if new_counters:
+            connection.execute(self.table.insert(), new_counters)
+
+    def increment(self, counts, created_date=None):
+        """
+        Adds the numbers of new rows to the counters of their tables.
+
+        :param counts: Numbers of new rows keyed by table name
+        :type counts: Dict
+        :param created_date: Creation date of the new rows, defaults to now
+        :type created_date: datetime
+        """
+        if created_date is None:
+            created_date = datetime.utcnow()
+        rows = [
+            {"name": name, "count": count, "created": created_date}
+            for name, count in counts.items()
+            if count
+        ]
+        if not rows:
+            return
+        update = (
+            self.table.update()
+            .where(self.table.c.table == bindparam("name"))
+            .values(
+                row_count=self.table.c.row_count + bindparam("count"),
+                last_created=bindparam("created"),
+            )
+        )
+        self.data_store.session.execute(update, rows)
+
+    def count_logs(self, log_rows):
+        """
+        Increments the counters for a batch of Log rows: every Log row without a field
+        records the creation of an entity, and each of them is a new row of Logs too.
+
+        :param log_rows: Values of the Log rows
+        :type log_rows: List of Dicts
+        """
+        counts = Counter(row["table"] for row in log_rows if row["field"] is None)
+        counts[constants.LOG] += len(log_rows)
+        self.increment(counts)
+
+    def read(self):
+        """
+        Returns the counters of all tables which have one.
+
+        :return: Number of rows and last creation date keyed by table name
+        :rtype: Dict
+        """
+        rows = self.data_store.session.execute(
+            select(
+                [self.table.c.table, self.table.c.row_count, self.table.c.last_created]
+            )
+        )
+        return {
+            name: (row_count, last_created) for name, row_count, last_created in rows
+        }
+
+    def store(self, table_summaries):
+        """
+        Replaces the counters of the tables with the exact numbers of rows.
+
+        :param table_summaries: Exact summaries of the tables
+        :type table_summaries: List of TableSummary
+        """
+        names = [summary.table_name for summary in table_summaries]
+        self.data_store.session.execute(
+            self.table.delete().where(self.table.c.table.in_(names))
+        )
+        rows = list()
+        for summary in table_summaries:
+            if summary.table_name == constants.TABLE_COUNTER:
+                continue
+            rows.append(
+                {
+                    "table": summary.table_name,
+                    "row_count": summary.number_of_rows,
+                    "last_created": summary.last_created_date,
+                }
+            )
+        if rows:
+            self.data_store.session.execute(self.table.insert(), rows)
+
+    def reset(self):
+        """Sets the counters of all tables to zero, e.g. after clearing the database"""
+        self.data_store.session.execute(self.table.delete())
+        self.data_store.session.execute(
+            self.table.insert(),
+            [
+                {"table": cls.__tablename__, "row_count": 0, "last_created": None}
+                for cls in self.counted_tables()
+            ],
+        )
+
+
+def estimate_row_counts(data_store):
+    """
+    Reads the estimated numbers of rows of the tables from the statistics of the
+    database: ``pg_stat_user_tables`` (or ``pg_class.reltuples`` if the table hasn't
+    been analysed yet) on PostgreSQL and ``sqlite_stat1`` on SQLite, which only has
+    entries after ``ANALYZE`` has been run.
+
+    :param data_store: A :class:`DataStore` object
+    :type data_store: DataStore
+    :return: Estimated number of rows keyed by table name
+    :rtype: Dict
+    """
+    session = data_store.session
+    if data_store.db_type == "postgres":
+        rows = session.execute(text("""
+                SELECT c.relname, GREATEST(COALESCE(s.n_live_tup, 0), c.reltuples)
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+                WHERE n.nspname = 'pepys' AND c.relkind = 'r'
+                """))
+        return {name: int(count) for name, count in rows}
+
+    has_statistics = session.execute(
+        text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        )
+    ).scalar()
+    if not has_statistics:
+        return dict()
+    estimates = dict()
+    for name, stat in session.execute(text("SELECT tbl, stat FROM sqlite_stat1")):
+        # The first number of stat is the number of rows, the same for every index
+        if stat:
+            estimates[name] = int(stat.split()[0])
+    return estimates
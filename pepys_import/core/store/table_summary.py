@@ -1,3 +1,4 @@
+from sqlalchemy import func
 from tabulate import tabulate
 
 
@@ -6,32 +7,52 @@ class TableSummary(object):
     A summary of the contents of a table, which sends query to DB and finds
     number of rows and creation date of last item added.
 
+    If the number of rows is given, e.g. from the counters of the tables, the table
+    isn't queried at all.
+
     :param session: Bounded session for querying table
     :type session: SQLAlchemy Session
     :param table: SQLAlchemy Table object
     :type table_name: SQLAlchemy Declarative Base
+    :param number_of_rows: Known number of rows of the table
+    :type number_of_rows: Integer
+    :param last_created_date: Known creation date of the last item added
+    :type last_created_date: datetime
+    :param estimated: True if the number of rows is only an estimate
+    :type estimated: Boolean
     """
 
-    def __init__(self, session, table):
+    def __init__(
+        self,
+        session,
+        table,
+        number_of_rows=None,
+        last_created_date=None,
+        estimated=False,
+    ):
         self.session = session
         self.table = table
         self.table_name = self.table.__tablename__
-        self.number_of_rows = None
-        self.created_date = None
-        self.table_summary()
+        self.number_of_rows = number_of_rows
+        self.last_created_date = last_created_date
+        self.estimated = estimated
+        if number_of_rows is None:
+            self.table_summary()
+
+    @property
+    def created_date(self):
+        if self.last_created_date:
+            return str(self.last_created_date)
+        return "-"
 
     def table_summary(self):
-        number_of_rows = self.session.query(self.table).count()
-        last_row = (
-            self.session.query(self.table)
-            .order_by(self.table.created_date.desc())
-            .first()
+        number_of_rows, last_created_date = (
+            self.session.query(func.count(), func.max(self.table.created_date))
+            .select_from(self.table)
+            .one()
         )
-        created_date = "-"
-        if last_row:
-            created_date = str(last_row.created_date)
         self.number_of_rows = number_of_rows
-        self.created_date = created_date
+        self.last_created_date = last_created_date
 
 
 def table_delta(first_summary, second_summary):
@@ -66,7 +87,13 @@ class TableSummarySet(object):
             res += title + "\n"
         res += tabulate(
             [
-                (table.table_name, table.number_of_rows, table.created_date)
+                (
+                    table.table_name,
+                    f"~{table.number_of_rows}"
+                    if table.estimated
+                    else table.number_of_rows,
+                    table.created_date,
+                )
                 for table in self.table_summaries
             ],
             headers=self.headers,
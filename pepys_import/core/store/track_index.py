@@ -0,0 +1,116 @@
+"""
+Positions of platforms between their States, to locate measurements which don't have
+a location of their own (e.g. Contacts whose sensor position is NULL) from the track
+of the platform hosting their sensor, without a query per measurement.
+
+A :class:`TrackIndex` keeps the times and positions of a track in sorted arrays, and
+the position at any time within the track is interpolated linearly between the two
+States around it, found by binary search. Times outside the track have no position.
+"""
+
+import math
+from array import array
+from bisect import bisect_left
+
+from pepys_import.core.store.measurement_buffer import NAN, datetime_to_microseconds
+
+
+class TrackIndex:
+    """
+    Times and positions of the States of a track, sorted by time.
+
+    :param times: Times of the States, in microseconds since the epoch
+    :type times: Sequence of Integer
+    :param latitudes: Latitudes of the States, in decimal degrees
+    :type latitudes: Sequence of Float
+    :param longitudes: Longitudes of the States, in decimal degrees
+    :type longitudes: Sequence of Float
+    """
+
+    def __init__(self, times=(), latitudes=(), longitudes=()):
+        if not len(times) == len(latitudes) == len(longitudes):
+            raise ValueError("Times, latitudes and longitudes must have equal lengths")
+        # States without a location can't be interpolated between
+        rows = [
+            row
+            for row in zip(times, latitudes, longitudes)
+            if not (math.isnan(row[1]) or math.isnan(row[2]))
+        ]
+        if any(rows[i][0] > rows[i + 1][0] for i in range(len(rows) - 1)):
+            rows.sort(key=lambda row: row[0])
+        self.times = array("q", [row[0] for row in rows])
+        self.latitudes = array("d", [row[1] for row in rows])
+        self.longitudes = array("d", [row[2] for row in rows])
+
+    @classmethod
+    def from_batch(cls, batch):
+        """Returns the index of the States of a :class:`StateBatch`"""
+        return cls(batch.time, batch.latitude, batch.longitude)
+
+    def __len__(self):
+        return len(self.times)
+
+    def position_at(self, time):
+        """
+        Returns the position of the track at a time.
+
+        :param time: Time, in microseconds since the epoch or as a datetime
+        :type time: Integer or datetime
+        :return: (latitude, longitude) in decimal degrees, or None if the time is
+            outside the track
+        :rtype: Tuple
+        """
+        if not isinstance(time, int):
+            time = datetime_to_microseconds(time)
+        return self.interpolate(bisect_left(self.times, time), time)
+
+    def positions_at(self, times):
+        """
+        Returns the positions of the track at many times. While the times are
+        increasing, each search starts from the State found for the previous time.
+
+        :param times: Times, in microseconds since the epoch
+        :type times: Sequence of Integer
+        :return: Latitudes and longitudes, NaN for the times outside the track
+        :rtype: Tuple of array
+        """
+        latitudes = array("d", bytes(8 * len(times)))
+        longitudes = array("d", bytes(8 * len(times)))
+        track_times = self.times
+        index = 0
+        previous = None
+        for row, time in enumerate(times):
+            if previous is None or time < previous:
+                index = 0
+            index = bisect_left(track_times, time, index)
+            previous = time
+            position = self.interpolate(index, time)
+            if position is None:
+                latitudes[row] = longitudes[row] = NAN
+            else:
+                latitudes[row], longitudes[row] = position
+        return latitudes, longitudes
+
+    def interpolate(self, index, time):
+        """
+        Returns the position at a time, given the index of the first State at or after
+        it, or None if the time is outside the track
+        """
+        times = self.times
+        if index == len(times):
+            return None
+        if times[index] == time:
+            return self.latitudes[index], self.longitudes[index]
+        if index == 0:
+            return None
+        before = index - 1
+        fraction = (time - times[before]) / (times[index] - times[before])
+        latitude = self.latitudes[before]
+        longitude = self.longitudes[before]
+        # take the shorter way round when the track crosses the antimeridian
+        longitude_change = (self.longitudes[index] - longitude + 180) % 360 - 180
+        longitude = (longitude + fraction * longitude_change + 180) % 360 - 180
+        return (
+            latitude + fraction * (self.latitudes[index] - latitude),
+            longitude,
+        )
@@ -1,4 +1,3 @@
-import inspect
 import importlib.util
 import json
 import os
@@ -9,21 +8,25 @@ from datetime import datetime
 from getpass import getuser
 from stat import S_IREAD
 
+from tqdm import tqdm
+
 from paths import IMPORTERS_DIRECTORY
 from config import ARCHIVE_PATH, LOCAL_PARSERS
 from pepys_import.core.store.data_store import DataStore
-from pepys_import.core.store.table_summary import TableSummary, TableSummarySet
+from pepys_import.core.store.table_summary import TableSummarySet
 from pepys_import.file.highlighter.highlighter import HighlightedFile
-from pepys_import.file.importer import Importer
-from pepys_import.utils.datafile_utils import hash_file
-from pepys_import.utils.import_utils import import_module_
+from pepys_import.file.highlighter.support.line_reader import LineReader
+from pepys_import.file.importer_registry import ImporterRegistry
+from pepys_import.resolvers.batch_resolver import BatchResolver
+from pepys_import.utils.datafile_utils import hash_file, hash_files
 
 USER = getuser()
 
 
 class FileProcessor:
-    def __init__(self, filename=None, archive=False):
-        self.importers = []
+    def __init__(self, filename=None, archive=False, chunk_size=None):
+        # Registered importers and registries of directories of importers, in order
+        self.importer_sources = []
         # Register local importers if any exists
         if LOCAL_PARSERS:
             if not os.path.exists(LOCAL_PARSERS):
@@ -48,9 +51,16 @@ class FileProcessor:
                 os.makedirs(ARCHIVE_PATH)
             self.output_path = ARCHIVE_PATH
         self.archive = archive
+        # If given, importers stage their measurements every chunk_size rows
+        self.chunk_size = chunk_size
 
     def process(
-        self, path: str, data_store: DataStore = None, descend_tree: bool = True
+        self,
+        path: str,
+        data_store: DataStore = None,
+        descend_tree: bool = True,
+        full_summaries: bool = False,
+        prescan: bool = False,
     ):
         """Process the data in the given path
 
@@ -60,6 +70,12 @@ class FileProcessor:
         :type data_store: DataStore
         :param descend_tree: Whether to recursively descend through the folder tree
         :type descend_tree: bool
+        :param full_summaries: Whether to report the number of rows of the tables
+            before and after the import, not only the rows added by it
+        :type full_summaries: bool
+        :param prescan: Whether to resolve the datafiles and platforms of all the
+            files before loading any of them, see :meth:`prescan`
+        :type prescan: bool
         """
         dir_path = os.path.dirname(path)
         # create output folder if not exists
@@ -101,49 +117,69 @@ class FileProcessor:
             data_store = DataStore("", "", "", 0, self.filename, db_type="sqlite")
             data_store.initialise()
 
+        # tables reported before and after the import
+        summary_tables = [
+            data_store.db_classes.State,
+            data_store.db_classes.Contact,
+            data_store.db_classes.Comment,
+            data_store.db_classes.Platform,
+        ]
+        # IDs of the changes made by this run, see process_file
+        self.change_ids = list()
+        # (size, hash) of the files checked by drop_loaded_files, keyed by path, and
+        # references of the datafiles loaded before, keyed by (size, hash)
+        self.file_keys = dict()
+        self.loaded_files = dict()
+
+        if full_summaries:
+            first_table_summary_set = TableSummarySet(
+                data_store.count_tables_concurrently(summary_tables)
+            )
+            print(first_table_summary_set.report("==Before=="))
+
+        if prescan:
+            # answers given while resolving the files are given again while loading
+            resolver = data_store.missing_data_resolver
+            if not isinstance(resolver, BatchResolver):
+                data_store.missing_data_resolver = BatchResolver(resolver)
+        try:
+            processed_ctr = self.process_path(
+                path, data_store, descend_tree, processed_ctr, summary_tables, prescan
+            )
+        finally:
+            if prescan:
+                data_store.missing_data_resolver = resolver
+
+        if full_summaries:
+            second_table_summary_set = TableSummarySet(
+                data_store.count_tables_concurrently(summary_tables)
+            )
+            print(second_table_summary_set.report("==After=="))
+
+        print(f"Files got processed: {processed_ctr} times")
+
+    def process_path(
+        self, path, data_store, descend_tree, processed_ctr, summary_tables, prescan
+    ):
+        """Processes the file, or the files of the folder, of the path in a session
+
+        :return: Number of times files were processed by an importer
+        :rtype: Integer
+        """
         # check given path is a file
         if os.path.isfile(path):
             with data_store.session_scope():
-                states_sum = TableSummary(
-                    data_store.session, data_store.db_classes.State
-                )
-                contacts_sum = TableSummary(
-                    data_store.session, data_store.db_classes.Contact
-                )
-                comments_sum = TableSummary(
-                    data_store.session, data_store.db_classes.Comment
-                )
-                platforms_sum = TableSummary(
-                    data_store.session, data_store.db_classes.Platform
-                )
-                first_table_summary_set = TableSummarySet(
-                    [states_sum, contacts_sum, comments_sum, platforms_sum]
-                )
-                print(first_table_summary_set.report("==Before=="))
-
                 filename = os.path.abspath(path)
-                current_path = os.path.dirname(path)
-                processed_ctr = self.process_file(
-                    filename, current_path, data_store, processed_ctr
-                )
-                states_sum = TableSummary(
-                    data_store.session, data_store.db_classes.State
-                )
-                contacts_sum = TableSummary(
-                    data_store.session, data_store.db_classes.Contact
-                )
-                comments_sum = TableSummary(
-                    data_store.session, data_store.db_classes.Comment
-                )
-                platforms_sum = TableSummary(
-                    data_store.session, data_store.db_classes.Platform
-                )
-                second_table_summary_set = TableSummarySet(
-                    [states_sum, contacts_sum, comments_sum, platforms_sum]
-                )
-                print(second_table_summary_set.report("==After=="))
-            print(f"Files got processed: {processed_ctr} times")
-            return
+                current_path = os.path.dirname(filename)
+                files = self.drop_loaded_files([(filename, current_path)], data_store)
+                if prescan:
+                    self.prescan(files, data_store)
+                for file, current_path in files:
+                    processed_ctr = self.process_file(
+                        file, current_path, data_store, processed_ctr
+                    )
+                self.report_imported_rows(data_store, summary_tables)
+            return processed_ctr
 
         # check folder exists
         if not os.path.isdir(path):
@@ -152,71 +188,86 @@ class FileProcessor:
         # decide whether to descend tree, or just work on this folder
         with data_store.session_scope():
 
-            states_sum = TableSummary(data_store.session, data_store.db_classes.State)
-            contacts_sum = TableSummary(
-                data_store.session, data_store.db_classes.Contact
-            )
-            comments_sum = TableSummary(
-                data_store.session, data_store.db_classes.Comment
-            )
-            platforms_sum = TableSummary(
-                data_store.session, data_store.db_classes.Platform
-            )
-            first_table_summary_set = TableSummarySet(
-                [states_sum, contacts_sum, comments_sum, platforms_sum]
-            )
-            print(first_table_summary_set.report("==Before=="))
-
             # capture path in absolute form
             abs_path = os.path.abspath(path)
+            files = list()
             if descend_tree:
                 # loop through this folder and children
-                for current_path, folders, files in os.walk(abs_path):
-                    for file in files:
-                        processed_ctr = self.process_file(
-                            file, current_path, data_store, processed_ctr
-                        )
+                for current_path, folders, filenames in os.walk(abs_path):
+                    for file in filenames:
+                        files.append((file, current_path))
             else:
                 # loop through this path
                 for file in os.scandir(abs_path):
                     if file.is_file():
-                        processed_ctr = self.process_file(
-                            file, abs_path, data_store, processed_ctr
-                        )
+                        files.append((file, abs_path))
 
-            states_sum = TableSummary(data_store.session, data_store.db_classes.State)
-            contacts_sum = TableSummary(
-                data_store.session, data_store.db_classes.Contact
-            )
-            comments_sum = TableSummary(
-                data_store.session, data_store.db_classes.Comment
-            )
-            platforms_sum = TableSummary(
-                data_store.session, data_store.db_classes.Platform
-            )
-            second_table_summary_set = TableSummarySet(
-                [states_sum, contacts_sum, comments_sum, platforms_sum]
-            )
-            print(second_table_summary_set.report("==After=="))
+            files = self.drop_loaded_files(files, data_store)
+            if prescan:
+                self.prescan(files, data_store)
+            for file, current_path in files:
+                processed_ctr = self.process_file(
+                    file, current_path, data_store, processed_ctr
+                )
 
-        print(f"Files got processed: {processed_ctr} times")
+            self.report_imported_rows(data_store, summary_tables)
 
-    def process_file(self, file, current_path, data_store, processed_ctr):
-        # file may have full path, therefore extract basename and split it
-        basename = os.path.basename(file)
-        filename, file_extension = os.path.splitext(basename)
-        # make copy of list of importers
-        good_importers = self.importers.copy()
+        return processed_ctr
 
-        full_path = os.path.join(current_path, basename)
-        # print("Checking:" + str(full_path))
+    def report_imported_rows(self, data_store, summary_tables):
+        """Prints the number of rows added to the tables by the changes of this run
 
-        # start with file suffixes
-        tmp_importers = good_importers.copy()
-        for importer in tmp_importers:
-            # print("Checking suffix:" + str(importer))
-            if not importer.can_load_this_type(file_extension):
-                good_importers.remove(importer)
+        :param data_store: Database
+        :type data_store: DataStore
+        :param summary_tables: Mapped classes of the reported tables
+        :type summary_tables: List
+        """
+        imported_summary_set = TableSummarySet(
+            data_store.get_change_summaries(self.change_ids, summary_tables)
+        )
+        print(imported_summary_set.report("==Imported=="))
+
+    @property
+    def importers(self):
+        """All the importers, importing the ones of directories not imported yet"""
+        importers = []
+        for source in self.importer_sources:
+            if isinstance(source, ImporterRegistry):
+                importers.extend(source.importers)
+            else:
+                importers.append(source)
+        return importers
+
+    def importers_for_suffix(self, suffix):
+        """Returns the importers which can load files with the given suffix
+
+        :param suffix: File suffix (e.g. ".rep")
+        :type suffix: String
+        :return: Importers
+        :rtype: List
+        """
+        importers = []
+        for source in self.importer_sources:
+            if isinstance(source, ImporterRegistry):
+                importers.extend(source.importers_for_suffix(suffix))
+            elif source.can_load_this_type(suffix):
+                importers.append(source)
+        return importers
+
+    def importers_for_file(self, full_path):
+        """Returns the importers which can load a file, checked against its suffix,
+        name, first line and contents in turn
+
+        :param full_path: Full file path
+        :type full_path: String
+        :return: Importers
+        :rtype: List
+        """
+        basename = os.path.basename(full_path)
+        filename, file_extension = os.path.splitext(basename)
+
+        # start with file suffixes, only importers of the suffix are imported
+        good_importers = self.importers_for_suffix(file_extension)
 
         # now the filename
         tmp_importers = good_importers.copy()
@@ -227,54 +278,175 @@ class FileProcessor:
 
         # tests are starting to get expensive. Check
         # we have some file importers left
-        if len(good_importers) > 0:
+        if not good_importers:
+            return good_importers
+
+        # now the first line
+        tmp_importers = good_importers.copy()
+        first_line = self.get_first_line(full_path)
+        for importer in tmp_importers:
+            # print("Checking first_line:" + str(importer))
+            if not importer.can_load_this_header(first_line):
+                good_importers.remove(importer)
 
-            # now the first line
+        # lastly the contents
+        with self.get_file_contents(full_path) as file_contents:
             tmp_importers = good_importers.copy()
-            first_line = self.get_first_line(full_path)
             for importer in tmp_importers:
-                # print("Checking first_line:" + str(importer))
-                if not importer.can_load_this_header(first_line):
+                if not importer.can_load_this_file(file_contents):
                     good_importers.remove(importer)
+        return good_importers
 
-            # Create a HighlightedFile instance for the file
-            highlighted_file = HighlightedFile(full_path)
+    def drop_loaded_files(self, files, data_store):
+        """Returns the files which weren't loaded before, checked before any file is
+        read by the importers.
 
-            # Get the file contents, for the final check
-            file_contents = self.get_file_contents(full_path)
+        The files of suffixes which some importer loads are hashed concurrently, and
+        checked against the Datafile table in batches. Their sizes and hashes are
+        kept for :meth:`process_file`.
 
-            # lastly the contents
-            tmp_importers = good_importers.copy()
-            for importer in tmp_importers:
-                if not importer.can_load_this_file(file_contents):
-                    good_importers.remove(importer)
+        :param files: Names of the files, with the paths of their folders
+        :type files: List of Tuple
+        :param data_store: Database
+        :type data_store: DataStore
+        :return: Names of the files not loaded before, with the paths of their folders
+        :rtype: List of Tuple
+        """
+        paths = list()
+        for file, current_path in files:
+            basename = os.path.basename(file)
+            if self.importers_for_suffix(os.path.splitext(basename)[1]):
+                paths.append(os.path.join(current_path, basename))
+        file_keys = hash_files(paths)
+        self.file_keys.update(file_keys)
+        self.loaded_files.update(data_store.find_loaded_datafiles(file_keys.values()))
+
+        remaining = list()
+        for file, current_path in files:
+            full_path = os.path.join(current_path, os.path.basename(file))
+            reference = self.loaded_files.get(file_keys.get(full_path))
+            if reference is not None:
+                print(f"'{reference}' is already loaded! Skipping the file.")
+                continue
+            remaining.append((file, current_path))
+        return remaining
+
+    def prescan(self, files, data_store):
+        """Resolves the datafiles and platforms of files before any of them is loaded,
+        so that the resolver asks its questions at the start of the import rather
+        than while loading the files (e.g. with a :class:`CommandLineResolver`).
+
+        The datafiles not in the database are resolved, which the resolver is
+        expected to answer again for the files when they are loaded (see
+        :class:`BatchResolver`), as is the privacy of the measurements. The platforms
+        named in the files (see Importer.platform_names) which aren't in the database
+        are resolved and created, under a change of their own.
+
+        :param files: Names of the files, with the paths of their folders
+        :type files: List of Tuple
+        :param data_store: Database
+        :type data_store: DataStore
+        """
+        resolver = data_store.missing_data_resolver
+        change = None
+        for file, current_path in tqdm(files, desc="Resolving names"):
+            basename = os.path.basename(file)
+            full_path = os.path.join(current_path, basename)
+            importers = self.importers_for_file(full_path)
+            if not importers:
+                continue
+            if change is None:
+                change = data_store.add_to_changes(
+                    user=USER,
+                    modified=datetime.utcnow(),
+                    reason="Resolving names before import.",
+                )
+                self.change_ids.append(change.change_id)
+                resolver.resolve_privacy(data_store, change.change_id)
+
+            if data_store.find_datafile(basename) is None:
+                file_extension = os.path.splitext(basename)[1]
+                resolver.resolve_datafile(
+                    data_store, basename, file_extension, None, change.change_id
+                )
+
+            with self.get_file_contents(full_path) as file_contents:
+                for importer in importers:
+                    names = set(importer.platform_names(full_path, file_contents))
+                    # unnamed platforms are resolved as the file is loaded
+                    names.discard(None)
+                    names.discard("")
+                    for name in names:
+                        importer.get_platform(data_store, name, change.change_id)
+
+    def process_file(self, file, current_path, data_store, processed_ctr):
+        # file may have full path, therefore extract basename and split it
+        basename = os.path.basename(file)
+        filename, file_extension = os.path.splitext(basename)
 
-            # if good importers list is empty, return processed_ctr,
-            # which means the file is not processed
-            if not good_importers:
-                return processed_ctr
+        full_path = os.path.join(current_path, basename)
+        # print("Checking:" + str(full_path))
+
+        good_importers = self.importers_for_file(full_path)
+
+        # if good importers list is empty, the file is not processed
+        if good_importers:
+            # Create a HighlightedFile instance for the file
+            highlighted_file = HighlightedFile(full_path)
 
             # If the file is loaded before, return processed_ctr,
             # which means the file is not processed again
-            file_size = os.path.getsize(full_path)
-            file_hash = hash_file(full_path)
-            if data_store.is_datafile_loaded_before(file_size, file_hash):
-                return processed_ctr
+            file_key = self.file_keys.get(full_path)
+            if file_key is None:
+                file_size = os.path.getsize(full_path)
+                file_hash = hash_file(full_path)
+                if data_store.is_datafile_loaded_before(file_size, file_hash):
+                    return processed_ctr
+            else:
+                # checked by drop_loaded_files, against the datafiles loaded before
+                # and those added since
+                file_size, file_hash = file_key
+                reference = self.loaded_files.get(file_key)
+                if reference is not None:
+                    print(f"'{reference}' is already loaded! Skipping the file.")
+                    return processed_ctr
 
             # ok, let these importers handle the file
             reason = f"Importing '{basename}'."
             change = data_store.add_to_changes(
                 user=USER, modified=datetime.utcnow(), reason=reason
             )
+            self.change_ids.append(change.change_id)
             datafile = data_store.get_datafile(
                 basename, file_extension, file_size, file_hash, change.change_id
             )
+            self.loaded_files[(datafile.size, datafile.hash)] = datafile.reference
 
-            # Run all parsers
+            # Run all parsers, the ones loading lines by prefix in a single pass
+            line_importers = list()
             for importer in good_importers:
                 processed_ctr += 1
+                if importer.line_prefixes is not None:
+                    importer.prepare_load(
+                        full_path, datafile, chunk_size=self.chunk_size
+                    )
+                    line_importers.append(importer)
+                    continue
                 importer.load_this_file(
-                    data_store, full_path, highlighted_file, datafile, change.change_id
+                    data_store,
+                    full_path,
+                    highlighted_file,
+                    datafile,
+                    change.change_id,
+                    chunk_size=self.chunk_size,
+                )
+            if line_importers:
+                self.load_lines(
+                    line_importers,
+                    data_store,
+                    highlighted_file,
+                    datafile,
+                    change.change_id,
                 )
 
             # Write highlighted output to file
@@ -283,6 +455,7 @@ class FileProcessor:
             )
 
             highlighted_file.export(highlighted_output_path, include_key=True)
+            highlighted_file.close()
 
             # Run all validation tests
             errors = list()
@@ -311,6 +484,8 @@ class FileProcessor:
                     # make it read-only
                     os.chmod(new_path, S_IREAD)
             else:
+                # drop the measurements which have been staged already
+                datafile.discard(data_store)
                 # write error log to the output folder
                 with open(
                     os.path.join(self.directory_path, f"{filename}_errors.log"), "w",
@@ -319,6 +494,31 @@ class FileProcessor:
 
         return processed_ctr
 
+    @staticmethod
+    def load_lines(importers, data_store, highlighted_file, datafile, change_id):
+        """Reads the lines of a file once, handing every line to the importers whose
+        line_prefixes it starts with. A line is tokenised once for all of them.
+
+        :param importers: Importers with line_prefixes, prepared for the file
+        :type importers: List
+        :param data_store: The data_store
+        :type data_store: DataStore
+        :param highlighted_file: The file
+        :type highlighted_file: HighlightedFile
+        :param datafile: DataFile object
+        :type datafile: DataFile
+        :param change_id: ID of the :class:`Change` object
+        :type change_id: Integer or UUID
+        """
+        routes = [(tuple(importer.line_prefixes), importer) for importer in importers]
+        for line_number, line in enumerate(tqdm(highlighted_file.lines()), 1):
+            text = line.text
+            for prefixes, importer in routes:
+                if text.startswith(prefixes):
+                    importer.load_this_line(
+                        data_store, line_number, line, datafile, change_id
+                    )
+
     def register_importer(self, importer):
         """Adds the supplied importer to the list of import modules
 
@@ -327,29 +527,20 @@ class FileProcessor:
         :type importer: Importer
         
         """
-        self.importers.append(importer)
+        self.importer_sources.append(importer)
 
     def load_importers_dynamically(self, path=IMPORTERS_DIRECTORY):
         """Dynamically adds all the importers in the given path.
 
-        It loads core importers by default.
+        It loads core importers by default. The importers are found through the
+        manifest of an :class:`ImporterRegistry`, so their modules are only imported
+        when files they may load are processed.
 
         :param path: Path of a folder that has importers
         :type path: String
         """
         if os.path.exists(path):
-            for file in os.scandir(path):
-                # import file using its name and full path
-                if file.is_file():
-                    classes = import_module_(file)
-                    for name, class_ in classes:
-                        # continue only if it's a concrete class that inherits Importer
-                        if issubclass(class_, Importer) and not inspect.isabstract(
-                            class_
-                        ):
-                            # Create an object of the class, add it to importers
-                            obj = class_()
-                            self.importers.append(obj)
+            self.importer_sources.append(ImporterRegistry(path))
 
     @staticmethod
     def get_first_line(file_path: str):
@@ -369,9 +560,13 @@ class FileProcessor:
 
     @staticmethod
     def get_file_contents(full_path: str):
-        try:
-            with open(full_path, "r", encoding="windows-1252") as f:
-                lines = f.read().split("\n")
-            return lines
-        except UnicodeDecodeError:
-            return None
+        """Returns the lines of the file, decoded from windows-1252 as they are read.
+        The bytes which can't be decoded are replaced, so that they don't stop the
+        import of the other files.
+
+        :param full_path: Full file path
+        :type full_path: String
+        :return: Lines of the file, which should be closed once read
+        :rtype: LineReader
+        """
+        return LineReader(full_path, encoding="windows-1252", errors="replace")
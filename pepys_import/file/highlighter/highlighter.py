@@ -1,7 +1,11 @@
+from collections.abc import Sequence
+
 from .support.char import Char
 from pepys_import.file.highlighter.support.line import Line
 from .support.export import export_report
+from .support.line_reader import LineReader
 from .support.token import SubToken
+from .support.usages import SingleUsage
 
 
 class HighlightedFile:
@@ -22,6 +26,7 @@ class HighlightedFile:
         self.filename = filename
         self.dict_color = {}
         self.number_of_lines = number_of_lines
+        self.reader = None
 
     def chars_debug(self):
         """
@@ -32,15 +37,51 @@ class HighlightedFile:
 
     def lines(self):
         """
-        Slice the file into lines and return a list of Line objects
+        Slice the file into lines and return a sequence of Line objects, which are
+        created as they are accessed
         """
-        if self.number_of_lines is None:
-            return self.not_limited_lines()
-        elif self.number_of_lines <= 0:
-            print("Non-positive number of lines. Please provide positive number")
-            exit(1)
-        else:
-            return self.limited_lines()
+        return HighlightedLines(self, self.line_reader())
+
+    def line_reader(self):
+        """
+        Return the LineReader of the file, limited to self.number_of_lines lines
+        """
+        if self.reader is None:
+            if self.number_of_lines is not None and self.number_of_lines <= 0:
+                print("Non-positive number of lines. Please provide positive number")
+                exit(1)
+            self.reader = LineReader(self.filename, max_lines=self.number_of_lines)
+        return self.reader
+
+    def close(self):
+        """
+        Release the memory map of the file, lines can't be read afterwards
+        """
+        if self.reader is not None:
+            self.reader.close()
+
+    def record_spans(self, line_index, spans, tool, field, value, units="n/a"):
+        """
+        Record a usage of spans of characters of a line, without creating Line and
+        Token objects (e.g. for the columns of CSV rows read in bulk)
+        Args:
+            line_index(int): index of the line in the file
+            spans(list): (start, end) character offsets in the line of each span
+            tool(str):  name of the module handling the import
+            field(str): what the spans are being interpreted as
+            value(str): what value the spans provided
+            units(str): the units of the value
+        """
+        self.fill_char_array_if_needed()
+        line_start = self.line_reader().char_offset(line_index)
+
+        # The characters of all spans share a single usage
+        usage = SingleUsage(
+            tool + "/" + field, "Value:" + str(value) + " Units:" + str(units)
+        )
+        for start, end in spans:
+            for i in range(line_start + start, line_start + end):
+                self.chars[i].usages.append(usage)
 
     def export(self, filename: str, include_key=False):
         """
@@ -53,86 +94,58 @@ class HighlightedFile:
         if len(self.chars) > 0:
             export_report(filename, self.chars, self.dict_color, include_key)
 
-    def limited_contents(self):
-        with open(self.filename, "r") as file:
-            whole_file_contents = file.read()
-
-        lines_list = whole_file_contents.splitlines()
-
-        lines_list = lines_list[0 : self.number_of_lines]
-        limited_contents = "\n".join(str(e) for e in lines_list)
-
-        return limited_contents, lines_list
-
-    def limited_lines(self):
-        """
-        Return a list of Line objects for each line in the file,
-        producing only self.number_of_lines objects (to limit length
-        of output for very large files)
-        """
-
-        limited_contents, lines_list = self.limited_contents()
-
-        lines = self.create_lines(limited_contents, lines_list)
-        return lines
-
-    def not_limited_lines(self):
-        """
-        Return a list of Line objects for each line in the file
-        """
-        with open(self.filename, "r") as file:
-            file_contents = file.read()
-
-        lines_list = file_contents.splitlines()
-        lines = self.create_lines(file_contents, lines_list)
-
-        return lines
-
     def fill_char_array_if_needed(self):
         if len(self.chars) > 0:
             # Char array already filled, so no need to do anything
             return
 
-        if self.number_of_lines is None:
-            with open(self.filename, "r") as f:
-                file_contents = f.read()
-        elif self.number_of_lines <= 0:
-            print("Non-positive number of lines. Please provide positive number")
-            exit(1)
-        else:
-            file_contents, _ = self.limited_contents()
-
+        reader = self.line_reader()
         # Initialise the char index (self.chars), with one Char entry for
         # each character in the file. (Note: a reference to this char array is
-        # given to each SubToken)
-        for char in file_contents:
-            char_obj = Char(char)
-            self.chars.append(char_obj)
-
-    def create_lines(self, file_contents, lines_list):
-        """
-        Create individual Line objects
-        for each line, with appropriate references to the character array
-        """
-        # Keeps track of which character in the file a line starts on
-        line_start_counter = 0
-        lines = []
-
-        # For each line in the file create a Line object with a SubToken
-        # object as its child, keeping track of the length of the line
-        # and which character of the file this line starts on
-        for this_line in lines_list:
-            line_length = len(this_line)
-            line_span = (0, len(this_line))
-            # Create SubToken object to keep track of the line length, the line itself
-            # the start character of the line in the file, and a reference to the overall
-            # list of characters
-            subToken = SubToken(
-                line_span, this_line, int(line_start_counter), self.chars
-            )
-            new_l = Line([subToken], self)
-            lines.append(new_l)
-            # Update the starting character of the line ready for next time
-            line_start_counter += line_length + 1
-
-        return lines
+        # given to each SubToken). A limited number of lines is joined without
+        # a final newline.
+        last_index = len(reader) - 1
+        for index, text in enumerate(reader):
+            for char in text:
+                self.chars.append(Char(char))
+            if index < last_index or (
+                self.number_of_lines is None and reader.ends_with_newline
+            ):
+                self.chars.append(Char("\n"))
+
+    def create_line(self, index):
+        """
+        Create the Line object of a line, with appropriate references to the
+        character array
+        """
+        reader = self.line_reader()
+        this_line = reader[index]
+        line_span = (0, len(this_line))
+        # Create SubToken object to keep track of the line length, the line itself
+        # the start character of the line in the file, and a reference to the overall
+        # list of characters
+        subToken = SubToken(line_span, this_line, reader.char_offset(index), self.chars)
+        return Line([subToken], self)
+
+
+class HighlightedLines(Sequence):
+    """
+    Lines of a HighlightedFile, creating the Line object of a line when it is
+    accessed rather than holding them all
+    """
+
+    def __init__(self, highlighted_file, reader):
+        self.highlighted_file = highlighted_file
+        self.reader = reader
+
+    def __len__(self):
+        return len(self.reader)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self.highlighted_file.create_line(index)
@@ -1,5 +1,8 @@
+from collections.abc import Sequence
 from re import finditer
+
 from .token import Token, SubToken
+from .tokenizer import csv_spans, whitespace_spans
 from .usages import SingleUsage
 
 
@@ -15,6 +18,8 @@ class Line:
         r'(?:,"|^")(""|[\w\W]*?)(?=",|"$)|(?:,(?!")|^(?!"))([^,]*?)(?=$|,)|(\r\n|\n)'
     )
 
+    __slots__ = ["children", "highlighted_file", "tokens_cache"]
+
     def __init__(self, list_of_subtokens, hf_instance):
         """
         Create a new line, giving it a list of SubToken objects as children of the line
@@ -24,6 +29,8 @@ class Line:
         """
         self.children = list_of_subtokens
         self.highlighted_file = hf_instance
+        # Sequences of tokens, keyed by delimiter and strip characters
+        self.tokens_cache = {}
 
     def __repr__(self):
         res = "Line: "
@@ -41,22 +48,32 @@ class Line:
 
     @property
     def text(self):
-        res = ""
-        for child in self.children:
-            res += child.text
-        return res
+        if len(self.children) == 1:
+            return self.children[0].text
+        return "".join([child.text for child in self.children])
 
     def tokens(self, reg_exp=WHITESPACE_DELIM, strip_char=""):
         """
-        Returns a list of Token objects for each token in the line.
+        Returns a sequence of Token objects for each token in the line.
 
         Tokens are generated by splitting by the given regular expression, using it as the
         delimiter. The strip_char argument is any characters to remove after splitting -
         so we don't get the delimiters themselves in the returned values.
         Whitespace is also stripped.
+
+        The tokens are memoised for each delimiter, so importers sharing this line
+        get the same Token objects. Only the spans of the tokens are found up front,
+        each Token is created when it is first accessed (see :class:`LineTokens`).
         """
-        self.tokens_array = []
+        key = (reg_exp, strip_char)
+        if key in self.tokens_cache:
+            return self.tokens_cache[key]
 
+        if reg_exp == self.WHITESPACE_DELIM and strip_char == "":
+            # same tokens as the regular expression, without applying it
+            return self._tokens_from_spans(key, whitespace_spans)
+
+        spans = []
         for child in self.children:
             for match in finditer(reg_exp, child.text):
                 token_str = match.group()
@@ -67,20 +84,45 @@ class Line:
                         token_str = token_str[1:]
                         # and ditch any new whitespace
                     token_str = token_str.strip()
+                spans.append((match.span(), token_str, child))
 
-                subtoken = SubToken(
-                    match.span(), token_str, int(child.line_start), child.chars
-                )
+        tokens = LineTokens(spans, self.highlighted_file)
+        self.tokens_cache[key] = tokens
+        return tokens
 
-                # the token object expects an array of SubTokens, as it could be
-                # a composite object
-                list_of_subtokens = [subtoken]
+    def csv_tokens(self, delimiter=",", quote_char='"'):
+        """
+        Returns a sequence of Token objects for each field of the line, split as
+        comma separated values.
 
-                self.tokens_array.append(
-                    Token(list_of_subtokens, self.highlighted_file)
-                )
+        Unlike splitting with CSV_DELIM, quoted fields have their quotes removed, and
+        the tokens span the fields without their delimiters, so only the
+        characters of a field are highlighted when it is recorded. See
+        :func:`csv_spans` for how the fields are found.
 
-        return self.tokens_array
+        The tokens are memoised and created lazily, as those of :meth:`tokens`.
+        """
+        key = (csv_spans, delimiter, quote_char)
+        if key in self.tokens_cache:
+            return self.tokens_cache[key]
+        return self._tokens_from_spans(
+            key, lambda text: csv_spans(text, delimiter, quote_char)
+        )
+
+    def _tokens_from_spans(self, key, split):
+        """Memoises the tokens of every (span, text) found by split"""
+        if len(self.children) == 1:
+            child = self.children[0]
+            spans = [(span, text, child) for span, text in split(child.text)]
+        else:
+            spans = [
+                (span, text, child)
+                for child in self.children
+                for span, text in split(child.text)
+            ]
+        tokens = LineTokens(spans, self.highlighted_file)
+        self.tokens_cache[key] = tokens
+        return tokens
 
     def record(self, tool: str, field: str, value: str, units: str = "n/a"):
         """
@@ -99,6 +141,45 @@ class Line:
         message = "Value:" + str(value) + " Units:" + str(units)
 
         for child in self.children:
-            for i in range(int(child.start()), int(child.end())):
+            for i in range(child.start(), child.end()):
                 usage = SingleUsage(tool_field, message)
                 child.chars[i].usages.append(usage)
+
+
+class LineTokens(Sequence):
+    """
+    Tokens of a Line, holding the span and text of every token and creating its
+    Token object when it is first accessed, as importers only use a few tokens of
+    each line
+    """
+
+    __slots__ = ["spans", "highlighted_file", "created"]
+
+    def __init__(self, spans, highlighted_file):
+        """
+        Args:
+            spans(list): (span, text, SubToken of the line) of every token
+            highlighted_file(HighlightedFile): file the line belongs to
+        """
+        self.spans = spans
+        self.highlighted_file = highlighted_file
+        self.created = [None] * len(spans)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.spans)))]
+        token = self.created[index]
+        if token is None:
+            span, text, child = self.spans[index]
+            subtoken = SubToken(span, text, child.line_start, child.chars)
+            # the token object expects an array of SubTokens, as it could be
+            # a composite object
+            token = Token([subtoken], self.highlighted_file)
+            self.created[index] = token
+        return token
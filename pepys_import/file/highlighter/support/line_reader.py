@@ -0,0 +1,124 @@
+import locale
+import mmap
+
+from array import array
+
+
+class LineReader:
+    """
+    Lines of a file, read through a memory map of the file.
+
+    The line boundaries are found by scanning the bytes of the file once, keeping
+    only the offsets of every line, and each line is decoded when it is accessed, so
+    memory use doesn't grow with the size of the lines and any line can be read
+    without reading the ones before it.
+
+    Lines end with "\\n", and a "\\r" before it is dropped from the line, as when the
+    file is read in text mode. The offsets of characters (see :meth:`char_offset`)
+    are those of the decoded lines joined by "\\n", which are the offsets used by
+    :class:`HighlightedFile` for highlighting.
+
+    :param filename: Full path of the file
+    :type filename: String
+    :param encoding: Encoding of the file, the preferred encoding of the system (as
+        used by ``open``) by default
+    :type encoding: String
+    :param errors: How decoding errors are handled, as for ``open``
+    :type errors: String
+    :param max_lines: Maximum number of lines read from the start of the file, all
+        lines if None
+    :type max_lines: Integer
+    """
+
+    def __init__(self, filename, encoding=None, max_lines=None, errors="strict"):
+        self.filename = filename
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.errors = errors
+        with open(filename, "rb") as f:
+            try:
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # An empty file can't be mapped
+                self.mapped = b""
+        # Byte offsets of the start and the end (without line ending) of every line
+        self.starts = array("q")
+        self.ends = array("q")
+        self.ends_with_newline = False
+        self._scan(max_lines)
+        # Character offsets of the lines, found as far as the lines were decoded
+        self._char_starts = array("q", [0])
+        self._last_line = (None, None)
+
+    def _scan(self, max_lines):
+        mapped = self.mapped
+        size = len(mapped)
+        position = 0
+        while position < size and (max_lines is None or len(self.starts) < max_lines):
+            newline = mapped.find(b"\n", position)
+            end = size if newline == -1 else newline
+            self.starts.append(position)
+            if end > position and mapped[end - 1] == ord("\r"):
+                self.ends.append(end - 1)
+            else:
+                self.ends.append(end)
+            position = end + 1
+        self.ends_with_newline = 0 < position <= size
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        last_index, last_text = self._last_line
+        if last_index == index:
+            return last_text
+        text = self.line_bytes(index).decode(self.encoding, self.errors)
+        self._last_line = (index, text)
+        return text
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def line_bytes(self, index):
+        """Returns the undecoded bytes of a line, without line ending"""
+        return self.mapped[self.starts[index] : self.ends[index]]
+
+    def byte_offset(self, index):
+        """Returns the offset of the first byte of a line in the file"""
+        return self.starts[index]
+
+    def char_offset(self, index):
+        """
+        Returns the offset of the first character of a line in the decoded lines
+        joined by "\\n".
+
+        Lines before it which weren't decoded yet are decoded to find their lengths,
+        unless they are ASCII.
+        """
+        char_starts = self._char_starts
+        while len(char_starts) <= index:
+            line = len(char_starts) - 1
+            raw = self.line_bytes(line)
+            if raw.isascii():
+                length = len(raw)
+            else:
+                length = len(self[line])
+            char_starts.append(char_starts[-1] + length + 1)
+        return char_starts[index]
+
+    def close(self):
+        """Unmaps the file, after which no line can be read"""
+        if isinstance(self.mapped, mmap.mmap):
+            self.mapped.close()
@@ -14,6 +14,10 @@ class SubToken:
     and a reference to the overall character array created by HighlightedFile.
     """
 
+    # A SubToken is created for every token of every line read, so the attributes
+    # are slotted to keep them small, as for Char
+    __slots__ = ["span", "text", "line_start", "chars"]
+
     def __init__(self, span, text, line_start, chars):
         self.span = span
         self.text = text
@@ -24,13 +28,13 @@ class SubToken:
         """
         Returns the index into the character array that this SubToken starts at
         """
-        return self.line_start + int(self.span[0])
+        return self.line_start + self.span[0]
 
     def end(self):
         """
         Returns the index into the character array that this SubToken ends at
         """
-        return self.line_start + int(self.span[1])
+        return self.line_start + self.span[1]
 
     def __repr__(self):
         return (
@@ -56,6 +60,8 @@ class Token:
     combined there can be multiple children.
     """
 
+    __slots__ = ["children", "highlighted_file"]
+
     def __init__(self, list_of_subtokens, hf_instance):
         """
         :param list_of_subtokens:  A list of SubToken objects
@@ -72,10 +78,9 @@ class Token:
 
     @property
     def text(self):
-        res = ""
-        for child in self.children:
-            res += child.text
-        return res
+        if len(self.children) == 1:
+            return self.children[0].text
+        return "".join([child.text for child in self.children])
 
     def record(self, tool: str, field: str, value: str, units: str = "n/a"):
         """
@@ -0,0 +1,104 @@
+"""
+Splitting of lines into fields, returning the span of every field in the line with
+its text, for building SubTokens without applying a regular expression to the line.
+"""
+
+
+def csv_spans(text, delimiter=",", quote_char='"'):
+    """
+    Splits a line of comma separated values into its fields.
+
+    Lines without quotes are split with ``str.split``, with the spans worked out
+    from the lengths of the fields. Other lines are split by a state machine, where a
+    field starting with a quote ends at the next quote not doubled, and doubled
+    quotes in it stand for a single quote. A quote in an unquoted field is kept in
+    its text, and text after the closing quote of a field is added to it, as done by
+    the ``csv`` module.
+
+    The span of a field doesn't include the delimiters, nor the quotes of a quoted
+    field, and the text of an unquoted field is stripped of whitespace. An empty
+    line has a single empty field.
+
+    :param text: Line to split, without line ending
+    :type text: String
+    :param delimiter: Character separating the fields
+    :type delimiter: String
+    :param quote_char: Character quoting fields which may contain the delimiter
+    :type quote_char: String
+    :return: (start, end) span and text of every field
+    :rtype: List
+    """
+    if quote_char not in text:
+        spans = []
+        start = 0
+        for field in text.split(delimiter):
+            end = start + len(field)
+            spans.append(((start, end), field.strip()))
+            start = end + 1
+        return spans
+    return _quoted_csv_spans(text, delimiter, quote_char)
+
+
+def _quoted_csv_spans(text, delimiter, quote_char):
+    spans = []
+    length = len(text)
+    start = 0
+    while True:
+        if start < length and text[start] == quote_char:
+            # quoted field, find its closing quote skipping doubled quotes
+            position = start + 1
+            parts = []
+            while True:
+                quote = text.find(quote_char, position)
+                if quote == -1:
+                    # unterminated, the field runs to the end of the line
+                    parts.append(text[position:])
+                    end = length
+                    break
+                parts.append(text[position:quote])
+                if text.startswith(quote_char, quote + 1):
+                    parts.append(quote_char)
+                    position = quote + 2
+                    continue
+                end = quote
+                break
+            field_span = (start + 1, end)
+            field_text = "".join(parts)
+            # anything after the closing quote belongs to the same field
+            next_delimiter = text.find(delimiter, end)
+            if next_delimiter == -1:
+                next_delimiter = length
+            trailing = text[end + 1 : next_delimiter]
+            if trailing:
+                field_span = (start + 1, next_delimiter)
+                field_text += trailing
+        else:
+            next_delimiter = text.find(delimiter, start)
+            if next_delimiter == -1:
+                next_delimiter = length
+            field_span = (start, next_delimiter)
+            field_text = text[start:next_delimiter].strip()
+        spans.append((field_span, field_text))
+        if next_delimiter >= length:
+            return spans
+        start = next_delimiter + 1
+
+
+def whitespace_spans(text):
+    """
+    Splits a line into the runs of characters which aren't whitespace, as found by
+    the ``\\S+`` regular expression.
+
+    :param text: Line to split
+    :type text: String
+    :return: (start, end) span and text of every run
+    :rtype: List
+    """
+    spans = []
+    end = 0
+    find = text.find
+    for field in text.split():
+        start = find(field, end)
+        end = start + len(field)
+        spans.append(((start, end), field))
+    return spans
@@ -3,6 +3,17 @@ import os
 
 
 class Importer(ABC):
+    # Prefixes of the lines the importer loads, for importers loading a file line by
+    # line with _load_this_line. The lines of a file are then read once and handed
+    # to every such importer whose prefixes they start with, see
+    # FileProcessor.load_lines
+    line_prefixes = None
+    # Details of the platforms created by the importer when they aren't in the
+    # database, see get_platform
+    platform_nationality = "UK"
+    platform_type = "Fisher"
+    platform_privacy = "Public"
+
     def __init__(self, name, validation_level, short_name):
         super().__init__()
         self.name = name
@@ -55,21 +66,110 @@ class Importer(ABC):
         :rtype: bool
         """
 
-    def load_this_file(self, data_store, path, file_object, datafile, change_id):
+    def load_this_file(
+        self, data_store, path, file_object, datafile, change_id, chunk_size=None
+    ):
         """Handles the loading of this data file
 
         Performs the common operations that must be performed before the
         load_this_file method is called, then performs the load
+
+        :param chunk_size: If given, measurements are validated and staged in the
+        database every chunk_size rows rather than all kept in memory
+        :type chunk_size: Integer
+        """
+        self.prepare_load(path, datafile, chunk_size)
+
+        # perform load
+        self._load_this_file(data_store, path, file_object, datafile, change_id)
+
+    def prepare_load(self, path, datafile, chunk_size=None):
+        """Prepares the importer and the datafile for the loading of a data file
+
+        :param path: File path
+        :type path: String
+        :param datafile: DataFile object
+        :type datafile: DataFile
+        :param chunk_size: If given, measurements are validated and staged in the
+        database every chunk_size rows rather than all kept in memory
+        :type chunk_size: Integer
         """
         basename = os.path.basename(path)
         print(f"{self.short_name} working on {basename}")
         self.errors = list()
         self.error_type = f"{self.short_name} - Parsing error on {basename}"
-        datafile.measurements[self.short_name] = list()
+        if chunk_size is None:
+            datafile.measurements[self.short_name] = list()
+        else:
+            datafile.create_chunked_buffer(
+                self.short_name, chunk_size, self.validation_level, self.errors
+            )
         self.prev_location = dict()
 
-        # perform load
-        self._load_this_file(data_store, path, file_object, datafile, change_id)
+    def load_this_line(self, data_store, line_number, line, datafile, change_id):
+        """Handles the loading of a line of a data file, for importers which have
+        line_prefixes. prepare_load must have been called for the data file.
+
+        :param line_number: Number of the line in the file, starting from 1
+        :type line_number: Integer
+        :param line: The line
+        :type line: Line
+        """
+        self._load_this_line(data_store, line_number, line, datafile, change_id)
+
+    def _load_this_line(self, data_store, line_number, line, datafile, change_id):
+        """Process a line of a data-file, for importers which have line_prefixes
+
+        :param data_store: The data_store
+        :type data_store: DataStore
+        :param line_number: Number of the line in the file, starting from 1
+        :type line_number: Integer
+        :param line: The line, whose tokens may be shared with other importers
+        :type line: Line
+        :param datafile: DataFile object
+        :type datafile: DataFile
+        :param change_id: ID of the :class:`Change` object
+        :type change_id: Integer or UUID
+        """
+        raise NotImplementedError(f"{self.name} doesn't load files line by line")
+
+    def platform_names(self, path, file_contents):
+        """Names of the platforms a file refers to, read by a lightweight pass over
+        the file which doesn't parse its measurements, so that the unknown platforms
+        can be resolved before the file is loaded (see FileProcessor.prescan).
+
+        The default is an empty list, the platforms then being resolved as the file
+        is loaded.
+
+        :param path: File path
+        :type path: String
+        :param file_contents: Lines of the file
+        :type file_contents: LineReader
+        :return: Names of the platforms, in any order and possibly repeated
+        :rtype: Iterable of String
+        """
+        return []
+
+    def get_platform(self, data_store, platform_name, change_id):
+        """Returns the platform of a name, resolving it as a platform of the
+        importer's nationality, type and privacy if it isn't in the database
+
+        :param data_store: The data_store
+        :type data_store: DataStore
+        :param platform_name: Name of the :class:`Platform`
+        :type platform_name: String
+        :param change_id: ID of the :class:`Change` object
+        :type change_id: Integer or UUID
+        :return: The platform
+        :rtype: Platform
+        """
+        return data_store.get_platform(
+            platform_name=platform_name,
+            nationality=self.platform_nationality,
+            platform_type=self.platform_type,
+            privacy=self.platform_privacy,
+            change_id=change_id,
+        )
 
     @abstractmethod
     def _load_this_file(self, data_store, path, file_object, datafile, change_id):
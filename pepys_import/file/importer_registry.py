@@ -0,0 +1,229 @@
+import hashlib
+import inspect
+import json
+import os
+
+from types import SimpleNamespace
+
+from config import LOCAL_CACHE
+from pepys_import import __version__
+from pepys_import.file.importer import Importer
+from pepys_import.utils.import_utils import import_module_
+
+MANIFEST_VERSION = 2
+
+
+def manifest_directory():
+    """
+    Returns the directory of the manifests, which are kept per user as the
+    directories of importers may be read-only: the ``cache`` path of the ``local``
+    section of the config file if it's set, or else the ``pepys_import`` directory of
+    ``$XDG_CACHE_HOME``, which defaults to ``~/.cache``
+    """
+    if LOCAL_CACHE:
+        return LOCAL_CACHE
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "pepys_import")
+
+
+def base_signature():
+    """
+    Returns the version of pepys_import and the time of modification of the module
+    of the :class:`Importer` base class, as the answers of the importers recorded in
+    a manifest may depend on them as well as on their own modules
+    """
+    return {
+        "version": __version__,
+        "importer_mtime": os.stat(inspect.getfile(Importer)).st_mtime,
+    }
+
+
+class ImporterRecord:
+    """
+    A concrete :class:`Importer` class found in a module of a directory of importers,
+    which is only imported and instantiated when it is needed.
+
+    :param registry: Registry of the directory of the module, which imports it
+    :type registry: ImporterRegistry
+    :param module_path: Full path of the module
+    :type module_path: String
+    :param class_name: Name of the class in the module
+    :type class_name: String
+    :param suffixes: Answers of ``can_load_this_type`` keyed by suffix
+    :type suffixes: Dict
+    """
+
+    def __init__(self, registry, module_path, class_name, suffixes=None):
+        self.registry = registry
+        self.module_path = module_path
+        self.class_name = class_name
+        self.suffixes = dict() if suffixes is None else suffixes
+        self.importer = None
+
+    def load(self):
+        """Returns the importer, importing its module if it hasn't been yet"""
+        if self.importer is None:
+            class_ = self.registry.module_classes(self.module_path)[self.class_name]
+            self.importer = class_()
+        return self.importer
+
+    def can_load_this_type(self, suffix):
+        """
+        Returns whether the importer can load files with the suffix, asking the
+        importer only if the answer isn't known yet.
+
+        :return: Yes/No, and whether the answer is new
+        :rtype: Tuple
+        """
+        if suffix in self.suffixes:
+            return self.suffixes[suffix], False
+        self.suffixes[suffix] = bool(self.load().can_load_this_type(suffix))
+        return self.suffixes[suffix], True
+
+
+class ImporterRegistry:
+    """
+    Importers of a directory, discovered from a manifest rather than by importing
+    every module.
+
+    The manifest records the modules of the directory, with their size and time of
+    modification, the concrete :class:`Importer` classes they define and the answers
+    of their ``can_load_this_type`` method for the suffixes seen so far. Only
+    modules which are new or have changed since the manifest was written are
+    imported to find their importers, and other importers are only imported when a
+    file with a suffix they load, or haven't been asked about yet, is processed.
+
+    The manifest is written again from scratch when pepys_import or the module of
+    the :class:`Importer` base class changes, see :func:`base_signature`.
+
+    :param path: Path of the directory of importers
+    :type path: String
+    :param manifest_path: Path of the manifest, a file named after the directory in
+        the directory returned by :func:`manifest_directory` by default
+    :type manifest_path: String
+    """
+
+    def __init__(self, path, manifest_path=None):
+        self.path = os.path.abspath(path)
+        if manifest_path is None:
+            digest = hashlib.sha1(self.path.encode()).hexdigest()[:16]
+            manifest_path = os.path.join(
+                manifest_directory(), f"importers_{digest}.json"
+            )
+        self.manifest_path = manifest_path
+        self.base = base_signature()
+        self.records = list()
+        # modules of the manifest, keyed by file name
+        self.modules = dict()
+        # Importer classes of the modules imported, keyed by path, so that each
+        # module is only imported once
+        self.classes = dict()
+        self.scan()
+
+    def module_classes(self, module_path):
+        """Returns the Importer classes of a module, importing it the first time"""
+        classes = self.classes.get(module_path)
+        if classes is None:
+            classes = importer_classes(module_path)
+            self.classes[module_path] = classes
+        return classes
+
+    @property
+    def importers(self):
+        """All importers of the directory, importing the ones not imported yet"""
+        return [record.load() for record in self.records]
+
+    def importers_for_suffix(self, suffix):
+        """
+        Returns the importers which can load files with the suffix.
+
+        :param suffix: File suffix (e.g. ".rep")
+        :type suffix: String
+        :return: Importers, in the order of their modules
+        :rtype: List
+        """
+        importers = list()
+        changed = False
+        for record in self.records:
+            can_load, new_answer = record.can_load_this_type(suffix)
+            changed = changed or new_answer
+            if can_load:
+                importers.append(record.load())
+        if changed:
+            self.save()
+        return importers
+
+    def scan(self):
+        """Finds the importers of the directory, updating the manifest if needed"""
+        manifest = self.read_manifest()
+        modules = dict()
+        changed = False
+        for file in sorted(os.scandir(self.path), key=lambda file: file.name):
+            if not file.is_file():
+                continue
+            stat = file.stat()
+            module = manifest.get(file.name)
+            if (
+                module is None
+                or module["mtime"] != stat.st_mtime
+                or module["size"] != stat.st_size
+            ):
+                classes = self.module_classes(file.path)
+                module = {
+                    "mtime": stat.st_mtime,
+                    "size": stat.st_size,
+                    "classes": {name: dict() for name in classes},
+                }
+                changed = True
+            modules[file.name] = module
+            for class_name, suffixes in module["classes"].items():
+                self.records.append(
+                    ImporterRecord(self, file.path, class_name, suffixes)
+                )
+
+        self.modules = modules
+        if changed or set(manifest) != set(modules):
+            self.save()
+
+    def read_manifest(self):
+        """Returns the modules recorded in the manifest, or nothing if it's invalid"""
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return dict()
+        valid = (
+            manifest.get("version") == MANIFEST_VERSION
+            and manifest.get("path") == self.path
+            and manifest.get("base") == self.base
+        )
+        return manifest.get("modules", dict()) if valid else dict()
+
+    def save(self):
+        """Writes the manifest, unless its directory can't be written to"""
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "path": self.path,
+            "base": self.base,
+            "modules": self.modules,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            temporary_path = self.manifest_path + ".tmp"
+            with open(temporary_path, "w") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(temporary_path, self.manifest_path)
+        except OSError:
+            pass
+
+
+def importer_classes(path):
+    """Imports the module at the path, returning its concrete Importer classes"""
+    classes = import_module_(SimpleNamespace(name=os.path.basename(path), path=path))
+    return {
+        name: class_
+        for name, class_ in classes
+        if issubclass(class_, Importer) and not inspect.isabstract(class_)
+    }
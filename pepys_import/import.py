@@ -10,7 +10,13 @@ DIRECTORY_PATH = os.path.dirname(FILE_PATH)
 DEFAULT_DATABASE = ":memory:"
 
 
-def main(path=DIRECTORY_PATH, archive=False):
+def main(
+    path=DIRECTORY_PATH,
+    archive=False,
+    chunk_size=None,
+    full_summaries=False,
+    prescan=False,
+):
     data_store = DataStore(
         db_username=DB_USERNAME,
         db_password=DB_PASSWORD,
@@ -21,9 +27,11 @@ def main(path=DIRECTORY_PATH, archive=False):
     )
     data_store.initialise()
 
-    processor = FileProcessor(archive=archive)
+    processor = FileProcessor(archive=archive, chunk_size=chunk_size)
     processor.load_importers_dynamically()
-    processor.process(path, data_store, True)
+    processor.process(
+        path, data_store, True, full_summaries=full_summaries, prescan=prescan
+    )
 
 
 if __name__ == "__main__":
@@ -33,6 +41,18 @@ if __name__ == "__main__":
     archive_help = (
         " Instruction to archive (move) imported files to designated archive folder"
     )
+    chunk_size_help = (
+        "Number of measurements kept in memory before they are validated and staged "
+        "in the database (The default is to keep all measurements of a file in memory)"
+    )
+    full_summaries_help = (
+        "Instruction to report the number of rows of the tables before and after the "
+        "import, not only the rows added by it"
+    )
+    prescan_help = (
+        "Instruction to resolve the datafiles and platforms missing from the database "
+        "for all the files before loading any of them"
+    )
     parser.add_argument(
         "--path", help=path_help, required=False, default=DIRECTORY_PATH
     )
@@ -43,5 +63,33 @@ if __name__ == "__main__":
         action="store_true",
         default=False,
     )
+    parser.add_argument(
+        "--chunk-size",
+        dest="chunk_size",
+        help=chunk_size_help,
+        type=int,
+        required=False,
+        default=None,
+    )
+    parser.add_argument(
+        "--full-summaries",
+        dest="full_summaries",
+        help=full_summaries_help,
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--prescan",
+        dest="prescan",
+        help=prescan_help,
+        action="store_true",
+        default=False,
+    )
     args = parser.parse_args()
-    main(path=args.path, archive=args.archive)
+    main(
+        path=args.path,
+        archive=args.archive,
+        chunk_size=args.chunk_size,
+        full_summaries=args.full_summaries,
+        prescan=args.prescan,
+    )
@@ -0,0 +1,122 @@
+from .data_resolver import DataResolver
+
+
+class BatchResolver(DataResolver):
+    """
+    Resolver which asks another resolver for the data missing from the database the
+    first time it is missing, and gives the same answer when the same data is missing
+    again. An interactive resolver (e.g. :class:`CommandLineResolver`) wrapped by it
+    asks its questions once for an import, all at its start when the names of the
+    files are resolved before they are loaded (see FileProcessor.prescan), after which
+    the files are loaded unattended.
+
+    The answers are kept by name, and their entities are searched again when they are
+    given, as they may be given in a later session than the one they were made in.
+
+    - A platform is answered by the name of the platform made or chosen for it
+    - A sensor is answered by its name, type and privacy, unless an existing sensor
+      was chosen for it, as sensors belong to a platform
+    - A datafile is answered by the type and privacy chosen for the first datafile of
+      the same type, keeping its own name
+    - The privacy is asked once
+
+    Missing platforms without a name aren't answered again, as they may be different
+    platforms.
+
+    :param resolver: Resolver asked for the data missing the first time
+    :type resolver: DataResolver
+    """
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        # Names of the platforms resolved, by the name they were missing as
+        self.platform_names = dict()
+        # Names, types and privacies of the sensors resolved, by name and type
+        self.sensors = dict()
+        # Types and privacies of the datafiles resolved, by the type they were given
+        self.datafile_types = dict()
+        self.privacy_name = None
+        # Privacy entity, for the session it was searched in
+        self.privacy = None
+        self.privacy_session = None
+
+    def resolve_platform(
+        self, data_store, platform_name, platform_type, nationality, privacy, change_id
+    ):
+        resolved_name = self.platform_names.get(platform_name)
+        if resolved_name is not None:
+            platform = data_store.find_platform(resolved_name)
+            if platform is not None:
+                return platform
+
+        resolved_data = self.resolver.resolve_platform(
+            data_store, platform_name, platform_type, nationality, privacy, change_id
+        )
+        if platform_name is not None:
+            if isinstance(resolved_data, data_store.db_classes.Platform):
+                self.platform_names[platform_name] = resolved_data.name
+            else:
+                self.platform_names[platform_name] = resolved_data[0]
+        return resolved_data
+
+    def resolve_sensor(self, data_store, sensor_name, sensor_type, privacy, change_id):
+        key = (sensor_name, None if sensor_type is None else sensor_type.name)
+        answer = self.sensors.get(key)
+        if answer is not None:
+            resolved_name, type_name, privacy_name = answer
+            return (
+                resolved_name,
+                data_store.search_sensor_type(type_name),
+                data_store.search_privacy(privacy_name),
+            )
+
+        resolved_data = self.resolver.resolve_sensor(
+            data_store, sensor_name, sensor_type, privacy, change_id
+        )
+        if not isinstance(resolved_data, data_store.db_classes.Sensor):
+            resolved_name, resolved_type, resolved_privacy = resolved_data
+            self.sensors[key] = (
+                resolved_name,
+                resolved_type.name,
+                resolved_privacy.name,
+            )
+        return resolved_data
+
+    def resolve_privacy(self, data_store, change_id):
+        if self.privacy_name is None:
+            privacy = self.resolver.resolve_privacy(data_store, change_id)
+            if privacy is None:
+                return None
+            self.privacy_name = privacy.name
+        elif self.privacy_session is not data_store.session:
+            privacy = data_store.search_privacy(self.privacy_name)
+        else:
+            return self.privacy
+        self.privacy = privacy
+        self.privacy_session = data_store.session
+        return privacy
+
+    def resolve_datafile(
+        self, data_store, datafile_name, datafile_type, privacy, change_id
+    ):
+        answer = self.datafile_types.get(datafile_type)
+        if answer is not None:
+            type_name, privacy_name = answer
+            return (
+                datafile_name,
+                data_store.search_datafile_type(type_name),
+                data_store.search_privacy(privacy_name),
+            )
+
+        resolved_data = self.resolver.resolve_datafile(
+            data_store, datafile_name, datafile_type, privacy, change_id
+        )
+        if datafile_type is not None and not isinstance(
+            resolved_data, data_store.db_classes.Datafile
+        ):
+            _, resolved_type, resolved_privacy = resolved_data
+            self.datafile_types[datafile_type] = (
+                resolved_type.name,
+                resolved_privacy.name,
+            )
+        return resolved_data
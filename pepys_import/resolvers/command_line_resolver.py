@@ -1,17 +1,35 @@
 import sys
 
 from prompt_toolkit import prompt
-from prompt_toolkit.completion import FuzzyWordCompleter
-from sqlalchemy import or_
+from sqlalchemy.event import contains, listen
 
 from pepys_import.resolvers.data_resolver import DataResolver
 from pepys_import.resolvers.command_line_input import create_menu, is_valid
+from pepys_import.resolvers.name_index import NameCompleter, NameIndex
 from pepys_import.core.store import constants
 
 
 class CommandLineResolver(DataResolver):
+    # Columns of the names completed for the entities of the tables searched
+    NAME_COLUMNS = {
+        "Datafile": ("reference",),
+        "Platform": ("name", "trigraph", "quadgraph"),
+        "Sensor": ("name",),
+        "Privacy": ("name",),
+        "DatafileType": ("name",),
+        "Nationality": ("name",),
+        "PlatformType": ("name",),
+        "SensorType": ("name",),
+    }
+    # Tables whose entities are also completed by their synonyms
+    SYNONYM_TABLES = (constants.DATAFILE, constants.PLATFORM, constants.SENSOR)
+
     def __init__(self):
         super().__init__()
+        # Indexes of the names of the tables searched, by table name, for the
+        # session they were built in
+        self.name_indexes = dict()
+        self.indexed_session = None
 
     def resolve_datafile(
         self, data_store, datafile_name, datafile_type, privacy, change_id
@@ -119,11 +137,83 @@ class CommandLineResolver(DataResolver):
             return None
 
     # Helper methods
+    def name_completer(self, data_store, table):
+        """
+        Returns the completer of the names of a table, see :meth:`name_index`.
+
+        :param data_store: A :class:`DataStore` object
+        :type data_store: DataStore
+        :param table: Mapped class of the table
+        :type table: :class:`BasePostGIS` or :class:`BaseSpatiaLite`
+        :return: Completer of the names
+        :rtype: NameCompleter
+        """
+        return NameCompleter(self.name_index(data_store, table))
+
+    def name_index(self, data_store, table):
+        """
+        Returns the index of the names of the entities of a table, and of their
+        synonyms for datafiles, platforms and sensors. The index of a table is built
+        once per session of the DataStore, and the names of the entities and synonyms
+        added in the session are indexed as the session is flushed.
+
+        :param data_store: A :class:`DataStore` object
+        :type data_store: DataStore
+        :param table: Mapped class of the table
+        :type table: :class:`BasePostGIS` or :class:`BaseSpatiaLite`
+        :return: Index of the names
+        :rtype: NameIndex
+        """
+        session = data_store.session
+        if session is not self.indexed_session:
+            self.name_indexes = dict()
+            self.indexed_session = session
+        if not contains(session, "after_flush", self.index_new_names):
+            listen(session, "after_flush", self.index_new_names)
+
+        index = self.name_indexes.get(table.__tablename__)
+        if index is None:
+            index = NameIndex()
+            columns = [
+                getattr(table, name) for name in self.NAME_COLUMNS[table.__name__]
+            ]
+            for row in session.query(*columns):
+                for name in row:
+                    index.add(name)
+            if table.__tablename__ in self.SYNONYM_TABLES:
+                Synonym = data_store.db_classes.Synonym
+                synonyms = session.query(Synonym.synonym).filter(
+                    Synonym.table == table.__tablename__
+                )
+                for (synonym,) in synonyms:
+                    index.add(synonym)
+            self.name_indexes[table.__tablename__] = index
+        return index
+
+    def index_new_names(self, session, flush_context):
+        """
+        Adds the names of the entities and synonyms added by a session to the indexes
+        built for it, registered as the ``after_flush`` event of the session
+        """
+        if session is not self.indexed_session:
+            return
+        for instance in session.new:
+            table_name = getattr(instance, "__tablename__", None)
+            if table_name == constants.SYNONYM:
+                index = self.name_indexes.get(instance.table)
+                if index is not None:
+                    index.add(instance.synonym)
+                continue
+            index = self.name_indexes.get(table_name)
+            if index is not None:
+                for name in self.NAME_COLUMNS[type(instance).__name__]:
+                    index.add(getattr(instance, name))
+
     def fuzzy_search_datafile(
         self, data_store, datafile_name, datafile_type, privacy, change_id
     ):
         """
-        This method parses all datafiles in the DB, and uses fuzzy search when
+        This method completes the names of all datafiles in the DB as the
         user is typing. If user enters a new value, it adds to Synonym or Datafiles
         according to user's choice. If user selects an existing value, it returns the
         selected Datafile entity.
@@ -140,13 +230,12 @@ class CommandLineResolver(DataResolver):
         :type change_id: Integer or UUID
         :return:
         """
-        datafiles = data_store.session.query(data_store.db_classes.Datafile).all()
-        completer = [datafile.reference for datafile in datafiles]
+        completer = self.name_completer(data_store, data_store.db_classes.Datafile)
         choice = create_menu(
             "Please start typing to show suggested values",
             cancel="datafile search",
             choices=[],
-            completer=FuzzyWordCompleter(completer),
+            completer=completer,
         )
         if datafile_name and choice in completer:
             new_choice = create_menu(
@@ -154,11 +243,8 @@ class CommandLineResolver(DataResolver):
                 ["Yes", "No"],
             )
             if new_choice == str(1):
-                datafile = (
-                    data_store.session.query(data_store.db_classes.Datafile)
-                    .filter(data_store.db_classes.Datafile.reference == choice)
-                    .first()
-                )
+                # the choice may be a synonym of the datafile
+                datafile = data_store.find_datafile(choice)
                 # Add it to synonyms and return existing datafile
                 data_store.add_to_synonyms(
                     constants.DATAFILE, datafile_name, datafile.datafile_id, change_id
@@ -189,7 +275,7 @@ class CommandLineResolver(DataResolver):
         self, data_store, platform_name, platform_type, nationality, privacy, change_id
     ):
         """
-        This method parses all platforms in the DB, and uses fuzzy search when
+        This method completes the names of all platforms in the DB as the
         user is typing. If user enters a new value, it adds to Synonym or Platforms
         according to user's choice. If user selects an existing value, it returns the
         selected Platform entity.
@@ -208,19 +294,12 @@ class CommandLineResolver(DataResolver):
         :type change_id: Integer or UUID
         :return:
         """
-        completer = list()
-        platforms = data_store.session.query(data_store.db_classes.Platform).all()
-        for platform in platforms:
-            completer.append(platform.name)
-            if platform.trigraph:
-                completer.append(platform.trigraph)
-            if platform.quadgraph:
-                completer.append(platform.quadgraph)
+        completer = self.name_completer(data_store, data_store.db_classes.Platform)
         choice = create_menu(
             "Please start typing to show suggested values",
             cancel="platform search",
             choices=[],
-            completer=FuzzyWordCompleter(completer),
+            completer=completer,
         )
         if platform_name and choice in completer:
             new_choice = create_menu(
@@ -229,17 +308,8 @@ class CommandLineResolver(DataResolver):
                 validate_method=is_valid,
             )
             if new_choice == str(1):
-                platform = (
-                    data_store.session.query(data_store.db_classes.Platform)
-                    .filter(
-                        or_(
-                            data_store.db_classes.Platform.name == choice,
-                            data_store.db_classes.Platform.trigraph == choice,
-                            data_store.db_classes.Platform.quadgraph == choice,
-                        )
-                    )
-                    .first()
-                )
+                # the choice may be a synonym of the platform
+                platform = data_store.find_platform(choice)
                 # Add it to synonyms and return existing platform
                 data_store.add_to_synonyms(
                     constants.PLATFORM, platform_name, platform.platform_id, change_id
@@ -285,7 +355,7 @@ class CommandLineResolver(DataResolver):
         self, data_store, sensor_name, sensor_type, privacy, change_id
     ):
         """
-        This method parses all sensors in the DB, and uses fuzzy search when
+        This method completes the names of all sensors in the DB as the
         user is typing. If user enters a new value, it adds to Sensor table or searches
         for an existing sensor again. If user selects an existing value, it returns the
         selected Sensor entity.
@@ -302,13 +372,12 @@ class CommandLineResolver(DataResolver):
         :type change_id: Integer or UUID
         :return:
         """
-        sensors = data_store.session.query(data_store.db_classes.Sensor).all()
-        completer = [sensor.name for sensor in sensors]
+        completer = self.name_completer(data_store, data_store.db_classes.Sensor)
         choice = create_menu(
             "Please start typing to show suggested values",
             cancel="sensor search",
             choices=[],
-            completer=FuzzyWordCompleter(completer),
+            completer=completer,
         )
         if sensor_name and choice in completer:
             new_choice = create_menu(
@@ -322,6 +391,13 @@ class CommandLineResolver(DataResolver):
                     .filter(data_store.db_classes.Sensor.name == choice)
                     .first()
                 )
+                if sensor is None:
+                    # the choice is a synonym of the sensor
+                    sensor = data_store.synonym_search(
+                        name=choice,
+                        table=data_store.db_classes.Sensor,
+                        pk_field=data_store.db_classes.Sensor.sensor_id,
+                    )
                 # Add it to synonyms and return existing sensor
                 data_store.add_to_synonyms(
                     constants.SENSOR, sensor_name, sensor.sensor_id, change_id
@@ -350,7 +426,7 @@ class CommandLineResolver(DataResolver):
 
     def fuzzy_search_privacy(self, data_store, change_id):
         """
-        This method parses all privacies in the DB, and uses fuzzy search when
+        This method completes the names of all privacies in the DB as the
         user is typing. If user enters a new value, it adds to Privacy table or searches
         for an existing privacy again. If user selects an existing value, it returns the
         selected Privacy entity.
@@ -362,13 +438,12 @@ class CommandLineResolver(DataResolver):
         :return:
         """
 
-        privacies = data_store.session.query(data_store.db_classes.Privacy).all()
-        completer = [p.name for p in privacies]
+        completer = self.name_completer(data_store, data_store.db_classes.Privacy)
         choice = create_menu(
             "Please start typing to show suggested values",
             cancel="classification search",
             choices=[],
-            completer=FuzzyWordCompleter(completer),
+            completer=completer,
         )
         if choice not in completer:
             new_choice = create_menu(
@@ -393,7 +468,7 @@ class CommandLineResolver(DataResolver):
 
     def fuzzy_search_datafile_type(self, data_store, datafile_name, change_id):
         """
-        This method parses all datafile types in the DB, and uses fuzzy search when
+        This method completes the names of all datafile types in the DB as the
         user is typing. If user enters a new value, it adds to DatafileType table or
         searches for an existing privacy again. If user selects an existing value,
         it returns the selected DatafileType entity.
@@ -407,15 +482,12 @@ class CommandLineResolver(DataResolver):
         :return:
         """
 
-        datafile_types = data_store.session.query(
-            data_store.db_classes.DatafileType
-        ).all()
-        completer = [p.name for p in datafile_types]
+        completer = self.name_completer(data_store, data_store.db_classes.DatafileType)
         choice = create_menu(
             "Please start typing to show suggested values",
             cancel="datafile type search",
             choices=[],
-            completer=FuzzyWordCompleter(completer),
+            completer=completer,
         )
         if choice == ".":
             print("-" * 61, "\nReturning to the previous menu\n")
@@ -445,7 +517,7 @@ class CommandLineResolver(DataResolver):
 
     def fuzzy_search_nationality(self, data_store, platform_name, change_id):
         """
-        This method parses all Nationalities in the DB, and uses fuzzy search when
+        This method completes the names of all Nationalities in the DB as the
         user is typing. If user enters a new value, it adds to Nationality table or
         searches for an existing nationality again. If user selects an existing value,
         it returns the selected Nationality entity.
@@ -457,15 +529,12 @@ class CommandLineResolver(DataResolver):
         :type change_id: Integer or UUID
         :return:
         """
-        nationalities = data_store.session.query(
-            data_store.db_classes.Nationality
-        ).all()
-        completer = [n.name for n in nationalities]
+        completer = self.name_completer(data_store, data_store.db_classes.Nationality)
         choice = create_menu(
             "Please start typing to show suggested values",
             cancel="nationality search",
             choices=[],
-            completer=FuzzyWordCompleter(completer),
+            completer=completer,
         )
         if choice == ".":
             print("-" * 61, "\nReturning to the previous menu\n")
@@ -495,7 +564,7 @@ class CommandLineResolver(DataResolver):
 
     def fuzzy_search_platform_type(self, data_store, platform_name, change_id):
         """
-        This method parses all platform types in the DB, and uses fuzzy search when
+        This method completes the names of all platform types in the DB as the
         user is typing. If user enters a new value, it adds to PlatformType table or
         searches for an existing privacy again. If user selects an existing value,
         it returns the selected PlatformType entity.
@@ -507,15 +576,12 @@ class CommandLineResolver(DataResolver):
         :type change_id: Integer or UUID
         :return:
         """
-        platform_types = data_store.session.query(
-            data_store.db_classes.PlatformType
-        ).all()
-        completer = [p.name for p in platform_types]
+        completer = self.name_completer(data_store, data_store.db_classes.PlatformType)
         choice = create_menu(
             "Please start typing to show suggested values",
             cancel="platform type search",
             choices=[],
-            completer=FuzzyWordCompleter(completer),
+            completer=completer,
         )
         if choice == ".":
             print("-" * 61, "\nReturning to the previous menu\n")
@@ -545,7 +611,7 @@ class CommandLineResolver(DataResolver):
 
     def fuzzy_search_sensor_type(self, data_store, sensor_name, change_id):
         """
-        This method parses all sensor types in the DB, and uses fuzzy search when
+        This method completes the names of all sensor types in the DB as the
         user is typing. If user enters a new value, it adds to SensorType table or
         searches for an existing privacy again. If user selects an existing value,
         it returns the selected SensorType entity.
@@ -557,13 +623,12 @@ class CommandLineResolver(DataResolver):
         :type change_id: Integer or UUID
         :return:
         """
-        sensor_types = data_store.session.query(data_store.db_classes.SensorType).all()
-        completer = [sensor_type.name for sensor_type in sensor_types]
+        completer = self.name_completer(data_store, data_store.db_classes.SensorType)
         choice = create_menu(
             "Please start typing to show suggested values",
             cancel="sensor type search",
             choices=[],
-            completer=FuzzyWordCompleter(completer),
+            completer=completer,
         )
         if choice == ".":
             print("-" * 61, "\nReturning to the previous menu\n")
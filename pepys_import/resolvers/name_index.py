@@ -0,0 +1,143 @@
+"""
+Completion of names from an index of their n-grams, for prompting for names among many
+(e.g. the references of hundreds of thousands of datafiles) without comparing the text
+typed to every name on each keystroke.
+"""
+
+import heapq
+
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from prompt_toolkit.completion import Completer, Completion
+
+# Number of names completed
+DEFAULT_LIMIT = 20
+# Number of names of the n-grams counted for a search, after those of the rarest one
+DEFAULT_MAX_POSTINGS = 50000
+
+
+class NameIndex:
+    """
+    Names indexed by their n-grams, the runs of n characters of the names in lower
+    case. The names are padded at the start, so that the first characters of a name
+    and of a text are n-grams of their own, and a text shorter than n characters is
+    found at the start of the names.
+
+    A search counts the n-grams a text shares with the names having its rarest
+    n-grams, and ranks them by the n-grams they share with the text, then by whether
+    they start with or contain it, then by length.
+
+    :param names: Names indexed
+    :type names: Iterable of String
+    :param n: Number of characters of the n-grams
+    :type n: Integer
+    :param max_postings: Number of names of the n-grams counted for a search, after
+        those of the rarest n-gram of the text, the more common n-grams being skipped
+    :type max_postings: Integer
+    """
+
+    def __init__(self, names=(), n=3, max_postings=DEFAULT_MAX_POSTINGS):
+        self.n = n
+        self.max_postings = max_postings
+        # Distinct names, in the order they were added, and their positions
+        self.names = list()
+        self.ids = dict()
+        # Positions of the names having each n-gram
+        self.postings = defaultdict(list)
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def grams(self, text):
+        """Returns the n-grams of a text"""
+        padded = " " * (self.n - 1) + text.lower()
+        return {padded[i : i + self.n] for i in range(len(padded) - self.n + 1)}
+
+    def add(self, name):
+        """Adds a name to the index, unless it is empty or indexed already"""
+        if not name or name in self.ids:
+            return
+        name_id = len(self.names)
+        self.names.append(name)
+        self.ids[name] = name_id
+        for gram in self.grams(name):
+            self.postings[gram].append(name_id)
+
+    def search(self, text, limit=DEFAULT_LIMIT):
+        """
+        Returns the names most similar to a text.
+
+        :param text: Text typed
+        :type text: String
+        :param limit: Maximum number of names returned
+        :type limit: Integer
+        :return: Names, the most similar first, or the first names added if the text
+            is empty
+        :rtype: List of String
+        """
+        if not text:
+            return self.names[:limit]
+        grams = self.grams(text)
+        postings = sorted(
+            (self.postings[gram] for gram in grams if gram in self.postings), key=len
+        )
+        counts = Counter()
+        remaining = self.max_postings
+        for posting in postings:
+            if counts and len(posting) > remaining:
+                break
+            counts.update(posting)
+            remaining -= len(posting)
+        if not counts:
+            return []
+
+        candidates = heapq.nlargest(limit * 5, counts.items(), key=itemgetter(1))
+        lowered = text.lower()
+        scored = list()
+        for name_id, _ in candidates:
+            name = self.names[name_id]
+            lower_name = name.lower()
+            scored.append(
+                (
+                    len(grams & self.grams(name)),
+                    lower_name.startswith(lowered),
+                    lowered in lower_name,
+                    -len(name),
+                    -name_id,
+                )
+            )
+        scored.sort(reverse=True)
+        return [self.names[-score[-1]] for score in scored[:limit]]
+
+
+class NameCompleter(Completer):
+    """
+    Completer of the names of a :class:`NameIndex` most similar to the text before
+    the cursor. A name is in the completer if it is in the index.
+
+    :param index: Names completed
+    :type index: NameIndex
+    :param limit: Maximum number of names completed
+    :type limit: Integer
+    """
+
+    def __init__(self, index, limit=DEFAULT_LIMIT):
+        self.index = index
+        self.limit = limit
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        for name in self.index.search(text, self.limit):
+            yield Completion(name, start_position=-len(text))
@@ -1,11 +1,24 @@
 import os
 import csv
 
+from pepys_import.core.store.csv_loader import CSVLoader
 
-def import_from_csv(data_store, path, files, change_id):
+
+def import_from_csv(data_store, path, files, change_id, bulk=True):
+    """
+    Imports the CSV files to the tables named after them, e.g. ``Platform Types.csv``
+    to PlatformTypes. Tables supported by the :class:`CSVLoader` are loaded in bulk
+    unless bulk is False, the others row by row with the ``add_to_<table>`` method of
+    the :class:`DataStore`.
+    """
+    loader = CSVLoader(data_store, change_id)
     for file in sorted(files):
         # split file into filename and extension
         table_name, _ = os.path.splitext(file)
+        if bulk and loader.can_load(table_name.replace(" ", "")):
+            loader.load_file(os.path.join(path, file), table_name.replace(" ", ""))
+            continue
+
         possible_method = "add_to_" + table_name.lower().replace(" ", "_")
         method_to_call = getattr(data_store, possible_method, None)
         if method_to_call:
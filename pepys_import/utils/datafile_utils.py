@@ -1,4 +1,7 @@
 import hashlib
+import os
+
+from concurrent.futures import ThreadPoolExecutor
 
 BUFFER_SIZE = 8000000  # 1 MB
 
@@ -17,3 +20,23 @@ def hash_file(path):
         data = f.read(BUFFER_SIZE)
         md5.update(data)
     return md5.hexdigest()
+
+
+def hash_files(paths, max_workers=4):
+    """
+    Finds the sizes of many files and hashes them as :func:`hash_file` does, reading
+    the files in concurrent threads
+
+    :param paths: Full paths of the files
+    :type paths: List of String
+    :param max_workers: Maximum number of threads
+    :type max_workers: Integer
+    :return: (size, hashed value) of every file, keyed by path
+    :rtype: Dict
+    """
+
+    def size_and_hash(path):
+        return os.path.getsize(path), hash_file(path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(paths, executor.map(size_and_hash, paths)))
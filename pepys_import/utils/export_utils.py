@@ -0,0 +1,107 @@
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tqdm import tqdm
+
+from pepys_import.core.store.data_store import DataStore
+
+# DataStore of a worker process, created once by init_export_worker
+_worker_data_store = None
+
+
+def export_datafiles(data_store, datafiles, max_workers=None, max_points=None):
+    """
+    Exports the given Datafiles to REP files, in parallel worker processes.
+
+    Every worker has its own :class:`DataStore`, connected to the same database as
+    the given one, and Datafiles are handed out to the workers as they become free.
+    An in-memory SQLite database can't be shared between processes, so its Datafiles
+    are exported one after another, as are all Datafiles if max_workers is 1. The
+    progress is shown with the number of lines written per second.
+
+    The DataStore must not be in a session, every export uses its own.
+
+    :param data_store: DataStore of the database
+    :type data_store: DataStore
+    :param datafiles: Pairs of the ID of a Datafile and the name of its REP file,
+        without extension
+    :type datafiles: List of tuples
+    :param max_workers: Number of worker processes, the number of CPUs by default
+    :type max_workers: Integer
+    :param max_points: Maximum number of states exported for every sensor, see
+        :meth:`DataStore.export_datafile`
+    :type max_points: Integer
+    :return: Number of lines written
+    :rtype: Integer
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(datafiles))
+
+    start = time.perf_counter()
+    lines = 0
+    with tqdm(total=len(datafiles), unit="datafile") as progress:
+
+        def exported(line_count):
+            nonlocal lines
+            lines += line_count
+            elapsed = time.perf_counter() - start
+            progress.set_postfix(lines=lines, lines_per_second=int(lines / elapsed))
+            progress.update()
+
+        in_memory = data_store.db_type == "sqlite" and data_store.db_name == ":memory:"
+        if max_workers <= 1 or in_memory:
+            with data_store.session_scope():
+                for datafile_id, filename in datafiles:
+                    exported(
+                        data_store.export_datafile(
+                            datafile_id, filename, max_points=max_points
+                        )
+                    )
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=init_export_worker,
+                initargs=(connection_parameters(data_store),),
+            ) as executor:
+                futures = [
+                    executor.submit(export_datafile, datafile_id, filename, max_points)
+                    for datafile_id, filename in datafiles
+                ]
+                for future in as_completed(futures):
+                    exported(future.result())
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Exported {len(datafiles)} Datafiles, {lines} lines in {elapsed:.1f}s "
+        f"({lines / elapsed if elapsed else 0:.0f} lines/s)"
+    )
+    return lines
+
+
+def connection_parameters(data_store):
+    """Returns the arguments of :class:`DataStore` to connect to the same database"""
+    return (
+        data_store.db_username,
+        data_store.db_password,
+        data_store.db_host,
+        data_store.db_port,
+        data_store.db_name,
+        data_store.db_type,
+    )
+
+
+def init_export_worker(parameters):
+    """Connects a worker process to the database"""
+    global _worker_data_store
+    _worker_data_store = DataStore(*parameters, welcome_text=None, show_status=False)
+
+
+def export_datafile(datafile_id, filename, max_points):
+    """Exports a Datafile in a worker process, returning the number of lines"""
+    with _worker_data_store.session_scope():
+        return _worker_data_store.export_datafile(
+            datafile_id, filename, max_points=max_points
+        )
@@ -36,6 +36,29 @@ def import_validators(path):
             if file.is_file():
                 classes = import_module_(file)
                 for name, class_ in classes:
-                    print(inspect.signature(class_))
                     validators.append(class_)
     return validators
+
+
+class LazyValidators:
+    """Validators in the given path, imported when they are first used.
+
+    :param path: Path to the directory that has validators
+    :type path: String
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._validators = None
+
+    @property
+    def validators(self):
+        if self._validators is None:
+            self._validators = import_validators(self.path)
+        return self._validators
+
+    def __iter__(self):
+        return iter(self.validators)
+
+    def __len__(self):
+        return len(self.validators)
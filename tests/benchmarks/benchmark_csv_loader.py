@@ -0,0 +1,115 @@
+"""
+Compares the time taken to populate a database from the CSV files of ``default_data``
+row by row with the ``add_to_<table>`` methods and in bulk with the CSVLoader.
+
+The files are repeated ``--scale`` times with distinct names, so the benchmark can be
+run with realistic numbers of rows::
+
+    python -m tests.benchmarks.benchmark_csv_loader --scale 1000
+"""
+
+import argparse
+import csv
+import os
+import shutil
+import tempfile
+import time
+
+from datetime import datetime
+
+from pepys_import.core.store.data_store import DEFAULT_DATA_PATH, DataStore
+from pepys_import.utils.data_store_utils import import_from_csv
+
+REFERENCE_FILES = [
+    "Datafile Types.csv",
+    "Nationalities.csv",
+    "Platform Types.csv",
+    "Privacies.csv",
+    "Sensor Types.csv",
+]
+METADATA_FILES = ["Datafiles.csv", "Platforms.csv", "Sensors.csv"]
+MEASUREMENT_FILES = ["States.csv"]
+
+# Fields of the files holding names, which are made distinct for every copy
+NAME_FIELDS = {
+    "name",
+    "privacy",
+    "file_type",
+    "reference",
+    "file_hash",
+    "nationality",
+    "platform_type",
+    "sensor_type",
+    "host",
+    "sensor",
+    "datafile",
+}
+
+
+def write_scaled_files(source_path, target_path, scale):
+    """Writes the CSV files with their rows repeated scale times"""
+    for file in REFERENCE_FILES + METADATA_FILES + MEASUREMENT_FILES:
+        with open(os.path.join(source_path, file), "r") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            rows = [row for row in reader if row]
+        with open(os.path.join(target_path, file), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for copy in range(scale):
+                for row in rows:
+                    writer.writerow(
+                        [
+                            f"{value}-{copy}" if field in NAME_FIELDS else value
+                            for field, value in zip(header, row)
+                        ]
+                    )
+
+
+def populate(path, bulk):
+    """Populates a new in-memory database, returning the seconds taken"""
+    data_store = DataStore(
+        "",
+        "",
+        "",
+        0,
+        ":memory:",
+        db_type="sqlite",
+        welcome_text=None,
+        show_status=False,
+    )
+    data_store.initialise()
+    start = time.perf_counter()
+    with data_store.session_scope():
+        change_id = data_store.add_to_changes(
+            "BENCHMARK", datetime.utcnow(), "Benchmark"
+        ).change_id
+        for files in (REFERENCE_FILES, METADATA_FILES, MEASUREMENT_FILES):
+            import_from_csv(data_store, path, files, change_id, bulk=bulk)
+    return time.perf_counter() - start
+
+
+def main(scale=100):
+    path = tempfile.mkdtemp()
+    try:
+        write_scaled_files(DEFAULT_DATA_PATH, path, scale)
+        row_by_row = populate(path, bulk=False)
+        bulk = populate(path, bulk=True)
+    finally:
+        shutil.rmtree(path)
+
+    print(f"default_data repeated {scale} times")
+    print(f"add_to_<table> row by row: {row_by_row:.3f}s")
+    print(f"CSVLoader in bulk:         {bulk:.3f}s ({row_by_row / bulk:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scale",
+        help="Number of copies of the rows of default_data",
+        type=int,
+        default=100,
+    )
+    args = parser.parse_args()
+    main(scale=args.scale)
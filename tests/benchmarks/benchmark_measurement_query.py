@@ -0,0 +1,149 @@
+"""
+Compares window queries of the MeasurementQuery with the equivalent ORM queries on a
+synthetic dataset of random-walk tracks::
+
+    python -m tests.benchmarks.benchmark_measurement_query --states 1000000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from datetime import datetime, timedelta
+
+from pepys_import.core.formats import unit_registry
+from pepys_import.core.formats.location import Location
+from pepys_import.core.store.data_store import DataStore
+from pepys_import.core.store.measurement_buffer import StateColumns
+
+START_TIME = datetime(2020, 1, 1)
+PLATFORMS = 20
+
+
+def create_data_store(path, states):
+    """Creates a SQLite database with the given number of States"""
+    data_store = DataStore(
+        "",
+        "",
+        "",
+        0,
+        os.path.join(path, "benchmark.db"),
+        db_type="sqlite",
+        welcome_text=None,
+        show_status=False,
+    )
+    data_store.initialise()
+    random.seed(0)
+    with data_store.session_scope():
+        change_id = data_store.add_to_changes(
+            "BENCHMARK", datetime.utcnow(), "Benchmark"
+        ).change_id
+        privacy = data_store.add_to_privacies("PRIVACY", change_id)
+        nationality = data_store.add_to_nationalities("NATIONALITY", change_id).name
+        platform_type = data_store.add_to_platform_types("TYPE", change_id).name
+        sensor_type = data_store.add_to_sensor_types("GPS", change_id)
+        datafile = data_store.get_datafile("benchmark", "csv", 0, "HASH", change_id)
+
+        columns = StateColumns(data_store.db_classes.State, datafile.datafile_id)
+        for number in range(PLATFORMS):
+            platform = data_store.get_platform(
+                platform_name=f"PLATFORM-{number}",
+                nationality=nationality,
+                platform_type=platform_type,
+                privacy=privacy.name,
+                change_id=change_id,
+            )
+            sensor = platform.get_sensor(
+                data_store, "GPS", sensor_type, change_id=change_id
+            )
+            latitude = random.uniform(-60, 60)
+            longitude = random.uniform(-170, 170)
+            for second in range(states // PLATFORMS):
+                latitude += random.uniform(-0.001, 0.001)
+                longitude += random.uniform(-0.001, 0.001)
+                location = Location()
+                location.set_latitude_decimal_degrees(latitude)
+                location.set_longitude_decimal_degrees(longitude)
+                record = columns.append(
+                    START_TIME + timedelta(seconds=second),
+                    sensor_name="GPS",
+                    platform_name=platform.name,
+                    sensor_id=sensor.sensor_id,
+                    privacy_id=privacy.privacy_id,
+                )
+                record.location = location
+                record.speed = 5 * (unit_registry.metre / unit_registry.second)
+        columns.commit(data_store, change_id)
+    return data_store
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main(states=200000):
+    path = tempfile.mkdtemp()
+    try:
+        data_store = create_data_store(path, states)
+        end = START_TIME + timedelta(seconds=states // PLATFORMS // 10)
+        with data_store.session_scope():
+            query = data_store.measurement_query
+            State = data_store.db_classes.State
+
+            window, window_time = timed(
+                lambda: sum(len(batch) for batch in query.states(START_TIME, end))
+            )
+            orm_window, orm_window_time = timed(
+                lambda: len(
+                    data_store.session.query(State)
+                    .filter(State.time >= START_TIME, State.time <= end)
+                    .all()
+                )
+            )
+
+            def orm_track():
+                platform = data_store.search_platform("PLATFORM-0")
+                sensors = data_store.session.query(data_store.db_classes.Sensor)
+                sensor_ids = [
+                    sensor.sensor_id
+                    for sensor in sensors.filter_by(host=platform.platform_id)
+                ]
+                return [
+                    (state.time, state.location.latitude, state.location.longitude)
+                    for state in data_store.session.query(State)
+                    .filter(State.sensor_id.in_(sensor_ids))
+                    .order_by(State.time)
+                ]
+
+            track, track_time = timed(lambda: len(query.track("PLATFORM-0")))
+            orm_track_rows, orm_track_time = timed(lambda: len(orm_track()))
+            decimated, decimated_time = timed(
+                lambda: len(
+                    query.track("PLATFORM-0", max_points=1000, method="douglas-peucker")
+                )
+            )
+    finally:
+        shutil.rmtree(path)
+
+    print(f"{states} States of {PLATFORMS} platforms")
+    print(f"Time window, {window} States:")
+    print(f"  MeasurementQuery: {window_time:.3f}s")
+    print(f"  ORM:              {orm_window_time:.3f}s ({orm_window} States)")
+    print(f"Track of a platform, {track} States:")
+    print(f"  MeasurementQuery: {track_time:.3f}s")
+    print(f"  ORM:              {orm_track_time:.3f}s ({orm_track_rows} States)")
+    print(f"  Douglas-Peucker:  {decimated_time:.3f}s ({decimated} States)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--states", help="Number of States in the database", type=int, default=200000
+    )
+    args = parser.parse_args()
+    main(states=args.states)
@@ -0,0 +1,61 @@
+"""
+Compares the time taken to complete the text typed in a prompt among many datafile
+names, by fuzzy matching every name and from an index of their n-grams::
+
+    python -m tests.benchmarks.benchmark_name_index --names 200000
+"""
+
+import argparse
+import random
+import time
+
+from prompt_toolkit.completion import CompleteEvent, FuzzyWordCompleter
+from prompt_toolkit.document import Document
+
+from pepys_import.resolvers.name_index import NameCompleter, NameIndex
+
+WORDS = ["track", "sensor", "ferry", "frigate", "narrative", "gpx", "etrac", "rep"]
+
+
+def datafile_names(count, seed=1):
+    random.seed(seed)
+    return [
+        f"{random.choice(WORDS)}_{random.choice(WORDS)}_{number:06d}.{random.choice(WORDS)}"
+        for number in range(count)
+    ]
+
+
+def time_per_keystroke(completer, text):
+    """Returns the time taken to complete every prefix of the text, in milliseconds"""
+    times = list()
+    for end in range(1, len(text) + 1):
+        document = Document(text[:end])
+        start = time.perf_counter()
+        list(completer.get_completions(document, CompleteEvent()))
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main(names=200000):
+    values = datafile_names(names)
+    text = values[names // 2]
+
+    start = time.perf_counter()
+    index = NameIndex(values)
+    build = time.perf_counter() - start
+    print(f"{names} names, index built in {build:.1f} s")
+
+    fuzzy = time_per_keystroke(FuzzyWordCompleter(values), text)
+    indexed = time_per_keystroke(NameCompleter(index), text)
+    print(f"Completing '{text}', milliseconds per keystroke")
+    print(f"fuzzy   mean: {sum(fuzzy) / len(fuzzy):8.1f}  max: {max(fuzzy):8.1f}")
+    print(f"indexed mean: {sum(indexed) / len(indexed):8.1f}  max: {max(indexed):8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--names", help="Number of datafile names", type=int, default=200000
+    )
+    args = parser.parse_args()
+    main(names=args.names)
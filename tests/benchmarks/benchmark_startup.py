@@ -0,0 +1,61 @@
+"""
+Measures the startup of the command line tools with ``python -X importtime``, which
+reports the time taken to import every module in microseconds::
+
+    python -m tests.benchmarks.benchmark_startup --top 20
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+from paths import ROOT_DIRECTORY
+
+# Modules imported by pepys_import/import.py before it starts importing files
+STARTUP_MODULES = ["config", "pepys_import.file.file_processor"]
+
+
+def import_times(modules=STARTUP_MODULES):
+    """
+    Imports the modules in a new interpreter, returning the self and cumulative
+    import times of every module imported, in microseconds.
+
+    :param modules: Names of the modules to import
+    :type modules: List
+    :return: (self time, cumulative time) keyed by module name
+    :rtype: Dict
+    """
+    environment = dict(os.environ, PYTHONPATH=ROOT_DIRECTORY)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=ROOT_DIRECTORY,
+        env=environment,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    times = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative_time, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_time), int(cumulative_time))
+    return times
+
+
+def main(top=20):
+    times = import_times()
+    total = sum(self_time for self_time, _ in times.values())
+    print(f"Startup imports {len(times)} modules in {total / 1000:.0f}ms")
+    print("Slowest modules, by cumulative import time:")
+    slowest = sorted(times.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (_, cumulative_time) in slowest[:top]:
+        print(f"  {cumulative_time / 1000:8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", help="Number of modules to list", type=int, default=20)
+    args = parser.parse_args()
+    main(top=args.top)
@@ -0,0 +1,68 @@
+"""
+Compares the time taken to split long lines into fields with the regular expressions
+of :class:`Line` and with the tokenizer, for comma separated lines with and without
+quoted fields and for lines separated by whitespace::
+
+    python -m tests.benchmarks.benchmark_tokenizer --fields 200
+"""
+
+import argparse
+import re
+import timeit
+
+from pepys_import.file.highlighter.support.line import Line
+from pepys_import.file.highlighter.support.tokenizer import csv_spans, whitespace_spans
+
+
+def regex_spans(reg_exp, strip_char=""):
+    """Returns a function splitting a line as Line.tokens does"""
+
+    def split(text):
+        spans = []
+        for match in re.finditer(reg_exp, text):
+            token_str = match.group()
+            if strip_char != "":
+                if token_str.find(strip_char) == 0:
+                    token_str = token_str[1:]
+                token_str = token_str.strip()
+            spans.append((match.span(), token_str))
+        return spans
+
+    return split
+
+
+def time_per_line(split, text, number):
+    """Returns the fastest time taken to split the line, in microseconds"""
+    return (
+        min(timeit.repeat(lambda: split(text), number=number, repeat=5)) / number * 1e6
+    )
+
+
+def main(fields=200, number=2000):
+    values = [f"{index * 1.5:.2f}" for index in range(fields)]
+    lines = {
+        "CSV": ("$POSL,POS," + ",".join(values), Line.CSV_DELIM, ",", csv_spans),
+        "quoted CSV": (
+            '$POSL,"POS,GPS",' + ",".join(values),
+            Line.CSV_DELIM,
+            ",",
+            csv_spans,
+        ),
+        "whitespace": (" ".join(values), Line.WHITESPACE_DELIM, "", whitespace_spans),
+    }
+    print(f"Lines of {fields} fields, microseconds per line")
+    for name, (text, reg_exp, strip_char, tokenizer) in lines.items():
+        regex = time_per_line(regex_spans(reg_exp, strip_char), text, number)
+        fast = time_per_line(tokenizer, text, number)
+        print(
+            f"{name:<12} regex: {regex:8.1f}  tokenizer: {fast:8.1f} ({regex / fast:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--fields", help="Number of fields of every line", type=int, default=200
+    )
+    args = parser.parse_args()
+    main(fields=args.fields)
@@ -36,6 +36,7 @@ class ConfigVariablesTestCase(unittest.TestCase):
         assert config.LOCAL_PARSERS == "path/to/parser"
         assert config.LOCAL_BASIC_TESTS == "path/to/basic/tests"
         assert config.LOCAL_ENHANCED_TESTS == "path/to/enhanced/tests"
+        assert config.LOCAL_CACHE == "path/to/cache"
 
     @patch.dict(os.environ, {"PEPYS_CONFIG_FILE": BAD_IMPORTER_PATH})
     def test_wrong_file_path(self):
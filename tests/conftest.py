@@ -0,0 +1,20 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_directory():
+    """Keeps the manifests of the importers written by the tests in a temporary
+    directory rather than in the cache of the user"""
+    directory = tempfile.mkdtemp()
+    previous = os.environ.get("XDG_CACHE_HOME")
+    os.environ["XDG_CACHE_HOME"] = directory
+    yield directory
+    if previous is None:
+        del os.environ["XDG_CACHE_HOME"]
+    else:
+        os.environ["XDG_CACHE_HOME"] = previous
+    shutil.rmtree(directory)
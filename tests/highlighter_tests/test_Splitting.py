@@ -91,3 +91,25 @@ class SimpleTests(unittest.TestCase):
         self.assertEqual("951212", tokens[2].text)
         self.assertEqual("050300.000", tokens[3].text)
         self.assertEqual("BRAVO", tokens[4].text)
+
+    def test_TokensCreatedWhenAccessed(self):
+        data_file = HighlightedFile(DATA_FILE)
+        line = data_file.lines()[0]
+
+        tokens = line.tokens()
+        self.assertEqual([None] * 7, tokens.created)
+
+        third_token = tokens[2]
+        self.assertIs(third_token, tokens[-5])
+        self.assertIs(third_token, line.tokens()[2])
+        self.assertEqual(1, sum(token is not None for token in tokens.created))
+        self.assertEqual(["MONDEO_44", "@C"], [token.text for token in tokens[2:4]])
+
+    def test_SlottedTokens(self):
+        data_file = HighlightedFile(DATA_FILE)
+        line = data_file.lines()[0]
+        token = line.tokens()[0]
+
+        for obj in (line, token, token.children[0]):
+            with self.assertRaises(AttributeError):
+                obj.extra = None
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pepys_import.file.highlighter.highlighter import HighlightedFile
+from pepys_import.file.highlighter.support.line_reader import LineReader
+
+path = os.path.abspath(__file__)
+dir_path = os.path.dirname(path)
+DATA_FILE = os.path.join(dir_path, "sample_files/file.txt")
+REP_FILE = os.path.join(dir_path, "sample_files/reptest1.rep")
+
+
+class LineReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, contents):
+        filename = os.path.join(self.directory, "file.txt")
+        with open(filename, "wb") as f:
+            f.write(contents)
+        return filename
+
+    def test_same_lines_as_text_mode(self):
+        for filename in (DATA_FILE, REP_FILE):
+            with open(filename, "r") as f:
+                expected = f.read().splitlines()
+            with LineReader(filename) as reader:
+                self.assertEqual(list(reader), expected)
+                self.assertEqual(len(reader), len(expected))
+
+    def test_random_access(self):
+        with LineReader(self.write(b"first\r\nsecond\r\nthird")) as reader:
+            self.assertEqual(reader[2], "third")
+            self.assertEqual(reader[0], "first")
+            self.assertEqual(reader[-2], "second")
+            self.assertEqual(reader[1:], ["second", "third"])
+            self.assertEqual(reader.byte_offset(2), 15)
+            self.assertEqual(reader.char_offset(2), 13)
+            self.assertFalse(reader.ends_with_newline)
+            with self.assertRaises(IndexError):
+                reader[3]
+
+    def test_empty_lines(self):
+        with LineReader(self.write(b"\n\nlast\n")) as reader:
+            self.assertEqual(list(reader), ["", "", "last"])
+            self.assertTrue(reader.ends_with_newline)
+
+    def test_empty_file(self):
+        with LineReader(self.write(b"")) as reader:
+            self.assertEqual(len(reader), 0)
+            self.assertEqual(list(reader), [])
+
+    def test_max_lines(self):
+        with LineReader(self.write(b"1\n2\n3\n"), max_lines=2) as reader:
+            self.assertEqual(list(reader), ["1", "2"])
+
+    def test_char_offsets_of_multibyte_characters(self):
+        filename = self.write("12°\n£3\nx".encode("utf-8"))
+        with LineReader(filename, encoding="utf-8") as reader:
+            self.assertEqual(reader.char_offset(2), 7)
+            self.assertEqual(reader[1], "£3")
+
+    def test_decoding_errors(self):
+        filename = self.write(b"abc\n\x81\x8d\x8f\n")
+        with LineReader(filename, encoding="windows-1252") as reader:
+            self.assertEqual(reader[0], "abc")
+            with self.assertRaises(UnicodeDecodeError):
+                reader[1]
+        with LineReader(filename, encoding="windows-1252", errors="replace") as reader:
+            self.assertEqual(list(reader), ["abc", "\ufffd\ufffd\ufffd"])
+
+    def test_highlighted_offsets_after_multibyte_characters(self):
+        filename = self.write("12°\r\nabc def\r\n".encode("utf-8"))
+        highlighted_file = HighlightedFile(filename)
+        highlighted_file.line_reader().encoding = "utf-8"
+        lines = highlighted_file.lines()
+        token = lines[1].tokens()[1]
+        token.record("tool", "field", "value")
+
+        chars = highlighted_file.chars_debug()
+        self.assertEqual("".join(char.letter for char in chars), "12°\nabc def\n")
+        used = "".join(char.letter for char in chars if char.usages)
+        self.assertEqual(used, "def")
+        highlighted_file.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
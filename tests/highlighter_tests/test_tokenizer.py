@@ -0,0 +1,77 @@
+import csv
+import os
+import re
+import unittest
+
+from pepys_import.file.highlighter.highlighter import HighlightedFile
+from pepys_import.file.highlighter.support.line import Line
+from pepys_import.file.highlighter.support.tokenizer import csv_spans, whitespace_spans
+
+path = os.path.abspath(__file__)
+dir_path = os.path.dirname(path)
+REP_FILE = os.path.join(dir_path, "sample_files/reptest1.rep")
+NMEA_FILE = os.path.join(dir_path, "sample_files/NMEA_out.txt")
+
+
+class TokenizerTests(unittest.TestCase):
+    def test_csv_spans(self):
+        self.assertEqual(
+            csv_spans("a,b,,c"),
+            [((0, 1), "a"), ((2, 3), "b"), ((4, 4), ""), ((5, 6), "c")],
+        )
+        self.assertEqual(
+            csv_spans(",a, b "), [((0, 0), ""), ((1, 2), "a"), ((3, 6), "b")]
+        )
+        self.assertEqual(csv_spans(""), [((0, 0), "")])
+
+    def test_csv_spans_of_quoted_fields(self):
+        self.assertEqual(
+            csv_spans('a,"x,""y""",b'),
+            [((0, 1), "a"), ((3, 10), 'x,"y"'), ((12, 13), "b")],
+        )
+        self.assertEqual(csv_spans('"",b"c'), [((1, 1), ""), ((3, 6), 'b"c')])
+        self.assertEqual(csv_spans('"unterminated,x'), [((1, 15), "unterminated,x")])
+
+    def test_csv_spans_match_csv_module(self):
+        for text in ['a,"b"c,d', '"x,y",', 'a,"",b', '1,"2"', " 1 , 2 "]:
+            expected = [field.strip() for field in next(csv.reader([text]))]
+            self.assertEqual([field for _, field in csv_spans(text)], expected)
+
+    def test_whitespace_spans_match_regex(self):
+        for text in ["", "  a  bb\tccc ", "100112 120800 SUBJECT VC 60 23 40.25 N"]:
+            expected = [
+                (match.span(), match.group())
+                for match in re.finditer(Line.WHITESPACE_DELIM, text)
+            ]
+            self.assertEqual(whitespace_spans(text), expected)
+
+    def test_csv_tokens_match_csv_delim(self):
+        lines = HighlightedFile(NMEA_FILE).lines()
+        for line in lines[:500]:
+            self.assertEqual(
+                [token.text for token in line.csv_tokens()],
+                [token.text for token in line.tokens(line.CSV_DELIM, ",")],
+            )
+
+    def test_csv_tokens_are_highlighted_without_delimiters(self):
+        highlighted_file = HighlightedFile(NMEA_FILE, 1)
+        line = highlighted_file.lines()[0]
+        token = line.csv_tokens()[1]
+        self.assertIs(line.csv_tokens()[1], token)
+        token.record("tool", "field", "value")
+
+        chars = highlighted_file.chars_debug()
+        used = "".join(char.letter for char in chars if char.usages)
+        self.assertEqual(used, token.text)
+
+    def test_whitespace_tokens_have_regex_spans(self):
+        for line in HighlightedFile(REP_FILE).lines():
+            spans = [token.children[0].span for token in line.tokens()]
+            expected = [
+                match.span() for match in re.finditer(Line.WHITESPACE_DELIM, line.text)
+            ]
+            self.assertEqual(spans, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+
+from pepys_import.core.store.data_store import DataStore
+from pepys_import.file.file_processor import FileProcessor
+from pepys_import.resolvers.batch_resolver import BatchResolver
+from pepys_import.resolvers.default_resolver import DefaultResolver
+
+FILE_PATH = os.path.dirname(__file__)
+REP_DATA_PATH = os.path.join(FILE_PATH, "sample_data", "track_files", "rep_data")
+
+
+class RecordingResolver(DefaultResolver):
+    """Default resolver recording what it is asked, which names platforms after
+    the name they were missing as"""
+
+    def __init__(self, events):
+        self.events = events
+
+    def resolve_platform(
+        self, data_store, platform_name, platform_type, nationality, privacy, change_id
+    ):
+        self.events.append(("platform", platform_name))
+        resolved_data = super().resolve_platform(
+            data_store, platform_name, platform_type, nationality, privacy, change_id
+        )
+        return (f"{platform_name}-RESOLVED",) + resolved_data[1:]
+
+    def resolve_sensor(self, data_store, sensor_name, sensor_type, privacy, change_id):
+        self.events.append(("sensor", sensor_name))
+        return super().resolve_sensor(
+            data_store, sensor_name, sensor_type, privacy, change_id
+        )
+
+    def resolve_privacy(self, data_store, change_id):
+        self.events.append(("privacy", None))
+        return super().resolve_privacy(data_store, change_id)
+
+    def resolve_datafile(
+        self, data_store, datafile_name, datafile_type, privacy, change_id
+    ):
+        self.events.append(("datafile", datafile_name))
+        return super().resolve_datafile(
+            data_store, datafile_name, datafile_type, privacy, change_id
+        )
+
+
+class RecordingFileProcessor(FileProcessor):
+    """File processor recording when it starts processing a file"""
+
+    def __init__(self, events):
+        super().__init__(archive=False)
+        self.events = events
+
+    def process_file(self, file, current_path, data_store, processed_ctr):
+        self.events.append(("file", os.path.basename(file)))
+        return super().process_file(file, current_path, data_store, processed_ctr)
+
+
+class BatchResolverTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.events = list()
+        self.resolver = BatchResolver(RecordingResolver(self.events))
+        self.store = DataStore(
+            "",
+            "",
+            "",
+            0,
+            ":memory:",
+            db_type="sqlite",
+            missing_data_resolver=self.resolver,
+        )
+        self.store.initialise()
+        with self.store.session_scope():
+            self.change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+
+    def test_privacy_resolved_once(self):
+        with self.store.session_scope():
+            first = self.resolver.resolve_privacy(self.store, self.change_id)
+            self.assertIs(
+                self.resolver.resolve_privacy(self.store, self.change_id), first
+            )
+        with self.store.session_scope():
+            privacy = self.resolver.resolve_privacy(self.store, self.change_id)
+            self.assertEqual(privacy.name, "PRIVACY-1")
+            self.assertIn(privacy, self.store.session)
+        self.assertEqual(self.events, [("privacy", None)])
+
+    def test_platform_resolved_once(self):
+        with self.store.session_scope():
+            platform = self.store.get_platform("SHIP", change_id=self.change_id)
+            self.assertEqual(platform.name, "SHIP-RESOLVED")
+        with self.store.session_scope():
+            platform = self.store.get_platform("SHIP", change_id=self.change_id)
+            self.assertEqual(platform.name, "SHIP-RESOLVED")
+            self.store.get_platform(None, change_id=self.change_id)
+            self.store.get_platform(None, change_id=self.change_id)
+        self.assertEqual(
+            self.events,
+            [("platform", "SHIP"), ("platform", None), ("platform", None)],
+        )
+
+    def test_sensor_resolved_once(self):
+        with self.store.session_scope():
+            first = self.resolver.resolve_sensor(
+                self.store, "GPS", None, None, self.change_id
+            )
+            second = self.resolver.resolve_sensor(
+                self.store, "GPS", None, None, self.change_id
+            )
+            self.assertEqual(second[0], first[0])
+            self.assertEqual(second[1].name, first[1].name)
+            self.assertEqual(second[2].name, first[2].name)
+        sensors = [event for event in self.events if event[0] == "sensor"]
+        self.assertEqual(sensors, [("sensor", "GPS")])
+
+    def test_datafile_resolved_once_per_type(self):
+        with self.store.session_scope():
+            self.store.get_datafile("first.rep", ".rep", 0, "1", self.change_id)
+            second = self.store.get_datafile(
+                "second.rep", ".rep", 0, "2", self.change_id
+            )
+            self.store.get_datafile("third.dsf", ".dsf", 0, "3", self.change_id)
+            self.assertEqual(second.reference, "second.rep")
+        self.assertEqual(
+            self.events, [("datafile", "first.rep"), ("datafile", "third.dsf")]
+        )
+
+
+class PrescanTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.events = list()
+        self.resolver = RecordingResolver(self.events)
+        self.store = DataStore(
+            "",
+            "",
+            "",
+            0,
+            ":memory:",
+            db_type="sqlite",
+            missing_data_resolver=self.resolver,
+        )
+        self.store.initialise()
+
+    def test_names_resolved_before_loading(self):
+        processor = RecordingFileProcessor(self.events)
+        processor.load_importers_dynamically()
+        with redirect_stdout(StringIO()):
+            processor.process(REP_DATA_PATH, self.store, False, prescan=True)
+
+        first_file = self.events.index(next(e for e in self.events if e[0] == "file"))
+        asked = [event for event in self.events if event[0] != "file"]
+        self.assertEqual(
+            [event for event in self.events[first_file:] if event[0] != "file"], []
+        )
+        self.assertEqual(asked.count(("privacy", None)), 1)
+        self.assertEqual(
+            sorted(
+                os.path.splitext(name)[1] for kind, name in asked if kind == "datafile"
+            ),
+            [".dsf", ".rep"],
+        )
+        platforms = [name for kind, name in asked if kind == "platform"]
+        self.assertEqual(len(platforms), len(set(platforms)))
+        self.assertIn("SENSOR", platforms)
+
+        # the resolver given is restored after the import
+        self.assertIs(self.store.missing_data_resolver, self.resolver)
+        with self.store.session_scope():
+            self.assertIsNotNone(self.store.search_platform("SENSOR-RESOLVED"))
+
+    def test_quoted_names_resolved_before_loading(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(directory, "quoted.rep"), "w") as f:
+                f.write(
+                    '100112 115800 "NELSON" VC 60 23 40.25 N 000 01 25.86 E '
+                    "109.08  6.00  0.00\n"
+                    ';SENSOR:\t100112\t115800.000\t"NELSON"\t@A\tNULL\t80\t12496'
+                    "\tNELSON_Optic some message\n"
+                    ';NARRATIVE: 100112 115800 "NELSON" Contact detected on TA\n'
+                )
+            processor = RecordingFileProcessor(self.events)
+            processor.load_importers_dynamically()
+            with redirect_stdout(StringIO()):
+                processor.process(directory, self.store, False, prescan=True)
+        finally:
+            shutil.rmtree(directory)
+
+        # the names are resolved without their quotes, once, before the file is loaded
+        platforms = [name for kind, name in self.events if kind == "platform"]
+        self.assertEqual(platforms, ["NELSON"])
+        self.assertEqual(self.events[-1], ("file", "quoted.rep"))
+        with self.store.session_scope():
+            names = [
+                platform.name
+                for platform in self.store.session.query(self.store.db_classes.Platform)
+            ]
+            self.assertEqual(names, ["NELSON-RESOLVED"])
+
+
+if __name__ == "__main__":
+    unittest.main()
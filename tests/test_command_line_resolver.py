@@ -6,6 +6,7 @@ from io import StringIO
 from unittest.mock import patch
 
 from pepys_import.resolvers.command_line_resolver import CommandLineResolver
+from pepys_import.core.store import constants
 from pepys_import.core.store.data_store import DataStore
 
 DIR_PATH = os.path.dirname(__file__)
@@ -484,6 +485,74 @@ class PlatformTestCase(unittest.TestCase):
 
             self.assertEqual(platform.platform_id, synonym_platform.platform_id)
 
+    @patch("pepys_import.resolvers.command_line_resolver.create_menu")
+    def test_fuzzy_search_platform_by_synonym(self, menu_prompt):
+        """Test whether a synonym of a platform is completed and selects the platform"""
+
+        # Search "PLATFORM-SYNONYM"->Select "Yes"
+        menu_prompt.side_effect = ["PLATFORM-SYNONYM", "1"]
+        with self.store.session_scope():
+            privacy = self.store.add_to_privacies("PRIVACY-1", self.change_id)
+            platform_type = self.store.add_to_platform_types("Warship", self.change_id)
+            nationality = self.store.add_to_nationalities("UK", self.change_id)
+            platform = self.store.get_platform(
+                "PLATFORM-1",
+                nationality=nationality.name,
+                platform_type=platform_type.name,
+                privacy=privacy.name,
+                change_id=self.change_id,
+            )
+            self.store.add_to_synonyms(
+                constants.PLATFORM,
+                "PLATFORM-SYNONYM",
+                platform.platform_id,
+                self.change_id,
+            )
+
+            synonym_platform = self.resolver.fuzzy_search_platform(
+                self.store,
+                "TEST",
+                nationality=nationality.name,
+                platform_type=platform_type.name,
+                privacy=privacy.name,
+                change_id=self.change_id,
+            )
+            self.assertEqual(platform.platform_id, synonym_platform.platform_id)
+
+    def test_platform_names_indexed_once_per_session(self):
+        """Test whether the names of the platforms added after the index of their
+        names is built are indexed when the session is flushed"""
+        with self.store.session_scope():
+            privacy = self.store.add_to_privacies("PRIVACY-1", self.change_id)
+            platform_type = self.store.add_to_platform_types("Warship", self.change_id)
+            nationality = self.store.add_to_nationalities("UK", self.change_id)
+            self.store.get_platform(
+                "PLATFORM-1",
+                trigraph="PL1",
+                nationality=nationality.name,
+                platform_type=platform_type.name,
+                privacy=privacy.name,
+                change_id=self.change_id,
+            )
+            Platform = self.store.db_classes.Platform
+            index = self.resolver.name_index(self.store, Platform)
+            self.assertEqual(list(index), ["PLATFORM-1", "PL1"])
+
+            self.store.get_platform(
+                "FRIGATE",
+                nationality=nationality.name,
+                platform_type=platform_type.name,
+                privacy=privacy.name,
+                change_id=self.change_id,
+            )
+            self.store.session.flush()
+            self.assertIs(self.resolver.name_index(self.store, Platform), index)
+            self.assertEqual(index.search("frig"), ["FRIGATE"])
+
+        with self.store.session_scope():
+            index = self.resolver.name_index(self.store, Platform)
+            self.assertEqual(list(index), ["PLATFORM-1", "PL1", "FRIGATE"])
+
     @patch("pepys_import.resolvers.command_line_input.prompt")
     @patch("pepys_import.resolvers.command_line_resolver.prompt")
     def test_fuzzy_search_add_new_platform(self, resolver_prompt, menu_prompt):
@@ -0,0 +1,226 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from unittest import TestCase
+
+from pepys_import.core.store import constants
+from pepys_import.core.store.csv_loader import CSVLoader, copy_value
+from pepys_import.core.store.data_store import DataStore
+from pepys_import.utils.data_store_utils import import_from_csv
+
+FILE_PATH = os.path.dirname(__file__)
+TEST_DATA_PATH = os.path.join(FILE_PATH, "sample_data", "csv_files")
+# Files of the reference, metadata and measurement tables, in the order of loading
+CSV_FILES = [
+    [
+        "Datafile Types.csv",
+        "Nationalities.csv",
+        "Platform Types.csv",
+        "Privacies.csv",
+        "Sensor Types.csv",
+    ],
+    ["Datafiles.csv", "Platforms.csv", "Sensors.csv"],
+    ["States.csv"],
+]
+
+
+def table_contents(store):
+    """Returns the rows of the populated tables, with the IDs replaced by names"""
+    db_classes = store.db_classes
+    sensors = {
+        s.sensor_id: s.name for s in store.session.query(db_classes.Sensor).all()
+    }
+    datafiles = {
+        d.datafile_id: d.reference for d in store.session.query(db_classes.Datafile)
+    }
+    privacies = {
+        p.privacy_id: p.name for p in store.session.query(db_classes.Privacy).all()
+    }
+    platforms = {
+        p.platform_id: p.name for p in store.session.query(db_classes.Platform).all()
+    }
+    return {
+        "nationalities": sorted(
+            n.name for n in store.session.query(db_classes.Nationality).all()
+        ),
+        "platforms": sorted(platforms.values()),
+        "sensors": sorted(
+            (s.name, platforms[s.host])
+            for s in store.session.query(db_classes.Sensor).all()
+        ),
+        "datafiles": sorted(
+            (d.reference, privacies[d.privacy_id], d.size, d.hash)
+            for d in store.session.query(db_classes.Datafile).all()
+        ),
+        "states": sorted(
+            (
+                s.time,
+                sensors[s.sensor_id],
+                datafiles[s.source_id],
+                privacies[s.privacy_id],
+                s.elevation.magnitude,
+            )
+            for s in store.session.query(db_classes.State).all()
+        ),
+        "logs": store.session.query(db_classes.Log).count(),
+    }
+
+
+class CSVLoaderTestCase(TestCase):
+    def setUp(self):
+        self.store = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+        self.store.initialise()
+        with self.store.session_scope():
+            self.change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+
+    def tearDown(self):
+        pass
+
+    def test_bulk_load_matches_row_by_row_load(self):
+        """Test whether the bulk loader inserts the same rows as add_to_<table>"""
+        with self.store.session_scope():
+            for files in CSV_FILES:
+                import_from_csv(self.store, TEST_DATA_PATH, files, self.change_id)
+        with self.store.session_scope():
+            bulk_contents = table_contents(self.store)
+
+        legacy_store = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+        legacy_store.initialise()
+        with legacy_store.session_scope():
+            change_id = legacy_store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+            for files in CSV_FILES:
+                import_from_csv(
+                    legacy_store, TEST_DATA_PATH, files, change_id, bulk=False
+                )
+        with legacy_store.session_scope():
+            legacy_contents = table_contents(legacy_store)
+
+        self.assertEqual(len(bulk_contents["states"]), 2)
+        self.assertEqual(bulk_contents, legacy_contents)
+
+    def test_reference_names_are_not_duplicated(self):
+        """Test whether existing names of reference tables are skipped"""
+        with self.store.session_scope():
+            self.store.add_to_privacies("PRIVACY-1", self.change_id)
+            loader = CSVLoader(self.store, self.change_id)
+            inserted = loader.load_file(
+                os.path.join(TEST_DATA_PATH, "Privacies.csv"), constants.PRIVACY
+            )
+            self.assertEqual(inserted, 1)
+            privacies = self.store.session.query(self.store.db_classes.Privacy).all()
+            self.assertEqual(
+                sorted(p.name for p in privacies), ["PRIVACY-1", "PRIVACY-2"]
+            )
+
+    def test_missing_reference_raises(self):
+        """Test whether a name which can't be resolved is reported"""
+        with self.store.session_scope():
+            loader = CSVLoader(self.store, self.change_id)
+            with self.assertRaises(Exception) as context:
+                loader.load_file(
+                    os.path.join(TEST_DATA_PATH, "Sensors.csv"), constants.SENSOR
+                )
+            self.assertIn("SENSOR-TYPE-1", str(context.exception))
+
+    def test_errors_report_lines_of_the_file(self):
+        """Test whether errors give the line of the row after blank lines and rows
+        spanning several lines"""
+        path = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(path, "Platforms.csv")
+            with open(file_path, "w") as f:
+                f.write(
+                    "name,nationality,platform_type,privacy\n"
+                    '"PLATFORM\n1",UNITED KINGDOM,TYPE-1,PRIVACY-1\n'
+                    "\n"
+                    "PLATFORM-2,NOWHERE,TYPE-2,PRIVACY-2\n"
+                )
+            with self.store.session_scope():
+                import_from_csv(
+                    self.store, TEST_DATA_PATH, CSV_FILES[0], self.change_id
+                )
+                loader = CSVLoader(self.store, self.change_id)
+                with self.assertRaises(Exception) as context:
+                    loader.load_file(file_path, constants.PLATFORM)
+                self.assertIn("NOWHERE", str(context.exception))
+                self.assertIn("(line 5)", str(context.exception))
+        finally:
+            shutil.rmtree(path)
+
+    def test_data_store_caches_are_invalidated(self):
+        """Test whether the names inserted are dropped from the DataStore caches"""
+        with self.store.session_scope():
+            import_from_csv(self.store, TEST_DATA_PATH, CSV_FILES[0], self.change_id)
+            self.store.add_to_platforms(
+                "PLATFORM-1",
+                "UNITED KINGDOM",
+                "TYPE-1",
+                "PRIVACY-1",
+                change_id=self.change_id,
+            )
+            self.store.add_to_platforms(
+                "PLATFORM-3",
+                "UNITED KINGDOM",
+                "TYPE-1",
+                "PRIVACY-1",
+                change_id=self.change_id,
+            )
+            loader = CSVLoader(self.store, self.change_id)
+            loader.load_file(
+                os.path.join(TEST_DATA_PATH, "Platforms.csv"), constants.PLATFORM
+            )
+            self.assertNotIn("PLATFORM-1", self.store.platforms)
+            self.assertIn("PLATFORM-3", self.store.platforms)
+
+    def test_datafile_values_are_converted(self):
+        """Test whether booleans, integers and empty fields of CSV files are converted"""
+        with self.store.session_scope():
+            import_from_csv(self.store, TEST_DATA_PATH, CSV_FILES[0], self.change_id)
+            import_from_csv(
+                self.store, TEST_DATA_PATH, ["Datafiles.csv"], self.change_id
+            )
+            datafile_2 = self.store.search_datafile("DATAFILE-2")
+            self.assertIs(datafile_2.simulated, False)
+            self.assertEqual(datafile_2.size, 0)
+            self.assertIsNone(datafile_2.url)
+
+    def test_unsupported_tables_are_reported(self):
+        """Test whether tables without bulk loader or add method are still reported"""
+        path = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(path, "Comment Types.csv"), "w") as f:
+                f.write("name\nCOMMENT-TYPE-1\n")
+            with open(os.path.join(path, "Tags.csv"), "w") as f:
+                f.write("name\nTAG-1\n")
+            self.assertTrue(CSVLoader.can_load(constants.COMMENT_TYPE))
+            self.assertFalse(CSVLoader.can_load(constants.TAG))
+
+            temp_output = StringIO()
+            with self.store.session_scope(), redirect_stdout(temp_output):
+                import_from_csv(
+                    self.store, path, ["Comment Types.csv", "Tags.csv"], self.change_id
+                )
+                self.assertIsNotNone(self.store.search_comment_type("COMMENT-TYPE-1"))
+            self.assertIn("Method(add_to_tags) not found!", temp_output.getvalue())
+        finally:
+            shutil.rmtree(path)
+
+    def test_copy_value(self):
+        """Test whether values are escaped for the text format of COPY"""
+        self.assertEqual(copy_value(None), "\\N")
+        self.assertEqual(copy_value(True), "t")
+        self.assertEqual(copy_value(3), "3")
+        self.assertEqual(copy_value("a\tb\\c\n"), "a\\tb\\\\c\\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -58,8 +58,8 @@ class DataStoreInitialisePostGISTestCase(TestCase):
         table_names = inspector.get_table_names(schema="pepys")
         schema_names = inspector.get_schema_names()
 
-        # 34 tables must be created to default schema
-        self.assertEqual(len(table_names), 34)
+        # 35 tables must be created to default schema
+        self.assertEqual(len(table_names), 35)
         self.assertIn("Platforms", table_names)
         self.assertIn("States", table_names)
         self.assertIn("Datafiles", table_names)
@@ -96,11 +96,11 @@ class DataStoreInitialiseSpatiaLiteTestCase(TestCase):
         SYSTEM = platform.system()
 
         if SYSTEM == "Windows":
-            correct_n_tables = 72
+            correct_n_tables = 73
         else:
-            correct_n_tables = 70
+            correct_n_tables = 71
 
-        # 36 tables + 36 spatial tables must be created. A few of them tested
+        # 37 tables + 36 spatial tables must be created. A few of them tested
         self.assertEqual(len(table_names), correct_n_tables)
         self.assertIn("Platforms", table_names)
         self.assertIn("States", table_names)
@@ -1,4 +1,5 @@
 import shutil
+import tempfile
 import unittest
 import os
 
@@ -9,7 +10,7 @@ from pepys_import.core.store.data_store import DataStore
 from pepys_import.core.store.table_summary import TableSummary
 from pepys_import.file.file_processor import FileProcessor
 from importers.replay_importer import ReplayImporter
-from pepys_import.utils.datafile_utils import hash_file
+from pepys_import.utils.datafile_utils import hash_file, hash_files
 
 DIRECTORY_PATH = os.path.dirname(__file__)
 CURRENT_DIR = os.getcwd()
@@ -169,5 +170,62 @@ class DuplicatedFilesTestCase(unittest.TestCase):
         os.remove(copied_file_path)
 
 
+class LoadedFilesTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.store = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+        self.store.initialise()
+        self.processor = FileProcessor(archive=False)
+        self.processor.register_importer(ReplayImporter())
+        self.directory = tempfile.mkdtemp()
+        self.folder = os.path.join(self.directory, "files")
+        os.makedirs(self.folder)
+        for name in ("first.rep", "second.rep"):
+            shutil.copyfile(REP_FILE_PATH, os.path.join(self.folder, name))
+        with open(os.path.join(self.folder, "notes.txt"), "w") as f:
+            f.write("not imported")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_hash_files(self):
+        paths = [
+            os.path.join(self.folder, name) for name in sorted(os.listdir(self.folder))
+        ]
+        file_keys = hash_files(paths, max_workers=2)
+        for path in paths:
+            self.assertEqual(file_keys[path], (os.path.getsize(path), hash_file(path)))
+
+    def test_find_loaded_datafiles(self):
+        self.processor.process(REP_FILE_PATH, self.store, False)
+        size = os.path.getsize(REP_FILE_PATH)
+        file_hash = hash_file(REP_FILE_PATH)
+        with self.store.session_scope():
+            loaded = self.store.find_loaded_datafiles(
+                [(size, file_hash), (size + 1, file_hash), (size, "other")],
+                batch_size=1,
+            )
+        self.assertEqual(loaded, {(size, file_hash): "rep_test1.rep"})
+
+    def test_loaded_files_dropped_before_reading(self):
+        """Test whether files loaded before, or in the same folder, are skipped
+        without being read by the importers"""
+        temp_output = StringIO()
+        with redirect_stdout(temp_output):
+            self.processor.process(self.folder, self.store, False)
+        output = temp_output.getvalue()
+        assert "Files got processed: 1 times" in output
+        assert "is already loaded! Skipping the file." in output
+
+        temp_output = StringIO()
+        with redirect_stdout(temp_output):
+            self.processor.process(self.folder, self.store, False)
+        output = temp_output.getvalue()
+        assert "Files got processed: 0 times" in output
+        assert output.count("is already loaded! Skipping the file.") == 2
+        assert "REP Importer working on" not in output
+        # only the files some importer loads are hashed
+        assert all(path.endswith(".rep") for path in self.processor.file_keys)
+
+
 if __name__ == "__main__":
     unittest.main()
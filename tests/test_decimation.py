@@ -0,0 +1,77 @@
+import unittest
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from pepys_import.core.store.decimation import (
+    BUCKET,
+    DOUGLAS_PEUCKER,
+    TimeBuckets,
+    bucket_indices,
+    check_decimation,
+    decimate_indices,
+    douglas_peucker_indices,
+)
+
+NAN = float("nan")
+
+
+class DecimationTestCase(TestCase):
+    def test_bucket_indices(self):
+        """Test whether the first time of every bucket is kept"""
+        times = [0, 1, 2, 3, 10, 11, 12, 30, 31, 39]
+        # Buckets of 10 microseconds, the last one starting at 30
+        self.assertEqual(bucket_indices(times, 4), [0, 4, 7])
+        self.assertEqual(bucket_indices(times, 20), list(range(10)))
+
+    def test_time_buckets_by_key(self):
+        """Test whether the buckets are kept separately for every key"""
+        buckets = TimeBuckets(0, 99, 10)
+        self.assertTrue(buckets.keep(0, key="A"))
+        self.assertTrue(buckets.keep(5, key="B"))
+        self.assertFalse(buckets.keep(9, key="A"))
+        self.assertTrue(buckets.keep(10, key="A"))
+        self.assertTrue(buckets.keep(99, key="A"))
+
+    def test_douglas_peucker_keeps_corners(self):
+        """Test whether the points shaping the line are kept first"""
+        # An L shaped line with a corner at index 5 and a bump at index 8
+        x = [0, 1, 2, 3, 4, 5, 5, 5, 5.5, 5, 5]
+        y = [0, 0, 0, 0, 0, 0, 1, 2, 3, 4, 5]
+        self.assertEqual(douglas_peucker_indices(x, y, 3), [0, 5, 10])
+        self.assertEqual(douglas_peucker_indices(x, y, 4), [0, 5, 8, 10])
+        # Points on straight segments are never needed
+        self.assertEqual(douglas_peucker_indices(x, y, 8), [0, 5, 7, 8, 9, 10])
+
+    def test_douglas_peucker_without_numpy(self):
+        """Test whether the pure Python distances give the same points as NumPy"""
+        x = [0, 1, 2, 3, 4, 5, 5, 5, 5.5, 5, 5]
+        y = [0, 0, 0.2, 0, 0, 0, 1, 2, 3, 4, 5]
+        expected = douglas_peucker_indices(x, y, 5)
+        with patch.dict("sys.modules", {"numpy": None}):
+            self.assertEqual(douglas_peucker_indices(x, y, 5), expected)
+
+    def test_douglas_peucker_skips_missing_locations(self):
+        """Test whether points without location are left out by Douglas-Peucker"""
+        times = list(range(5))
+        longitudes = [0, NAN, 1, 2, 3]
+        latitudes = [0, NAN, 1, 0, 1]
+        self.assertEqual(
+            decimate_indices(times, longitudes, latitudes, 10, DOUGLAS_PEUCKER),
+            [0, 2, 3, 4],
+        )
+        self.assertEqual(
+            decimate_indices(times, longitudes, latitudes, 10, BUCKET), times
+        )
+
+    def test_invalid_decimation(self):
+        """Test whether invalid budgets and methods are rejected"""
+        check_decimation(None, "unknown")
+        with self.assertRaises(ValueError):
+            check_decimation(1, BUCKET)
+        with self.assertRaises(ValueError):
+            check_decimation(10, "unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
+import os
+import shutil
+import tempfile
 import unittest
 
+from datetime import datetime
+from pepys_import.core.formats.location import Location
 from pepys_import.core.store.data_store import DataStore
+from pepys_import.core.store.measurement_buffer import StateColumns
 from testing.postgresql import Postgresql
 from unittest import TestCase
 
@@ -87,6 +93,71 @@ class DataStoreExportSpatiaLiteTestCase(TestCase):
 
         # self.assertNotEqual(len(records), 0)
 
+    def test_sqlite_decimated_export(self):
+        """Test whether exported tracks are decimated to the given number of states"""
+        data_store_sqlite = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+        data_store_sqlite.initialise()
+        with data_store_sqlite.session_scope():
+            change_id = data_store_sqlite.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+            privacy = data_store_sqlite.add_to_privacies("PRIVACY", change_id)
+            datafile = data_store_sqlite.get_datafile(
+                "test_file", "csv", 0, "HASHED", change_id
+            )
+            platform = data_store_sqlite.get_platform(
+                platform_name="PLATFORM",
+                nationality=data_store_sqlite.add_to_nationalities(
+                    "NATIONALITY", change_id
+                ).name,
+                platform_type=data_store_sqlite.add_to_platform_types(
+                    "TYPE", change_id
+                ).name,
+                privacy=privacy.name,
+                change_id=change_id,
+            )
+            sensor = platform.get_sensor(
+                data_store_sqlite,
+                "GPS",
+                data_store_sqlite.add_to_sensor_types("GPS", change_id),
+                change_id=change_id,
+            )
+            datafile_id = datafile.datafile_id
+
+            columns = StateColumns(data_store_sqlite.db_classes.State, datafile_id)
+            for minute in range(10):
+                record = columns.append(
+                    datetime(2020, 1, 1, 12, minute),
+                    sensor_name="GPS",
+                    platform_name="PLATFORM",
+                    sensor_id=sensor.sensor_id,
+                    privacy_id=privacy.privacy_id,
+                )
+                location = Location()
+                location.set_latitude_decimal_degrees(50 + minute * 0.1)
+                location.set_longitude_decimal_degrees(-1)
+                record.location = location
+            columns.commit(data_store_sqlite, change_id)
+
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, "test_file")
+            with data_store_sqlite.session_scope():
+                data_store_sqlite.export_datafile(datafile_id, filename)
+                with open(filename + ".rep") as f:
+                    all_states = f.readlines()
+
+                data_store_sqlite.export_datafile(datafile_id, filename, max_points=3)
+                with open(filename + ".rep") as f:
+                    decimated_states = f.readlines()
+        finally:
+            shutil.rmtree(path)
+
+        self.assertEqual(len(all_states), 10)
+        self.assertEqual(
+            decimated_states, [all_states[0], all_states[4], all_states[7]]
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import TestCase
+
+from pepys_import.core.formats.location import Location
+from pepys_import.core.store.data_store import DataStore
+from pepys_import.core.store.measurement_buffer import StateColumns
+from pepys_import.utils.export_utils import export_datafiles
+
+START_TIME = datetime(2020, 1, 1, 12, 0, 0)
+
+
+class ExportDatafilesTestCase(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = DataStore(
+            "", "", "", 0, os.path.join(self.path, "export.db"), db_type="sqlite"
+        )
+        self.store.initialise()
+        with self.store.session_scope():
+            change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+            privacy = self.store.add_to_privacies("test_privacy", change_id)
+            platform = self.store.get_platform(
+                platform_name="PLATFORM-1",
+                nationality=self.store.add_to_nationalities(
+                    "test_nationality", change_id
+                ).name,
+                platform_type=self.store.add_to_platform_types(
+                    "test_platform_type", change_id
+                ).name,
+                privacy=privacy.name,
+                change_id=change_id,
+            )
+            sensor = platform.get_sensor(
+                self.store,
+                "gps",
+                self.store.add_to_sensor_types("test_sensor_type", change_id),
+                change_id=change_id,
+            )
+
+            self.datafiles = list()
+            for number in range(4):
+                reference = f"DATAFILE-{number}"
+                datafile = self.store.get_datafile(
+                    reference, "csv", 0, reference, change_id
+                )
+                self.datafiles.append(
+                    (datafile.datafile_id, os.path.join(self.path, reference))
+                )
+                columns = StateColumns(
+                    self.store.db_classes.State, datafile.datafile_id
+                )
+                for minute in range(number + 1):
+                    record = columns.append(
+                        START_TIME + timedelta(minutes=minute),
+                        sensor_name="gps",
+                        platform_name="PLATFORM-1",
+                        sensor_id=sensor.sensor_id,
+                        privacy_id=privacy.privacy_id,
+                    )
+                    location = Location()
+                    location.set_latitude_decimal_degrees(50 + minute * 0.1)
+                    location.set_longitude_decimal_degrees(-1)
+                    record.location = location
+                columns.commit(self.store, change_id)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def read_exports(self):
+        exports = dict()
+        for _, filename in self.datafiles:
+            with open(filename + ".rep") as f:
+                exports[filename] = f.read()
+            os.remove(filename + ".rep")
+        return exports
+
+    def test_parallel_export_matches_sequential_export(self):
+        """Test whether worker processes write the same files as a single process"""
+        output = StringIO()
+        with redirect_stdout(output):
+            lines = export_datafiles(self.store, self.datafiles, max_workers=2)
+        parallel_exports = self.read_exports()
+
+        with redirect_stdout(StringIO()):
+            export_datafiles(self.store, self.datafiles, max_workers=1)
+        sequential_exports = self.read_exports()
+
+        self.assertEqual(lines, 1 + 2 + 3 + 4)
+        self.assertEqual(parallel_exports, sequential_exports)
+        self.assertEqual(
+            [len(export.splitlines()) for export in parallel_exports.values()],
+            [1, 2, 3, 4],
+        )
+        self.assertIn("Exported 4 Datafiles, 10 lines", output.getvalue())
+
+    def test_parallel_export_is_decimated(self):
+        """Test whether the maximum number of states is passed to the workers"""
+        with redirect_stdout(StringIO()):
+            lines = export_datafiles(
+                self.store, self.datafiles, max_workers=2, max_points=2
+            )
+        self.read_exports()
+        self.assertEqual(lines, 1 + 2 + 2 + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
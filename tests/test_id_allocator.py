@@ -0,0 +1,145 @@
+import unittest
+
+from datetime import datetime
+from unittest import TestCase
+from uuid import UUID
+
+from pepys_import.core.store.data_store import DataStore
+from pepys_import.core.store.id_allocator import IdAllocator
+
+
+class IdAllocatorTestCase(TestCase):
+    def setUp(self):
+        self.store = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+        self.store.initialise()
+        with self.store.session_scope():
+            self.change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+            nationality = self.store.add_to_nationalities(
+                "test_nationality", self.change_id
+            ).name
+            platform_type = self.store.add_to_platform_types(
+                "test_platform_type", self.change_id
+            ).name
+            sensor_type = self.store.add_to_sensor_types(
+                "test_sensor_type", self.change_id
+            )
+            privacy = self.store.add_to_privacies("test_privacy", self.change_id).name
+
+            self.platform = self.store.get_platform(
+                platform_name="Test Platform",
+                nationality=nationality,
+                platform_type=platform_type,
+                privacy=privacy,
+                change_id=self.change_id,
+            )
+            self.sensor = self.platform.get_sensor(
+                self.store, "gps", sensor_type, change_id=self.change_id
+            )
+            self.file = self.store.get_datafile(
+                "test_file", "csv", 0, "HASHED", self.change_id
+            )
+
+            self.store.session.expunge(self.platform)
+            self.store.session.expunge(self.sensor)
+            self.store.session.expunge(self.file)
+
+    def tearDown(self):
+        pass
+
+    def create_states(self, count):
+        self.file.measurements["TEST"] = list()
+        for i in range(count):
+            self.file.create_state(
+                self.store, self.platform, self.sensor, datetime(2020, 1, 1, i), "TEST"
+            )
+
+    def test_allocate_consecutive_ids(self):
+        """Test whether consecutive IDs are taken from the reserved block"""
+        State = self.store.db_classes.State
+        allocator = IdAllocator(self.store, block_size=10)
+        with self.store.session_scope():
+            self.assertEqual(allocator.allocate(State, 3), [1, 2, 3])
+            self.assertEqual(allocator.allocate_id(State), 4)
+            # A request larger than the rest of the block reserves a new block
+            self.assertEqual(allocator.allocate(State, 20), list(range(5, 25)))
+
+    def test_new_session_continues_after_existing_rows(self):
+        """Test whether a new block starts above the IDs in the database"""
+        self.create_states(3)
+        with self.store.session_scope():
+            self.file.commit(self.store, self.change_id)
+
+        with self.store.session_scope():
+            states = self.store.session.query(self.store.db_classes.State).all()
+            self.assertEqual(sorted(s.state_id for s in states), [1, 2, 3])
+            state_id = self.store.id_allocator.allocate_id(self.store.db_classes.State)
+            self.assertEqual(state_id, 4)
+
+    def test_submit_assigns_id_without_flush(self):
+        """Test whether submitted measurements have IDs before being flushed"""
+        state = self.store.db_classes.State(
+            sensor_id=self.sensor.sensor_id,
+            time=datetime(2020, 1, 1),
+            source_id=self.file.datafile_id,
+        )
+        with self.store.session_scope():
+            state.submit(self.store, self.change_id)
+
+            self.assertIsNotNone(state.state_id)
+            self.assertIn(state, self.store.session.new)
+            self.assertEqual(self.store.log_buffer.pending[-1]["id"], state.state_id)
+
+    def test_orm_adds_take_ids_from_reserved_block(self):
+        """Test whether entities added through the ORM don't take the IDs of the
+        reserved block which are allocated later"""
+        State = self.store.db_classes.State
+        table = State.__table__
+        with self.store.session_scope():
+            rows = [
+                {
+                    "state_id": state_id,
+                    "time": datetime(2020, 1, 1, state_id),
+                    "sensor_id": self.sensor.sensor_id,
+                    "source_id": self.file.datafile_id,
+                }
+                for state_id in self.store.id_allocator.allocate(State, 3)
+            ]
+            self.store.session.execute(table.insert(), rows)
+
+            state = State(
+                time=datetime(2020, 1, 2),
+                sensor_id=self.sensor.sensor_id,
+                source_id=self.file.datafile_id,
+            )
+            self.store.session.add(state)
+            self.store.session.flush()
+
+            ids = self.store.id_allocator.allocate(State, 2)
+            self.assertNotIn(state.state_id, ids)
+            rows = [
+                {
+                    "state_id": state_id,
+                    "time": datetime(2020, 1, 3, state_id),
+                    "sensor_id": self.sensor.sensor_id,
+                    "source_id": self.file.datafile_id,
+                }
+                for state_id in ids
+            ]
+            self.store.session.execute(table.insert(), rows)
+
+        with self.store.session_scope():
+            self.assertEqual(self.store.session.query(State).count(), 6)
+
+    def test_postgres_ids_are_uuids(self):
+        """Test whether UUIDs are generated on the client for PostGIS"""
+        self.store.db_type = "postgres"
+        allocator = IdAllocator(self.store)
+        ids = allocator.allocate(self.store.db_classes.State, 5)
+        self.assertEqual(len(set(ids)), 5)
+        self.assertTrue(all(isinstance(value, UUID) for value in ids))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest.mock import patch
+
+from pepys_import.file.file_processor import FileProcessor
+from pepys_import.file.importer_registry import ImporterRegistry, manifest_directory
+
+IMPORTER_TEMPLATE = """
+from pepys_import.file.importer import Importer
+from tests.test_importer_registry import IMPORTED
+
+IMPORTED.append("{name}")
+
+
+class {name}(Importer):
+    def __init__(self):
+        super().__init__("{name}", "", "")
+
+    def can_load_this_type(self, suffix):
+        return suffix.upper() == "{suffix}"
+
+    def can_load_this_filename(self, filename):
+        return True
+
+    def can_load_this_header(self, header):
+        return True
+
+    def can_load_this_file(self, file_contents):
+        return True
+
+    def _load_this_file(self, data_store, path, file_contents, datafile):
+        pass
+"""
+
+# Names of the importer modules executed by the tests, in order
+IMPORTED = list()
+
+
+class ImporterRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.importers_path = os.path.join(self.directory, "importers")
+        os.mkdir(self.importers_path)
+        self.manifest_path = os.path.join(self.directory, "manifest.json")
+        self.write_importer("RepImporter", ".REP")
+        self.write_importer("GpxImporter", ".GPX")
+        IMPORTED.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_importer(self, name, suffix, module_name=None, mode="w"):
+        module_name = name if module_name is None else module_name
+        with open(os.path.join(self.importers_path, f"{module_name}.py"), mode) as f:
+            f.write(IMPORTER_TEMPLATE.format(name=name, suffix=suffix))
+
+    def registry(self):
+        return ImporterRegistry(self.importers_path, self.manifest_path)
+
+    def test_first_scan_writes_manifest(self):
+        registry = self.registry()
+        self.assertEqual(IMPORTED, ["GpxImporter", "RepImporter"])
+        self.assertEqual(
+            [record.class_name for record in registry.records],
+            ["GpxImporter", "RepImporter"],
+        )
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        self.assertEqual(set(manifest["modules"]), {"GpxImporter.py", "RepImporter.py"})
+
+    def test_later_scan_imports_only_matching_importers(self):
+        self.registry().importers_for_suffix(".rep")
+        IMPORTED.clear()
+
+        registry = self.registry()
+        self.assertEqual(IMPORTED, [])
+        importers = registry.importers_for_suffix(".rep")
+        self.assertEqual([importer.name for importer in importers], ["RepImporter"])
+        self.assertEqual(IMPORTED, ["RepImporter"])
+
+    def test_new_suffix_is_recorded(self):
+        self.registry()
+        IMPORTED.clear()
+
+        registry = self.registry()
+        self.assertEqual(registry.importers_for_suffix(".txt"), [])
+        self.assertEqual(IMPORTED, ["GpxImporter", "RepImporter"])
+        IMPORTED.clear()
+
+        self.assertEqual(self.registry().importers_for_suffix(".txt"), [])
+        self.assertEqual(IMPORTED, [])
+
+    def test_changed_module_is_scanned_again(self):
+        self.registry().importers_for_suffix(".rep")
+        self.write_importer("RepImporter", ".DSF")
+        IMPORTED.clear()
+
+        registry = self.registry()
+        self.assertEqual(IMPORTED, ["RepImporter"])
+        self.assertEqual(registry.importers_for_suffix(".rep"), [])
+        importers = registry.importers_for_suffix(".dsf")
+        self.assertEqual([importer.name for importer in importers], ["RepImporter"])
+
+    def test_removed_module_is_dropped(self):
+        self.registry()
+        os.remove(os.path.join(self.importers_path, "GpxImporter.py"))
+
+        registry = self.registry()
+        self.assertEqual(
+            [record.class_name for record in registry.records], ["RepImporter"]
+        )
+
+    def test_invalid_manifest_is_ignored(self):
+        with open(self.manifest_path, "w") as f:
+            f.write("not json")
+        registry = self.registry()
+        self.assertEqual(len(registry.importers), 2)
+
+    def test_changed_base_rewrites_manifest(self):
+        self.registry().importers_for_suffix(".rep")
+        IMPORTED.clear()
+
+        base = {"version": "0.0.0", "importer_mtime": 0.0}
+        with patch("pepys_import.file.importer_registry.base_signature", lambda: base):
+            registry = self.registry()
+        self.assertEqual(IMPORTED, ["GpxImporter", "RepImporter"])
+        with open(self.manifest_path) as f:
+            self.assertEqual(json.load(f)["base"], base)
+        IMPORTED.clear()
+        registry.importers_for_suffix(".rep")
+        self.assertEqual(IMPORTED, [])
+
+    def test_module_is_imported_once(self):
+        self.write_importer("DsfImporter", ".DSF", module_name="RepImporter", mode="a")
+        registry = self.registry()
+        registry.importers_for_suffix(".rep")
+        registry.importers_for_suffix(".dsf")
+        IMPORTED.clear()
+
+        registry = self.registry()
+        importers = registry.importers_for_suffix(".rep")
+        importers += registry.importers_for_suffix(".dsf")
+        self.assertEqual(
+            [importer.name for importer in importers], ["RepImporter", "DsfImporter"]
+        )
+        # both classes come from a single import of their module
+        self.assertEqual(IMPORTED, ["RepImporter", "DsfImporter"])
+
+    def test_manifest_directory(self):
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": self.directory}):
+            self.assertEqual(
+                manifest_directory(), os.path.join(self.directory, "pepys_import")
+            )
+        with patch("pepys_import.file.importer_registry.LOCAL_CACHE", self.directory):
+            self.assertEqual(manifest_directory(), self.directory)
+
+    def test_file_processor_uses_registry(self):
+        processor = FileProcessor()
+        processor.importer_sources.append(self.registry())
+        IMPORTED.clear()
+        importers = processor.importers_for_suffix(".gpx")
+        self.assertEqual([importer.name for importer in importers], ["GpxImporter"])
+        self.assertEqual(len(processor.importers), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import os
 import stat
 import shutil
+import tempfile
 import unittest
 
 from contextlib import redirect_stdout
@@ -8,8 +9,10 @@ from io import StringIO
 from datetime import datetime
 from unittest.mock import patch
 
+from pepys_import.core.store.data_store import DataStore
 from pepys_import.file.importer import Importer
 from pepys_import.file.file_processor import FileProcessor
+from pepys_import.file.highlighter.highlighter import HighlightedFile
 from importers.replay_importer import ReplayImporter
 from importers.nmea_importer import NMEAImporter
 
@@ -34,6 +37,10 @@ class SampleImporterTests(unittest.TestCase):
         if os.path.exists(descending_file):
             os.remove(descending_file)
 
+        summaries_file = os.path.join(CURRENT_DIR, "summaries.db")
+        if os.path.exists(summaries_file):
+            os.remove(summaries_file)
+
     def test_process_folders_not_descending(self):
         """Test whether single level processing works for the given path"""
         processor = FileProcessor("single_level.db", archive=False)
@@ -107,6 +114,34 @@ class SampleImporterTests(unittest.TestCase):
 
         self.assertIn("Files got processed: 0 times", output)
 
+    def test_reporting_imported_rows(self):
+        """Test whether the rows added by a run are reported without counting tables"""
+        processor = FileProcessor("summaries.db", archive=False)
+        processor.register_importer(ReplayImporter())
+
+        file_path = os.path.join(REP_DATA_PATH, "uk_track.rep")
+        temp_output = StringIO()
+        with redirect_stdout(temp_output):
+            processor.process(file_path, None, False, full_summaries=True)
+        output = temp_output.getvalue()
+
+        self.assertIn("==Before==", output)
+        self.assertIn("==Imported==", output)
+        self.assertIn("==After==", output)
+        self.assertEqual(len(processor.change_ids), 1)
+
+        # The database was empty, so the rows added are all the rows of the tables
+        data_store = DataStore("", "", "", 0, "summaries.db", db_type="sqlite")
+        tables = [data_store.db_classes.State, data_store.db_classes.Platform]
+        with data_store.session_scope():
+            imported = data_store.get_change_summaries(processor.change_ids, tables)
+        counted = data_store.count_tables_concurrently(tables)
+        self.assertGreater(imported[0].number_of_rows, 0)
+        self.assertEqual(
+            [summary.number_of_rows for summary in imported],
+            [summary.number_of_rows for summary in counted],
+        )
+
     @patch("pepys_import.file.file_processor.ARCHIVE_PATH", OUTPUT_PATH)
     def test_archiving_files(self):
         """Test whether archive flag correctly works for File Processor"""
@@ -287,6 +322,51 @@ class ImporterRemoveTestCase(unittest.TestCase):
 
         self.assertIn("Files got processed: 0 times", output)
 
+    def test_undecodable_file(self):
+        """Test whether bytes which can't be decoded don't stop the import"""
+
+        class TestImporter(Importer):
+            def can_load_this_header(self, header) -> bool:
+                return True
+
+            def can_load_this_filename(self, filename):
+                return True
+
+            def can_load_this_type(self, suffix):
+                return True
+
+            def can_load_this_file(self, file_contents):
+                return list(file_contents)[0] == "abc"
+
+            def platform_names(self, path, file_contents):
+                return [line for line in file_contents if line != "abc"]
+
+            def _load_this_file(
+                self, data_store, path, file_contents, data_file, change_id
+            ):
+                pass
+
+        directory = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(directory, "bad.rep"), "wb") as f:
+                f.write(b"abc\n\x81\x8d\x8f\n")
+            with FileProcessor.get_file_contents(
+                os.path.join(directory, "bad.rep")
+            ) as file_contents:
+                self.assertEqual(list(file_contents), ["abc", "\ufffd\ufffd\ufffd"])
+
+            store = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+            store.initialise()
+            processor = FileProcessor(archive=False)
+            processor.register_importer(TestImporter("", "", ""))
+            temp_output = StringIO()
+            with redirect_stdout(temp_output):
+                processor.process(directory, store, False, prescan=True)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertIn("Files got processed: 1 times", temp_output.getvalue())
+
 
 class ReplayImporterTestCase(unittest.TestCase):
     def test_degrees_for(self):
@@ -299,6 +379,62 @@ class ReplayImporterTestCase(unittest.TestCase):
         self.assertEqual(degree_2, 3.0)
 
 
+class LineDispatchTestCase(unittest.TestCase):
+    def test_load_lines(self):
+        """Test whether every line is handed once to the importers of its prefix"""
+
+        class TestImporter(Importer):
+            def __init__(self, line_prefixes):
+                super().__init__("Test Importer", "", "")
+                self.line_prefixes = line_prefixes
+                self.lines = list()
+
+            def can_load_this_header(self, header) -> bool:
+                return True
+
+            def can_load_this_filename(self, filename):
+                return True
+
+            def can_load_this_type(self, suffix):
+                return True
+
+            def can_load_this_file(self, file_contents):
+                return True
+
+            def _load_this_file(self, data_store, path, file_contents, data_file):
+                pass
+
+            def _load_this_line(
+                self, data_store, line_number, line, datafile, change_id
+            ):
+                self.lines.append((line_number, line.tokens()))
+
+        sensor_importer = TestImporter((";SENSOR:", ";SENSOR2:"))
+        narrative_importer = TestImporter((";NARRATIVE:",))
+        all_importer = TestImporter(("",))
+        highlighted_file = HighlightedFile(os.path.join(REP_DATA_PATH, "rep_test1.rep"))
+        with redirect_stdout(StringIO()):
+            FileProcessor.load_lines(
+                [sensor_importer, narrative_importer, all_importer],
+                None,
+                highlighted_file,
+                None,
+                None,
+            )
+        highlighted_file.close()
+
+        self.assertEqual(len(sensor_importer.lines), 7)
+        self.assertEqual(len(narrative_importer.lines), 6)
+        self.assertEqual(len(all_importer.lines), 26)
+        self.assertTrue(
+            all(tokens[0].text[:7] == ";SENSOR" for _, tokens in sensor_importer.lines)
+        )
+        # Importers sharing a line share its tokens
+        lines = dict(all_importer.lines)
+        for line_number, tokens in sensor_importer.lines:
+            self.assertIs(lines[line_number], tokens)
+
+
 class NMEAImporterTestCase(unittest.TestCase):
     def setUp(self) -> None:
         self.nmea_importer = NMEAImporter(separator=" ")
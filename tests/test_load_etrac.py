@@ -1,4 +1,6 @@
 import os
+import shutil
+import tempfile
 import unittest
 
 from importers.e_trac_importer import ETracImporter
@@ -61,6 +63,48 @@ class TestLoadEtrac(unittest.TestCase):
             )
             assert len(results) == 1
 
+    def test_invalid_rows_are_reported(self):
+        header = (
+            "!Target,MMSI  ,      Date     ,Time    ,    Lng    ,    Lat   ,      SOG  ,"
+            "COG , Hdg ,  Rot ,   Alt , Pass,Nav,PosAcc,Reg,RM,Com,Index,  prev, Name"
+        )
+        rows = [
+            # valid row
+            "4,143732307,  2019/08/06,04:40:00,  -28.62, 42.16,8,283,511,  -128,0,0,15,"
+            "  -1,  -1,  -1,56,16250, 16238 TRIV",
+            # invalid date
+            "4,143732307,  2019/13/06,04:40:00,  -28.62, 42.16,8,283,511,  -128,0,0,15,"
+            "  -1,  -1,  -1,56,16250, 16238 TRIV",
+            # invalid heading
+            "4,143732307,  2019/08/06,04:41:00,  -28.62, 42.16,8,283,NaV,  -128,0,0,15,"
+            "  -1,  -1,  -1,56,16250, 16238 TRIV",
+            # invalid latitude
+            "4,143732307,  2019/08/06,04:42:00,  -98.62, 42.16,8,283,511,  -128,0,0,15,"
+            "  -1,  -1,  -1,56,16250, 16238 TRIV",
+            # not enough fields
+            "4,143732307,  2019/08/06,04:43:00,  -28.62, 42.16",
+        ]
+        directory = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(directory, "e_trac.txt"), "w") as f:
+                f.write("\n".join([header] + rows) + "\n")
+            processor = FileProcessor(archive=False)
+            importer = ETracImporter()
+            processor.register_importer(importer)
+            processor.process(directory, self.store, False)
+        finally:
+            shutil.rmtree(directory)
+
+        messages = [list(error.values())[0] for error in importer.errors]
+        self.assertEqual(len(messages), 4)
+        self.assertIn("Line 3. Error in timestamp", messages[0])
+        self.assertIn("Line 4. Error in angle value NaV", messages[1])
+        self.assertIn("Error in latitude degrees value -98.62", messages[2])
+        self.assertIn("Error on line 6. Not enough tokens", messages[3])
+        with self.store.session_scope():
+            states = self.store.session.query(self.store.db_classes.State).all()
+            self.assertEqual(len(states), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,4 +1,6 @@
 import os
+import shutil
+import tempfile
 import unittest
 
 from unittest.mock import patch
@@ -77,6 +79,60 @@ class GPXTests(unittest.TestCase):
             )
             assert len(elev_states) == 1
 
+    def process_gpx(self, contents):
+        directory = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(directory, "track.gpx"), "w") as f:
+                f.write(contents)
+            processor = FileProcessor(archive=False)
+            importer = GPXImporter()
+            processor.register_importer(importer)
+            processor.process(directory, self.store, False)
+        finally:
+            shutil.rmtree(directory)
+        with self.store.session_scope():
+            states = self.store.session.query(self.store.db_classes.State).all()
+            return len(states), importer.errors
+
+    def test_track_name_after_points(self):
+        """Points parsed before the name of their track are loaded once it is found"""
+        contents = GPX_TEMPLATE.format(
+            tracks="<trk><trkseg>{points}</trkseg><name>LATE</name></trk>"
+            "<trk><name>EARLY</name><trkseg>{points}</trkseg></trk>".format(
+                points=GPX_POINTS
+            )
+        )
+        states, errors = self.process_gpx(contents)
+        self.assertEqual(states, 4)
+        self.assertEqual(errors, [])
+        with self.store.session_scope():
+            platforms = self.store.session.query(self.store.db_classes.Platform).all()
+            self.assertEqual(
+                {platform.name for platform in platforms}, {"LATE", "EARLY"}
+            )
+
+    def test_track_without_name(self):
+        """Points of a track without name are reported"""
+        contents = GPX_TEMPLATE.format(
+            tracks="<trk><trkseg>{points}</trkseg></trk>".format(points=GPX_POINTS)
+        )
+        states, errors = self.process_gpx(contents)
+        self.assertEqual(states, 0)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("must have child <name> element", list(errors[0].values())[0])
+
+
+GPX_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<gpx xmlns="http://www.topografix.com/GPX/1/1" creator="test" version="1.1">
+{tracks}
+</gpx>
+"""
+
+GPX_POINTS = """
+<trkpt lat="22.1862861" lon="-21.6978806"><time>2012-04-27T16:29:38+01:00</time></trkpt>
+<trkpt lat="22.2862861" lon="-21.7978806"><time>2012-04-27T16:30:38+01:00</time></trkpt>
+"""
+
 
 if __name__ == "__main__":
     unittest.main()
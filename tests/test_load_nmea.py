@@ -1,6 +1,10 @@
 import os
+import shutil
+import tempfile
 import unittest
 
+from datetime import datetime
+
 from importers.nmea_importer import NMEAImporter
 from pepys_import.file.file_processor import FileProcessor
 from pepys_import.core.store.data_store import DataStore
@@ -8,6 +12,19 @@ from pepys_import.core.store.data_store import DataStore
 FILE_PATH = os.path.dirname(__file__)
 DATA_PATH = os.path.join(FILE_PATH, "sample_data/track_files/NMEA")
 
+SENTENCES = [
+    "$POSL,DUMMY,DUMMY DATAFILE TO TEST NMEA IMPORT",
+    "$POSL,DZA,20161105,150000.000,a,b,c,d",
+    "$POSL,HDG,200.0,a,b,c,d",
+    "$POSL,POS,GPS,1030.0000,N,01030.0000,E,a,b,c,d",
+    "$POSL,AIS,336783,1039.9108,N,01026.6072,E,a,b,c,a,b,AIS1,c,d",
+    "$POSL,VEL,SPL,a,b,c,4.0,a,b,c,d",
+    "$POSL,DZA,20161105,150002.500,a,b,c,d",
+    "$POSL,HDG,0.0,a,b,c,d",
+    "$POSL,VEL,SPL,a,b,c,0,a,b,c,d",
+    "$POSL,POS,GPS,1029.9834,S,01029.9939,W,a,b,c,d",
+]
+
 
 class TestLoadNMEA(unittest.TestCase):
     def setUp(self):
@@ -52,6 +69,67 @@ class TestLoadNMEA(unittest.TestCase):
             datafiles = self.store.session.query(self.store.db_classes.Datafile).all()
             self.assertEqual(len(datafiles), 1)
 
+    def process_sentences(self, sentences):
+        directory = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(directory, "nmea.log"), "w") as f:
+                f.write("\n".join(sentences) + "\n")
+            processor = FileProcessor(archive=False)
+            importer = NMEAImporter()
+            processor.register_importer(importer)
+            processor.process(directory, self.store, False)
+        finally:
+            shutil.rmtree(directory)
+        return importer
+
+    def test_fixes_are_stored(self):
+        importer = self.process_sentences(SENTENCES)
+        self.assertEqual(importer.errors, [])
+
+        with self.store.session_scope():
+            State = self.store.db_classes.State
+            states = self.store.session.query(State).order_by(State.time).all()
+            self.assertEqual(len(states), 2)
+
+            first, second = states
+            self.assertEqual(first.time, datetime(2016, 11, 5, 15, 0, 0))
+            self.assertAlmostEqual(first.location.latitude, 10.5)
+            self.assertAlmostEqual(first.location.longitude, 10.5)
+            self.assertAlmostEqual(first.heading.to("degree").magnitude, 200.0)
+            self.assertAlmostEqual(first.speed.to("knot").magnitude, 4.0)
+
+            self.assertEqual(second.time, datetime(2016, 11, 5, 15, 0, 2, 500000))
+            self.assertAlmostEqual(second.location.latitude, -10.49972333)
+            self.assertAlmostEqual(second.location.longitude, -10.49989833)
+            self.assertEqual(second.heading.magnitude, 0)
+            self.assertEqual(second.speed.magnitude, 0)
+            self.assertEqual(first.sensor_id, second.sensor_id)
+
+            platforms = self.store.session.query(self.store.db_classes.Platform).all()
+            self.assertEqual(len(platforms), 1)
+
+    def test_invalid_sentences_are_reported(self):
+        importer = self.process_sentences(
+            [
+                "$POSL,DZA,20161305,150000.000,a,b,c,d",
+                "$POSL,HDG,NaV,a,b,c,d",
+                "$POSL,VEL,SPL,a,b,c,fast,a,b,c,d",
+                "$POSL,POS,GPS,1029.992T,N,01029.9976,E,a,b,c,d",
+                "$POSL,POS,GPS",
+            ]
+        )
+
+        messages = [list(error.values())[0] for error in importer.errors]
+        self.assertEqual(len(messages), 5)
+        self.assertIn("Line 1. Error in timestamp", messages[0])
+        self.assertIn("Line 2. Error in angle value NaV", messages[1])
+        self.assertIn("Line 3. Error in speed value fast", messages[2])
+        self.assertIn("Error in latitude minutes value 29.992T", messages[3])
+        self.assertIn("Error on line 5. Not enough tokens", messages[4])
+        with self.store.session_scope():
+            states = self.store.session.query(self.store.db_classes.State).all()
+            self.assertEqual(len(states), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
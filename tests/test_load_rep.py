@@ -52,6 +52,29 @@ class TestLoadREP(unittest.TestCase):
             datafiles = self.store.session.query(self.store.db_classes.Datafile).all()
             self.assertEqual(len(datafiles), 7)
 
+    def test_load_rep_data_in_chunks(self):
+        processor = FileProcessor(archive=False, chunk_size=50)
+        processor.register_importer(ReplayImporter())
+
+        # parse the folder
+        processor.process(DATA_PATH, self.store, False)
+
+        # check the same data got created as without chunks
+        with self.store.session_scope():
+            states = self.store.session.query(self.store.db_classes.State).all()
+            self.assertEqual(len(states), 746)
+
+            # there must be a log entry for each state
+            logs = (
+                self.store.session.query(self.store.db_classes.Log)
+                .filter(self.store.db_classes.Log.table == "States")
+                .all()
+            )
+            self.assertEqual(len(logs), 746)
+            self.assertEqual(
+                {log.id for log in logs}, {state.state_id for state in states}
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -175,3 +175,35 @@ def test_check_valid():
 
     loc.set_longitude_decimal_degrees(-1.34)
     assert loc.check_valid()
+
+
+def test_set_from_wkb_bytes_without_srid():
+    loc = Location()
+    loc.set_from_wkb(bytes.fromhex("01010000009A9999999999F5BF3D0AD7A3701D4940"))
+
+    assert loc.latitude == 50.23
+    assert loc.longitude == -1.35
+
+
+def test_set_from_wkb_big_endian():
+    loc = Location()
+    loc.set_from_wkb("0020000001000010E6BFF599999999999A40491D70A3D70A3D")
+
+    assert loc.latitude == 50.23
+    assert loc.longitude == -1.35
+
+
+def test_location_is_slotted():
+    loc = Location()
+
+    with pytest.raises(AttributeError):
+        loc.altitude = 10
+
+
+def test_errors_shared_with_caller():
+    errors = list()
+    loc = Location(errors, "Test Error")
+
+    assert not loc.set_latitude_decimal_degrees("Blah")
+    assert len(errors) == 1
+    assert "Test Error" in errors[0]
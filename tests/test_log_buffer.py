@@ -0,0 +1,61 @@
+import unittest
+
+from datetime import datetime
+from unittest import TestCase
+
+from pepys_import.core.store import constants
+from pepys_import.core.store.data_store import DataStore
+
+
+class LogBufferTestCase(TestCase):
+    def setUp(self):
+        self.store = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+        self.store.initialise()
+        with self.store.session_scope():
+            self.change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+
+    def tearDown(self):
+        pass
+
+    def test_logs_are_buffered_until_session_scope_ends(self):
+        """Test whether Log rows are only written when the buffer is flushed"""
+        with self.store.session_scope():
+            privacy_id = self.store.add_to_privacies("TEST", self.change_id).privacy_id
+            self.assertEqual(len(self.store.log_buffer), 1)
+            logs = self.store.session.query(self.store.db_classes.Log).all()
+            self.assertEqual(len(logs), 0)
+
+        with self.store.session_scope():
+            logs = self.store.session.query(self.store.db_classes.Log).all()
+            self.assertEqual(len(logs), 1)
+            self.assertEqual(logs[0].table, constants.PRIVACY)
+            self.assertEqual(logs[0].id, privacy_id)
+            self.assertEqual(logs[0].change_id, self.change_id)
+
+    def test_full_buffer_is_flushed_automatically(self):
+        """Test whether the buffer writes its rows when max_size is reached"""
+        self.store.log_buffer.max_size = 2
+        with self.store.session_scope():
+            self.store.add_to_privacies("TEST-1", self.change_id)
+            self.store.add_to_privacies("TEST-2", self.change_id)
+            self.assertEqual(len(self.store.log_buffer), 0)
+            logs = self.store.session.query(self.store.db_classes.Log).all()
+            self.assertEqual(len(logs), 2)
+
+    def test_logs_are_discarded_on_rollback(self):
+        """Test whether pending Log rows are dropped when the session fails"""
+        with self.assertRaises(ValueError):
+            with self.store.session_scope():
+                self.store.add_to_privacies("TEST", self.change_id)
+                raise ValueError("Rollback")
+
+        self.assertEqual(len(self.store.log_buffer), 0)
+        with self.store.session_scope():
+            logs = self.store.session.query(self.store.db_classes.Log).all()
+            self.assertEqual(len(logs), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
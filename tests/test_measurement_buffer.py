@@ -0,0 +1,390 @@
+import unittest
+
+from datetime import datetime
+from unittest import TestCase
+
+from pepys_import.core.formats import unit_registry
+from pepys_import.core.formats.location import Location
+from pepys_import.core.store.data_store import DataStore
+from pepys_import.core.validators import constants
+from pepys_import.core.store.measurement_buffer import (
+    MeasurementBuffer,
+    StateRecord,
+    StateTrack,
+    datetime_to_microseconds,
+    microseconds_to_datetime,
+    normalise_heading,
+)
+
+
+class MeasurementBufferTestCase(TestCase):
+    def setUp(self):
+        self.store = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+        self.store.initialise()
+        self.current_time = datetime.utcnow()
+        with self.store.session_scope():
+            self.change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+            nationality = self.store.add_to_nationalities(
+                "test_nationality", self.change_id
+            ).name
+            platform_type = self.store.add_to_platform_types(
+                "test_platform_type", self.change_id
+            ).name
+            sensor_type = self.store.add_to_sensor_types(
+                "test_sensor_type", self.change_id
+            )
+            self.privacy = self.store.add_to_privacies("test_privacy", self.change_id)
+            self.comment_type = self.store.add_to_comment_types(
+                "test_comment_type", self.change_id
+            )
+
+            self.platform = self.store.get_platform(
+                platform_name="Test Platform",
+                nationality=nationality,
+                platform_type=platform_type,
+                privacy=self.privacy.name,
+                change_id=self.change_id,
+            )
+            self.sensor = self.platform.get_sensor(
+                self.store, "gps", sensor_type, change_id=self.change_id
+            )
+            self.file = self.store.get_datafile(
+                "test_file", "csv", 0, "HASHED", self.change_id
+            )
+            self.file.measurements["TEST"] = list()
+
+            self.store.session.expunge(self.privacy)
+            self.store.session.expunge(self.comment_type)
+            self.store.session.expunge(self.platform)
+            self.store.session.expunge(self.sensor)
+            self.store.session.expunge(self.file)
+
+    def tearDown(self):
+        pass
+
+    def create_state(self):
+        return self.file.create_state(
+            self.store, self.platform, self.sensor, self.current_time, "TEST"
+        )
+
+    def test_time_conversion(self):
+        """Test whether times survive the conversion to microseconds"""
+        timestamp = datetime(2020, 2, 29, 23, 59, 59, 999999)
+        self.assertEqual(
+            microseconds_to_datetime(datetime_to_microseconds(timestamp)), timestamp
+        )
+        with self.assertRaises(TypeError):
+            datetime_to_microseconds("2020-01-01")
+
+    def test_create_state_returns_record(self):
+        """Test whether states are kept in a MeasurementBuffer"""
+        state = self.create_state()
+
+        self.assertIsInstance(state, StateRecord)
+        self.assertIsInstance(self.file.measurements["TEST"], MeasurementBuffer)
+        self.assertEqual(len(self.file.measurements["TEST"]), 1)
+        self.assertEqual(state.time, self.current_time)
+        self.assertEqual(state.sensor_name, "gps")
+        self.assertEqual(state.platform_name, "Test Platform")
+        self.assertIsNone(state.heading)
+        self.assertIsNone(state.location)
+        self.assertIsNone(state.prev_location)
+
+    def test_create_states_in_bulk(self):
+        """Test whether States created in bulk have their values"""
+        times = [
+            datetime_to_microseconds(datetime(2020, 1, 1, 0, 0, second))
+            for second in range(3)
+        ]
+        self.file.create_states(
+            self.store,
+            self.platform,
+            self.sensor,
+            times,
+            "TEST",
+            {
+                "latitude": [50.0, 50.5, 51.0],
+                "longitude": [-1.0, -1.5, -2.0],
+                "speed": [1.0, 2.0, float("nan")],
+            },
+            privacy_id=self.privacy.privacy_id,
+        )
+
+        states = list(self.file.measurements["TEST"])
+        self.assertEqual(len(states), 3)
+        self.assertEqual(states[1].time, datetime(2020, 1, 1, 0, 0, 1))
+        self.assertEqual(states[1].location.latitude, 50.5)
+        self.assertEqual(states[1].location.longitude, -1.5)
+        self.assertEqual(
+            states[1].speed, 2.0 * (unit_registry.metre / unit_registry.second)
+        )
+        self.assertIsNone(states[2].speed)
+        self.assertIsNone(states[0].heading)
+        self.assertEqual(states[2].sensor_id, self.sensor.sensor_id)
+        self.assertEqual(states[2].privacy_id, self.privacy.privacy_id)
+        self.assertEqual(states[2].platform_name, "Test Platform")
+
+    def test_create_states_in_bulk_checks_columns(self):
+        """Test whether columns of States created in bulk are checked"""
+        with self.assertRaises(ValueError):
+            self.file.create_states(
+                self.store, self.platform, self.sensor, [0, 1], "TEST", {"speed": [1.0]}
+            )
+        with self.assertRaises(ValueError):
+            self.file.create_states(
+                self.store, self.platform, self.sensor, [0], "TEST", {"bearing": [1.0]}
+            )
+
+    def test_state_properties(self):
+        """Test whether the record converts units like the State class"""
+        state = self.create_state()
+        state.heading = 180 * unit_registry.degree
+        state.course = 3.14159 * unit_registry.radian
+        state.speed = 10 * unit_registry.knot
+        state.elevation = -5 * unit_registry.metre
+        loc = Location()
+        loc.set_latitude_decimal_degrees(50.23)
+        loc.set_longitude_decimal_degrees(-1.35)
+        state.location = loc
+
+        self.assertAlmostEqual(state._heading, 3.14159265)
+        self.assertAlmostEqual(state.heading.magnitude, 180)
+        self.assertEqual(state.heading.units, unit_registry.degree)
+        self.assertAlmostEqual(state.speed.magnitude, 5.144444444)
+        self.assertEqual(state.elevation, -5 * unit_registry.metre)
+        self.assertEqual(state.location, loc)
+
+        state.heading = None
+        self.assertIsNone(state.heading)
+
+    def test_state_invalid_properties(self):
+        """Test whether the record rejects the values the State class rejects"""
+        state = self.create_state()
+        with self.assertRaises(TypeError):
+            state.heading = 5
+        with self.assertRaises(ValueError):
+            state.heading = 5 * unit_registry.metre
+        with self.assertRaises(ValueError):
+            state.speed = 5 * unit_registry.metre
+        with self.assertRaises(TypeError):
+            state.location = (50, -1)
+        with self.assertRaises(ValueError):
+            state.location = Location()
+        with self.assertRaises(AttributeError):
+            state.unknown_field = 5
+
+    def test_context_is_interned(self):
+        """Test whether sensor and platform names are stored once"""
+        for _ in range(100):
+            self.create_state()
+
+        columns = self.file.measurements["TEST"].columns["States"]
+        self.assertEqual(len(columns), 100)
+        self.assertEqual(len(columns.context.values), 1)
+        self.assertEqual(len(columns.values["sensor_id"].values), 1)
+
+    def test_commit_buffer(self):
+        """Test whether states, contacts and comments are written in bulk"""
+        state = self.create_state()
+        state.speed = 10 * (unit_registry.metre / unit_registry.second)
+        state.privacy = self.privacy
+        loc = Location()
+        loc.set_latitude_decimal_degrees(50.23)
+        loc.set_longitude_decimal_degrees(-1.35)
+        state.location = loc
+
+        contact = self.file.create_contact(
+            self.store, self.platform, self.sensor, self.current_time, "TEST"
+        )
+        contact.name = "TEST"
+        contact.bearing = 90 * unit_registry.degree
+        contact.privacy = self.privacy.privacy_id
+
+        self.file.create_comment(
+            self.store,
+            self.platform,
+            self.current_time,
+            "Comment",
+            self.comment_type,
+            "TEST",
+        )
+
+        with self.store.session_scope():
+            self.file.commit(self.store, self.change_id)
+            self.assertEqual(len(self.store.session.new), 0)
+
+        with self.store.session_scope():
+            states = self.store.session.query(self.store.db_classes.State).all()
+            self.assertEqual(len(states), 1)
+            self.assertEqual(states[0].time, self.current_time)
+            self.assertEqual(states[0].speed, 10 * unit_registry("m/s"))
+            self.assertEqual(states[0].location, loc)
+            self.assertEqual(states[0].privacy_id, self.privacy.privacy_id)
+            self.assertEqual(states[0].source_id, self.file.datafile_id)
+
+            contacts = self.store.session.query(self.store.db_classes.Contact).all()
+            self.assertEqual(len(contacts), 1)
+            self.assertEqual(contacts[0].name, "TEST")
+            self.assertAlmostEqual(contacts[0].bearing.magnitude, 90)
+            self.assertIsNone(contacts[0].location)
+            self.assertEqual(contacts[0].privacy_id, self.privacy.privacy_id)
+
+            comments = self.store.session.query(self.store.db_classes.Comment).all()
+            self.assertEqual(len(comments), 1)
+            self.assertEqual(comments[0].content, "Comment")
+            self.assertEqual(comments[0].platform_id, self.platform.platform_id)
+
+            logs = self.store.session.query(self.store.db_classes.Log).all()
+            logged = {(log.table, log.id) for log in logs}
+            self.assertIn(("States", states[0].state_id), logged)
+            self.assertIn(("Contacts", contacts[0].contact_id), logged)
+            self.assertIn(("Comments", comments[0].comment_id), logged)
+
+
+class ChunkedMeasurementBufferTestCase(MeasurementBufferTestCase):
+    def setUp(self):
+        super().setUp()
+        self.errors = list()
+        self.buffer = self.file.create_chunked_buffer(
+            "TEST", 10, constants.BASIC_LEVEL, self.errors
+        )
+
+    def create_states(self, count, heading=0):
+        for _ in range(count):
+            state = self.create_state()
+            state.heading = heading * unit_registry.degree
+
+    def count_states(self):
+        with self.store.session_scope():
+            return self.store.session.query(self.store.db_classes.State).count()
+
+    def test_context_is_interned(self):
+        """Test whether the interned values are kept when rows are staged"""
+        with self.store.session_scope():
+            self.create_states(100)
+
+        columns = self.buffer.columns["States"]
+        self.assertEqual(len(self.buffer), 100)
+        self.assertEqual(len(columns), 10)
+        self.assertEqual(len(columns.context.values), 1)
+
+    def test_rows_are_staged_in_chunks(self):
+        """Test whether no more than chunk_size rows are kept in memory"""
+        with self.store.session_scope():
+            self.create_states(25)
+
+            columns = self.buffer.columns["States"]
+            self.assertEqual(len(columns), 5)
+            self.assertEqual(columns.staged_count, 20)
+            self.assertEqual(len(self.buffer), 25)
+            # the staged rows are counted but can't be read
+            self.buffer[-1].heading = 90 * unit_registry.degree
+            self.assertEqual(self.buffer[24].heading, self.buffer[-1].heading)
+            self.assertEqual(list(self.buffer)[-1].heading, self.buffer[24].heading)
+            self.assertEqual(self.buffer[20].heading, list(self.buffer)[0].heading)
+            with self.assertRaises(IndexError):
+                self.buffer[-6]
+            with self.assertRaises(IndexError):
+                self.buffer[25]
+            # nothing is written to the actual table until the commit
+            states = self.store.session.query(self.store.db_classes.State).all()
+            self.assertEqual(len(states), 0)
+
+            self.assertTrue(
+                self.file.validate(constants.BASIC_LEVEL, self.errors, "TEST")
+            )
+            self.file.commit(self.store, self.change_id)
+
+        with self.store.session_scope():
+            states = self.store.session.query(self.store.db_classes.State).all()
+            self.assertEqual(len(states), 25)
+            logs = self.store.session.query(self.store.db_classes.Log).all()
+            logged = {log.id for log in logs if log.table == "States"}
+            self.assertEqual(logged, {state.state_id for state in states})
+
+    def test_states_in_bulk_are_staged_in_chunks(self):
+        """Test whether States created in bulk are staged every chunk_size rows"""
+        with self.store.session_scope():
+            self.create_states(5)
+            self.file.create_states(
+                self.store,
+                self.platform,
+                self.sensor,
+                [datetime_to_microseconds(self.current_time)] * 22,
+                "TEST",
+            )
+
+            columns = self.buffer.columns["States"]
+            self.assertEqual(len(columns), 7)
+            self.assertEqual(columns.staged_count, 20)
+            self.assertEqual(len(self.buffer), 27)
+
+    def test_invalid_chunk_drops_staged_rows(self):
+        """Test whether errors found in a chunk stop the rows from being staged"""
+        with self.store.session_scope():
+            self.create_states(15)
+            self.create_states(10, heading=500)
+            self.create_states(10)
+
+            self.assertEqual(len(self.errors), 10)
+            self.assertTrue(self.buffer.dropped)
+            self.assertIsNone(self.buffer.columns["States"].staging)
+            self.assertFalse(
+                self.file.validate(constants.BASIC_LEVEL, self.errors, "TEST")
+            )
+            with self.assertRaises(Exception):
+                self.file.commit(self.store, self.change_id)
+
+        self.assertEqual(self.count_states(), 0)
+
+    def test_discard_drops_staged_rows(self):
+        """Test whether discarding the datafile drops its staged rows"""
+        with self.store.session_scope():
+            self.create_states(15)
+            self.assertIsNotNone(self.buffer.columns["States"].staging)
+            self.file.discard(self.store)
+            self.assertIsNone(self.buffer.columns["States"].staging)
+
+        self.assertEqual(self.count_states(), 0)
+
+
+class StateTrackTestCase(TestCase):
+    def test_floats(self):
+        """Test whether the columns of a track are converted to the stored units"""
+        track = StateTrack(elevations=True)
+        track.append(0, 50.0, -1.0, 90.0, 1.0, 10.0)
+        track.append(1000000, 50.5, -1.5, 180.0, 2.0, 20.0)
+        self.assertEqual(len(track), 2)
+
+        previous = Location()
+        previous.set_latitude_decimal_degrees(49.0)
+        previous.set_longitude_decimal_degrees(-0.5)
+        floats = track.floats(previous)
+        self.assertEqual(list(floats["prev_latitude"]), [49.0, 50.0])
+        self.assertEqual(list(floats["prev_longitude"]), [-0.5, -1.0])
+        self.assertEqual(list(floats["elevation"]), [10.0, 20.0])
+        self.assertAlmostEqual(floats["heading"][1], 3.141592653589793)
+        knot = (1 * unit_registry.knot).to(unit_registry.metre / unit_registry.second)
+        self.assertAlmostEqual(floats["speed"][1], 2 * knot.magnitude)
+
+        location = track.last_location()
+        self.assertEqual((location.latitude, location.longitude), (50.5, -1.5))
+
+    def test_floats_without_previous_location(self):
+        """Test whether the first previous location is missing if not given"""
+        track = StateTrack()
+        track.append(0, 50.0, -1.0, 90.0, 1.0)
+        floats = track.floats()
+        self.assertNotIn("elevation", floats)
+        self.assertNotEqual(floats["prev_latitude"][0], floats["prev_latitude"][0])
+
+    def test_normalise_heading(self):
+        self.assertEqual(normalise_heading(-90.0), 270.0)
+        self.assertEqual(normalise_heading(450.0), 90.0)
+        self.assertEqual(normalise_heading(360.0), 360.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,327 @@
+import unittest
+
+from datetime import datetime, timedelta
+from unittest import TestCase
+from unittest.mock import patch
+
+from pepys_import.core.formats import unit_registry
+from pepys_import.core.formats.location import Location
+from pepys_import.core.store.data_store import DataStore
+from pepys_import.core.store.measurement_buffer import ContactColumns, StateColumns
+from pepys_import.core.store.measurement_query import BoundingBox, StateBatch
+
+START_TIME = datetime(2020, 1, 1, 12, 0, 0)
+
+
+class MeasurementQueryTestCase(TestCase):
+    def setUp(self):
+        self.store = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+        self.store.initialise()
+        with self.store.session_scope():
+            change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+            nationality = self.store.add_to_nationalities(
+                "test_nationality", change_id
+            ).name
+            platform_type = self.store.add_to_platform_types(
+                "test_platform_type", change_id
+            ).name
+            sensor_type = self.store.add_to_sensor_types("test_sensor_type", change_id)
+            privacy = self.store.add_to_privacies("test_privacy", change_id)
+            datafile = self.store.get_datafile(
+                "test_file", "csv", 0, "HASHED", change_id
+            )
+
+            sensor_ids = dict()
+            platform_ids = dict()
+            for platform_name in ("PLATFORM-1", "PLATFORM-2"):
+                platform = self.store.get_platform(
+                    platform_name=platform_name,
+                    nationality=nationality,
+                    platform_type=platform_type,
+                    privacy=privacy.name,
+                    change_id=change_id,
+                )
+                sensor = platform.get_sensor(
+                    self.store, "gps", sensor_type, change_id=change_id
+                )
+                sensor_ids[platform_name] = sensor.sensor_id
+                platform_ids[platform_name] = platform.platform_id
+            self.sensor_ids = sensor_ids
+            self.platform_ids = platform_ids
+            self.privacy_id = privacy.privacy_id
+            self.datafile_id = datafile.datafile_id
+
+            # PLATFORM-1 heads north-east from (50N, 1W), one State a minute, and
+            # PLATFORM-2 stays at (40N, 10E)
+            columns = StateColumns(self.store.db_classes.State, datafile.datafile_id)
+            for i in range(10):
+                record = columns.append(
+                    START_TIME + timedelta(minutes=i),
+                    sensor_name="gps",
+                    platform_name="PLATFORM-1",
+                    sensor_id=sensor_ids["PLATFORM-1"],
+                    privacy_id=privacy.privacy_id,
+                )
+                record.location = self.location(50 + i * 0.1, -1 + i * 0.1)
+                record.heading = 45 * unit_registry.degree
+                record.speed = 2 * (unit_registry.metre / unit_registry.second)
+
+                record = columns.append(
+                    START_TIME + timedelta(minutes=i, seconds=30),
+                    sensor_name="gps",
+                    platform_name="PLATFORM-2",
+                    sensor_id=sensor_ids["PLATFORM-2"],
+                    privacy_id=privacy.privacy_id,
+                )
+                record.location = self.location(40, 10)
+            columns.commit(self.store, change_id)
+
+    def tearDown(self):
+        pass
+
+    @staticmethod
+    def location(latitude, longitude):
+        location = Location()
+        location.set_latitude_decimal_degrees(latitude)
+        location.set_longitude_decimal_degrees(longitude)
+        return location
+
+    def test_time_window(self):
+        """Test whether States are filtered by time and ordered by it"""
+        with self.store.session_scope():
+            rows = list(
+                self.store.measurement_query.iter_states(
+                    start=START_TIME + timedelta(minutes=2),
+                    end=START_TIME + timedelta(minutes=4),
+                )
+            )
+            self.assertEqual(len(rows), 5)
+            times = [row.time for row in rows]
+            self.assertEqual(times, sorted(times))
+            self.assertEqual(times[0], START_TIME + timedelta(minutes=2))
+
+    def test_bounding_box(self):
+        """Test whether States are filtered by location"""
+        with self.store.session_scope():
+            rows = list(
+                self.store.measurement_query.iter_states(
+                    bounding_box=(-0.85, 50.15, -0.45, 50.55)
+                )
+            )
+            self.assertEqual(len(rows), 4)
+            self.assertEqual(
+                {row.sensor_id for row in rows}, {self.sensor_ids["PLATFORM-1"]}
+            )
+            self.assertAlmostEqual(rows[0].latitude, 50.2)
+            self.assertAlmostEqual(rows[0].longitude, -0.8)
+            self.assertAlmostEqual(rows[0].heading, 45)
+            self.assertAlmostEqual(rows[0].speed, 2)
+            self.assertIsNone(rows[0].elevation)
+
+    def test_bounding_box_uses_spatial_index(self):
+        """Test whether the R*Tree of SpatiaLite is used to find the candidates"""
+        with self.store.session_scope():
+            session = self.store.session
+            session.execute(
+                "CREATE VIRTUAL TABLE idx_States_location "
+                "USING rtree(pkid, xmin, xmax, ymin, ymax)"
+            )
+            # Leave the first State of the box out of the index
+            for state in session.query(self.store.db_classes.State).all():
+                location = state.location
+                if abs(location.latitude - 50.2) < 1e-9:
+                    continue
+                session.execute(
+                    "INSERT INTO idx_States_location VALUES (:id, :x, :x, :y, :y)",
+                    {
+                        "id": state.state_id,
+                        "x": location.longitude,
+                        "y": location.latitude,
+                    },
+                )
+
+            rows = list(
+                self.store.measurement_query.iter_states(
+                    bounding_box=(-0.85, 50.15, -0.45, 50.55)
+                )
+            )
+            self.assertEqual(len(rows), 3)
+            self.assertAlmostEqual(rows[0].latitude, 50.3)
+
+    def test_invalid_bounding_box(self):
+        """Test whether bounding boxes must be given from west to east"""
+        with self.assertRaises(ValueError):
+            BoundingBox(10, 40, -10, 50)
+
+    def test_track(self):
+        """Test whether a track contains the States of a single platform"""
+        with self.store.session_scope():
+            track = self.store.measurement_query.track(
+                "PLATFORM-2", end=START_TIME + timedelta(minutes=5)
+            )
+            self.assertIsInstance(track, StateBatch)
+            self.assertEqual(len(track), 5)
+            self.assertEqual(set(track.latitude), {40.0})
+
+    def test_batches(self):
+        """Test whether results are split into batches of the given size"""
+        with self.store.session_scope():
+            batches = list(self.store.measurement_query.states(batch_size=6))
+            self.assertEqual([len(batch) for batch in batches], [6, 6, 6, 2])
+
+    def test_decimated_states(self):
+        """Test whether streamed States are decimated for every sensor"""
+        with self.store.session_scope():
+            rows = list(
+                self.store.measurement_query.iter_states(max_points=4, batch_size=3)
+            )
+        # The period of 9.5 minutes is split in buckets of 2.375 minutes
+        self.assertEqual(
+            [
+                row.time
+                for row in rows
+                if row.sensor_id == self.sensor_ids["PLATFORM-1"]
+            ],
+            [START_TIME + timedelta(minutes=minutes) for minutes in (0, 3, 5, 8)],
+        )
+        self.assertEqual(len(rows), 8)
+
+    def test_decimated_states_without_matches(self):
+        """Test whether decimating an empty query yields nothing"""
+        with self.store.session_scope():
+            batches = list(
+                self.store.measurement_query.states(
+                    start=START_TIME + timedelta(days=1), max_points=10
+                )
+            )
+        self.assertEqual(batches, [])
+
+    def test_decimated_track(self):
+        """Test whether a track is decimated to the budget of points"""
+        with self.store.session_scope():
+            query = self.store.measurement_query
+            track = query.track("PLATFORM-1", max_points=3, method="douglas-peucker")
+            self.assertEqual(len(track), 3)
+            self.assertEqual(track.time[0], query.track("PLATFORM-1").time[0])
+            self.assertAlmostEqual(track.latitude[-1], 50.9)
+
+            with self.assertRaises(ValueError):
+                query.track("PLATFORM-1", max_points=3, method="unknown")
+
+    def test_decimated_state_ids(self):
+        """Test whether the IDs of the decimated States of every sensor are found"""
+        with self.store.session_scope():
+            state_ids = self.store.measurement_query.decimated_state_ids(
+                2, "douglas-peucker"
+            )
+            State = self.store.db_classes.State
+            times = [
+                state.time
+                for state in self.store.session.query(State)
+                .filter(State.state_id.in_(state_ids))
+                .order_by(State.time)
+            ]
+        self.assertEqual(len(times), 4)
+        self.assertEqual(times[0], START_TIME)
+        self.assertEqual(times[-1], START_TIME + timedelta(minutes=9, seconds=30))
+
+    def test_track_indexes(self):
+        """Test whether positions are interpolated from the States of a period"""
+        with self.store.session_scope():
+            indexes = self.store.measurement_query.track_indexes(
+                self.platform_ids.values(),
+                start=START_TIME + timedelta(minutes=2, seconds=10),
+                end=START_TIME + timedelta(minutes=4, seconds=10),
+            )
+        track = indexes[self.platform_ids["PLATFORM-1"]]
+        # the States of minutes 3 and 4, and of minutes 2 and 5 around the period
+        self.assertEqual(len(track), 4)
+        latitude, longitude = track.position_at(
+            START_TIME + timedelta(minutes=2, seconds=15)
+        )
+        self.assertAlmostEqual(latitude, 50.225)
+        self.assertAlmostEqual(longitude, -0.775)
+        self.assertEqual(
+            indexes[self.platform_ids["PLATFORM-2"]].position_at(
+                START_TIME + timedelta(minutes=3)
+            ),
+            (40.0, 10.0),
+        )
+
+    def test_contact_positions(self):
+        """Test whether Contacts without a location are located from their host"""
+        with self.store.session_scope():
+            change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+            columns = ContactColumns(self.store.db_classes.Contact, self.datafile_id)
+            for minutes, location in (
+                (1.5, None),
+                (2, self.location(20, 20)),
+                (12, None),
+            ):
+                columns.append(
+                    START_TIME + timedelta(minutes=minutes),
+                    sensor_name="gps",
+                    platform_name="PLATFORM-1",
+                    sensor_id=self.sensor_ids["PLATFORM-1"],
+                    privacy_id=self.privacy_id,
+                ).location = location
+            columns.commit(self.store, change_id)
+
+            Contact = self.store.db_classes.Contact
+            contacts = self.store.session.query(Contact).order_by(Contact.time).all()
+            positions = self.store.contact_positions(contacts)
+        self.assertAlmostEqual(positions[0][0], 50.15)
+        self.assertAlmostEqual(positions[0][1], -0.85)
+        self.assertEqual(positions[1], (20.0, 20.0))
+        # after the end of the track
+        self.assertIsNone(positions[2])
+
+    def test_contact_positions_propagate_errors(self):
+        """Test whether errors other than a missing sensor aren't swallowed"""
+        with self.store.session_scope():
+            change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+            columns = ContactColumns(self.store.db_classes.Contact, self.datafile_id)
+            columns.append(
+                START_TIME,
+                sensor_name="gps",
+                platform_name="PLATFORM-1",
+                sensor_id=self.sensor_ids["PLATFORM-1"],
+                privacy_id=self.privacy_id,
+            )
+            columns.commit(self.store, change_id)
+
+            contacts = self.store.session.query(self.store.db_classes.Contact).all()
+            self.store.name_cache.clear()
+            with patch.object(
+                self.store.name_cache, "load_sensors", side_effect=RuntimeError
+            ):
+                with self.assertRaises(RuntimeError):
+                    self.store.contact_positions(contacts)
+
+    def test_to_numpy(self):
+        """Test whether batches are converted to NumPy arrays without copying"""
+        numpy = import_or_skip("numpy")
+        with self.store.session_scope():
+            track = self.store.measurement_query.track("PLATFORM-1")
+        columns = track.to_numpy()
+        self.assertEqual(columns["time"].dtype, numpy.dtype("datetime64[us]"))
+        self.assertEqual(columns["time"][0], numpy.datetime64(START_TIME, "us"))
+        self.assertEqual(len(columns["latitude"]), 10)
+        self.assertTrue(numpy.isnan(columns["elevation"]).all())
+
+
+def import_or_skip(name):
+    try:
+        return __import__(name)
+    except ImportError:
+        raise unittest.SkipTest(f"{name} is not installed")
+
+
+if __name__ == "__main__":
+    unittest.main()
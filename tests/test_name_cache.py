@@ -0,0 +1,144 @@
+import unittest
+
+from datetime import datetime
+from unittest import TestCase
+
+from sqlalchemy import event
+
+from pepys_import.core.store.data_store import DataStore
+from pepys_import.core.store.name_cache import LRUCache
+
+
+class LRUCacheTestCase(TestCase):
+    def test_least_recently_used_item_is_dropped(self):
+        """Test whether the cache drops the item used longest ago when it is full"""
+        cache = LRUCache(max_size=2)
+        cache.put(1, "one")
+        cache.put(2, "two")
+        self.assertEqual(cache.get(1), "one")
+        cache.put(3, "three")
+        self.assertEqual(len(cache), 2)
+        self.assertIn(1, cache)
+        self.assertNotIn(2, cache)
+        self.assertIsNone(cache.get(2))
+
+
+class NameCacheTestCase(TestCase):
+    def setUp(self):
+        self.store = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+        self.store.initialise()
+        with self.store.session_scope():
+            change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+            privacy = self.store.add_to_privacies("test_privacy", change_id)
+            sensor_type = self.store.add_to_sensor_types("test_sensor_type", change_id)
+            datafile = self.store.get_datafile(
+                "test_file", "csv", 0, "HASHED", change_id
+            )
+            self.datafile_id = datafile.datafile_id
+            self.sensor_ids = list()
+            for number in range(3):
+                platform = self.store.get_platform(
+                    platform_name=f"PLATFORM-{number}",
+                    nationality=self.store.add_to_nationalities(
+                        "test_nationality", change_id
+                    ).name,
+                    platform_type=self.store.add_to_platform_types(
+                        "test_platform_type", change_id
+                    ).name,
+                    privacy=privacy.name,
+                    change_id=change_id,
+                )
+                sensor = platform.get_sensor(
+                    self.store, f"SENSOR-{number}", sensor_type, change_id=change_id
+                )
+                self.sensor_ids.append(sensor.sensor_id)
+                # Only the first two sensors have States of the Datafile
+                if number < 2:
+                    state = datafile.create_state(
+                        self.store,
+                        platform,
+                        sensor,
+                        datetime(2020, 1, 1, 12, number),
+                        parser_name="test",
+                    )
+                    state.privacy = privacy.privacy_id
+            datafile.commit(self.store, change_id)
+
+    def count_queries(self):
+        queries = list()
+        event.listen(
+            self.store.engine,
+            "before_cursor_execute",
+            lambda *args, **kwargs: queries.append(args[2]),
+        )
+        return queries
+
+    def test_preload_datafile(self):
+        """Test whether the names of the sensors of a Datafile are loaded at once"""
+        with self.store.session_scope():
+            queries = self.count_queries()
+            self.store.name_cache.preload_datafile(self.datafile_id)
+            preload_queries = len(queries)
+            self.assertEqual(
+                self.store.name_cache.sensor_names(self.sensor_ids[1]),
+                ("SENSOR-1", "PLATFORM-1"),
+            )
+            self.assertEqual(len(queries), preload_queries)
+
+            # Other sensors are loaded when they are needed
+            self.assertEqual(
+                self.store.get_cached_platform_name(sensor_id=self.sensor_ids[2]),
+                "PLATFORM-2",
+            )
+            self.assertEqual(len(queries), preload_queries + 1)
+
+    def test_platform_name_of_sensor(self):
+        """Test whether the name of the host platform is returned for a sensor"""
+        with self.store.session_scope():
+            self.assertEqual(
+                self.store.get_cached_platform_name(sensor_id=self.sensor_ids[0]),
+                "PLATFORM-0",
+            )
+            self.assertEqual(
+                self.store.get_cached_sensor_name(self.sensor_ids[0]), "SENSOR-0"
+            )
+            with self.assertRaises(Exception):
+                self.store.get_cached_sensor_name(12345)
+
+    def test_sensor_host(self):
+        """Test whether the host of a sensor is returned, or None if it's missing"""
+        with self.store.session_scope():
+            platform = self.store.search_platform("PLATFORM-0")
+            self.assertEqual(
+                self.store.name_cache.sensor_host(self.sensor_ids[0]),
+                platform.platform_id,
+            )
+            self.assertIsNone(self.store.name_cache.sensor_host(12345))
+
+    def test_renamed_platform_is_invalidated(self):
+        """Test whether renaming a platform drops it from the cache"""
+        with self.store.session_scope():
+            self.assertEqual(
+                self.store.get_cached_platform_name(sensor_id=self.sensor_ids[0]),
+                "PLATFORM-0",
+            )
+            platform = self.store.search_platform("PLATFORM-0")
+            platform.name = "RENAMED"
+            self.store.session.flush()
+            self.assertEqual(
+                self.store.get_cached_platform_name(sensor_id=self.sensor_ids[0]),
+                "RENAMED",
+            )
+
+    def test_clear_db_clears_cache(self):
+        """Test whether the cached names are dropped with the rows"""
+        with self.store.session_scope():
+            self.store.name_cache.preload_datafile(self.datafile_id)
+        self.store.clear_db()
+        self.assertEqual(len(self.store.name_cache.sensors), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from prompt_toolkit.completion import CompleteEvent
+from prompt_toolkit.document import Document
+
+from pepys_import.resolvers.name_index import NameCompleter, NameIndex
+
+NAMES = [
+    "DATAFILE-1",
+    "datafile_2.rep",
+    "e_trac.txt",
+    "uk_track.rep",
+    "sen_tracks.rep",
+    "NELSON",
+]
+
+
+class NameIndexTestCase(unittest.TestCase):
+    def test_distinct_names(self):
+        index = NameIndex(NAMES + ["NELSON", "", None])
+        self.assertEqual(len(index), len(NAMES))
+        self.assertEqual(list(index), NAMES)
+        self.assertIn("NELSON", index)
+        self.assertNotIn("nelson", index)
+
+    def test_most_similar_first(self):
+        index = NameIndex(NAMES)
+        self.assertEqual(
+            index.search("track.rep", limit=2), ["uk_track.rep", "sen_tracks.rep"]
+        )
+        self.assertEqual(index.search("nelsn")[0], "NELSON")
+        self.assertEqual(index.search("data"), ["DATAFILE-1", "datafile_2.rep"])
+
+    def test_short_text_matches_start_of_names(self):
+        index = NameIndex(NAMES)
+        self.assertEqual(index.search("e"), ["e_trac.txt"])
+        self.assertEqual(index.search("u", limit=1), ["uk_track.rep"])
+
+    def test_empty_text_returns_first_names(self):
+        index = NameIndex(NAMES)
+        self.assertEqual(index.search("", limit=3), NAMES[:3])
+
+    def test_no_match(self):
+        self.assertEqual(NameIndex(NAMES).search("qqq"), [])
+
+    def test_names_added_later_are_found(self):
+        index = NameIndex(NAMES)
+        index.add("FRIGATE")
+        self.assertEqual(index.search("frig"), ["FRIGATE"])
+
+    def test_common_grams_skipped(self):
+        names = [f"track_{number}" for number in range(100)] + ["track_special"]
+        index = NameIndex(names, max_postings=10)
+        self.assertEqual(index.search("track_special", limit=1), ["track_special"])
+
+
+class NameCompleterTestCase(unittest.TestCase):
+    def test_completions_replace_text(self):
+        completer = NameCompleter(NameIndex(NAMES), limit=2)
+        completions = list(
+            completer.get_completions(Document("track"), CompleteEvent())
+        )
+        self.assertEqual(
+            [completion.text for completion in completions],
+            ["uk_track.rep", "sen_tracks.rep"],
+        )
+        self.assertEqual(completions[0].start_position, -5)
+        self.assertIn("NELSON", completer)
+
+
+if __name__ == "__main__":
+    unittest.main()
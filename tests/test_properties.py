@@ -2,6 +2,7 @@ import unittest
 import pytest
 
 from datetime import datetime
+from unittest.mock import patch
 
 
 from pepys_import.core.store.data_store import DataStore
@@ -815,6 +816,38 @@ class TestLocationProperty:
         assert obj.location.latitude == 50.23
         assert obj.location.longitude == -1.34
 
+    @pytest.mark.parametrize(
+        "class_name", CLASSES_WITH_LOCATION,
+    )
+    def test_location_decoded_once(self, class_name):
+        obj = eval(f"self.store.db_classes.{class_name}()")
+
+        loc = Location()
+        loc.set_latitude_decimal_degrees(50.23)
+        loc.set_longitude_decimal_degrees(-1.34)
+        obj.location = loc
+
+        # The location is decoded once until it changes, and each read returns a new
+        # Location, so that changing one doesn't change the location read later
+        decode_wkt = Location.set_from_wkt_string
+        with patch.object(
+            Location, "set_from_wkt_string", autospec=True, side_effect=decode_wkt
+        ) as decode:
+            first = obj.location
+            assert first is not obj.location
+            assert decode.call_count == 1
+        first.set_latitude_decimal_degrees(0.0)
+        assert obj.location.latitude == 50.23
+        assert obj.location.longitude == -1.34
+
+        loc = Location()
+        loc.set_latitude_decimal_degrees(10.5)
+        loc.set_longitude_decimal_degrees(20.5)
+        obj.location = loc
+
+        assert obj.location.latitude == 10.5
+        assert obj.location.longitude == 20.5
+
 
 class TestActivationMinRangeProperty(unittest.TestCase):
     def setUp(self):
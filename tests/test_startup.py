@@ -0,0 +1,34 @@
+import unittest
+
+from unittest import TestCase
+
+from tests.benchmarks.benchmark_startup import import_times
+
+# Libraries which are only needed once units, GPX files or the Datafile picker are
+# used
+LAZY_MODULES = ["pint", "lxml", "iterfzf"]
+
+
+class StartupTestCase(TestCase):
+    def test_heavy_libraries_are_not_imported_at_startup(self):
+        """Test whether starting an import doesn't import libraries it may not need"""
+        times = import_times()
+        self.assertIn("pepys_import.file.file_processor", times)
+        self.assertEqual([module for module in LAZY_MODULES if module in times], [])
+
+    def test_unit_registry_is_created_on_first_use(self):
+        """Test whether the Unit Registry is only created when it is used"""
+        times = import_times(
+            ["pepys_import.core.formats", "pepys_import.core.formats.rep_line"]
+        )
+        self.assertNotIn("pint", list(times))
+
+        from pepys_import.core.formats import quantity, unit_registry
+
+        speed = quantity(2, unit_registry.knot)
+        self.assertAlmostEqual(speed.to(unit_registry("m/s")).magnitude, 1.0289, 4)
+        self.assertIs(unit_registry.Quantity, quantity)
+
+
+if __name__ == "__main__":
+    unittest.main()
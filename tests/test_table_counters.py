@@ -0,0 +1,109 @@
+import unittest
+
+from datetime import datetime
+from unittest import TestCase
+
+from pepys_import.core.store import constants
+from pepys_import.core.store.data_store import DataStore
+from pepys_import.core.store.table_summary import TableSummary
+
+
+class TableCountersTestCase(TestCase):
+    def setUp(self):
+        self.store = DataStore("", "", "", 0, ":memory:", db_type="sqlite")
+        self.store.initialise()
+        with self.store.session_scope():
+            self.change_id = self.store.add_to_changes(
+                "TEST", datetime.utcnow(), "TEST"
+            ).change_id
+            self.store.add_to_privacies("TEST-1", self.change_id)
+            self.store.add_to_privacies("TEST-2", self.change_id)
+
+    def tearDown(self):
+        pass
+
+    def test_counters_are_seeded_and_incremented(self):
+        """Test whether the counters follow the rows added through the DataStore"""
+        with self.store.session_scope():
+            counters = self.store.table_counters.read()
+            self.assertEqual(counters[constants.PRIVACY][0], 2)
+            self.assertIsNotNone(counters[constants.PRIVACY][1])
+            self.assertEqual(counters[constants.CHANGE][0], 1)
+            self.assertEqual(counters[constants.LOG][0], 2)
+            self.assertEqual(counters[constants.STATE], (0, None))
+            self.assertNotIn(constants.TABLE_COUNTER, counters)
+
+    def test_counters_are_rolled_back_with_the_rows(self):
+        """Test whether the counters aren't changed by a failed session"""
+        with self.assertRaises(ValueError):
+            with self.store.session_scope():
+                self.store.add_to_privacies("TEST-3", self.change_id)
+                raise ValueError()
+
+        with self.store.session_scope():
+            counters = self.store.table_counters.read()
+            self.assertEqual(counters[constants.PRIVACY][0], 2)
+
+    def test_get_status_doesnt_count_rows(self):
+        """Test whether get_status reports the counters instead of counting"""
+        with self.store.session_scope():
+            # Rows added behind the back of the DataStore aren't counted
+            privacy_table = self.store.db_classes.Privacy.__table__
+            self.store.session.execute(privacy_table.insert(), {"name": "TEST-3"})
+
+            report = self.store.get_status(report_reference=True)
+            summaries = {ts.table_name: ts for ts in report.table_summaries}
+            self.assertEqual(summaries[constants.PRIVACY].number_of_rows, 2)
+
+            report = self.store.get_status(report_reference=True, exact=True)
+            summaries = {ts.table_name: ts for ts in report.table_summaries}
+            self.assertEqual(summaries[constants.PRIVACY].number_of_rows, 3)
+
+            # The exact count has resynchronised the counter
+            counters = self.store.table_counters.read()
+            self.assertEqual(counters[constants.PRIVACY][0], 3)
+
+    def test_tables_without_counter_are_counted(self):
+        """Test whether a table without a counter is counted and gets a counter"""
+        with self.store.session_scope():
+            counter_table = self.store.db_classes.TableCounter.__table__
+            self.store.session.execute(
+                counter_table.delete().where(counter_table.c.table == constants.PRIVACY)
+            )
+
+            summaries = self.store.get_table_summaries([self.store.db_classes.Privacy])
+            self.assertEqual(summaries[0].number_of_rows, 2)
+            self.assertFalse(summaries[0].estimated)
+            counters = self.store.table_counters.read()
+            self.assertEqual(counters[constants.PRIVACY][0], 2)
+
+    def test_tables_without_counter_use_estimates(self):
+        """Test whether the statistics of the database are used if there are any"""
+        with self.store.session_scope():
+            counter_table = self.store.db_classes.TableCounter.__table__
+            self.store.session.execute(
+                counter_table.delete().where(counter_table.c.table == constants.PRIVACY)
+            )
+            self.store.session.execute("ANALYZE")
+
+            summaries = self.store.get_table_summaries([self.store.db_classes.Privacy])
+            self.assertEqual(summaries[0].number_of_rows, 2)
+            self.assertTrue(summaries[0].estimated)
+
+    def test_clear_db_resets_counters(self):
+        """Test whether the counters are zero after clearing the database"""
+        self.store.clear_db()
+        with self.store.session_scope():
+            counters = self.store.table_counters.read()
+            self.assertEqual(counters[constants.PRIVACY], (0, None))
+            self.assertEqual(counters[constants.LOG], (0, None))
+
+    def test_table_summary_with_known_values(self):
+        """Test whether TableSummary doesn't query a table with a known size"""
+        ts = TableSummary(None, self.store.db_classes.State, 10, datetime(2020, 1, 1))
+        self.assertEqual(ts.number_of_rows, 10)
+        self.assertEqual(ts.created_date, "2020-01-01 00:00:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
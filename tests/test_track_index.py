@@ -0,0 +1,65 @@
+import math
+import unittest
+
+from datetime import datetime
+
+from pepys_import.core.store.measurement_buffer import NAN, datetime_to_microseconds
+from pepys_import.core.store.track_index import TrackIndex
+
+MINUTE = 60 * 1000000
+
+
+class TrackIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        # heading north-east, one State a minute, the third one without a location
+        self.index = TrackIndex(
+            [0, MINUTE, 2 * MINUTE, 3 * MINUTE],
+            [50, 51, NAN, 53],
+            [-1, 0, NAN, 2],
+        )
+
+    def test_states_without_location_are_dropped(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(list(self.index.times), [0, MINUTE, 3 * MINUTE])
+
+    def test_position_at(self):
+        self.assertEqual(self.index.position_at(MINUTE), (51, 0))
+        self.assertEqual(self.index.position_at(MINUTE // 2), (50.5, -0.5))
+        self.assertEqual(self.index.position_at(2 * MINUTE), (52, 1))
+        self.assertIsNone(self.index.position_at(-1))
+        self.assertIsNone(self.index.position_at(3 * MINUTE + 1))
+
+    def test_position_at_datetime(self):
+        start = datetime(2020, 1, 1)
+        index = TrackIndex([datetime_to_microseconds(start)], [10], [20])
+        self.assertEqual(index.position_at(start), (10, 20))
+
+    def test_positions_at(self):
+        times = [-MINUTE, MINUTE // 2, 2 * MINUTE, 0, 4 * MINUTE]
+        latitudes, longitudes = self.index.positions_at(times)
+        for time, latitude, longitude in zip(times, latitudes, longitudes):
+            position = self.index.position_at(time)
+            if position is None:
+                self.assertTrue(math.isnan(latitude) and math.isnan(longitude))
+            else:
+                self.assertEqual((latitude, longitude), position)
+
+    def test_unsorted_states(self):
+        index = TrackIndex([MINUTE, 0], [51, 50], [1, 0])
+        self.assertEqual(list(index.times), [0, MINUTE])
+        self.assertEqual(index.position_at(MINUTE // 2), (50.5, 0.5))
+
+    def test_antimeridian(self):
+        index = TrackIndex([0, MINUTE], [0, 0], [179, -179])
+        latitude, longitude = index.position_at(MINUTE // 4)
+        self.assertAlmostEqual(longitude, 179.5)
+        latitude, longitude = index.position_at(3 * MINUTE // 4)
+        self.assertAlmostEqual(longitude, -179.5)
+
+    def test_lengths_must_match(self):
+        with self.assertRaises(ValueError):
+            TrackIndex([0, 1], [0], [0])
+
+
+if __name__ == "__main__":
+    unittest.main()